@@ -6,7 +6,11 @@ Integrates all agents for end-to-end automation
 import os
 import sys
 import time
+import uuid
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List
 
@@ -15,6 +19,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import all agents
 from ai_agents.email_agent.email_agent import EmailAgent
+from ai_agents.email_agent.email_connector import EmailConnector
+from ai_agents.email_agent.idle_watcher import IdleWatcher
+from ai_agents.email_agent.multi_source import MultiSourceIntake, load_source_config
 from ai_agents.requirement_agent.requirement_agent import RequirementAgent
 from ai_agents.decision_agent.decision_agent import DecisionAgent
 from ai_agents.team_agent.team_assignment import TeamAssignmentAgent
@@ -37,12 +44,22 @@ class AutonomousSystem:
     6. Monitoring Agent → Tracks progress
     """
     
-    def __init__(self):
-        """Initialize all agents"""
+    def __init__(self, email_connector: EmailConnector = None):
+        """
+        Initialize all agents
+        
+        Args:
+            email_connector: Existing (e.g. pooled) email connector to use
+                (ignored when EMAIL_SOURCES configures several mailboxes)
+        """
         logger.info("Initializing Autonomous System...")
         
         # Initialize agents
-        self.email_agent = EmailAgent()
+        sources = load_source_config() if email_connector is None else []
+        if sources:
+            self.email_agent = MultiSourceIntake(sources)
+        else:
+            self.email_agent = EmailAgent(connector=email_connector)
         self.requirement_agent = RequirementAgent()
         self.decision_agent = DecisionAgent()
         self.team_agent = TeamAssignmentAgent()
@@ -53,6 +70,12 @@ class AutonomousSystem:
         self.active_projects = []
         self.team_members = self._load_team_members()
         
+        # Projects processed in parallel; LLM calls are throttled by the shared client
+        self.project_workers = int(os.getenv("PROJECT_CONCURRENCY", 4))
+        self._projects_lock = threading.Lock()
+        # Email connectors are not thread-safe
+        self._email_lock = threading.Lock()
+        
         logger.info("Autonomous System initialized successfully")
     
     def _load_team_members(self) -> List[Dict]:
@@ -103,18 +126,51 @@ class AutonomousSystem:
         
         logger.info(f"Found {len(project_emails)} new project emails")
         
-        for email_data in project_emails:
-            self._process_single_project(email_data)
-    
-    def _process_single_project(self, email_data: Dict):
-        """Process a single project from email to team assignment"""
-        
-        # STEP 2: Extract Requirements
+        # STEP 2: Extract Requirements (batched, so a spike of emails costs a few LLM calls)
         logger.info("\n" + "="*80)
         logger.info("STEP 2: EXTRACTING REQUIREMENTS")
         logger.info("="*80)
         
-        requirements = self.requirement_agent.extract_requirements(email_data)
+        all_requirements = self.requirement_agent.extract_requirements_batch(project_emails)
+        
+        # STEPS 3-5 run concurrently, one worker per project
+        workers = max(1, min(self.project_workers, len(project_emails)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="project") as executor:
+            futures = [
+                executor.submit(self._process_single_project, email_data, requirements)
+                for email_data, requirements in zip(project_emails, all_requirements)
+            ]
+            for email_data, future in zip(project_emails, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Error processing project email '{email_data.get('subject')}': {e}")
+    
+    @staticmethod
+    def _project_id(email_data: Dict) -> str:
+        """
+        Project ID derived from the source email
+        
+        A hash of the stable email ID, so IDs are unique across runs and
+        processes (a per-instance counter restarted at P001 every time) and
+        the same email always maps to the same project.
+        
+        Args:
+            email_data: Email dictionary with 'email_id'
+        
+        Returns:
+            Project ID such as 'P3FA91C0B7D'
+        """
+        email_id = email_data.get('email_id') or uuid.uuid4().hex
+        return "P" + hashlib.blake2b(email_id.encode('utf-8'), digest_size=5).hexdigest().upper()
+    
+    def _process_single_project(self, email_data: Dict, requirements: Dict = None):
+        """Process a single project from email to team assignment"""
+        
+        if requirements is None:
+            requirements = self.requirement_agent.extract_requirements(email_data)
+        
+        logger.info(f"Email: {email_data.get('subject')}")
         logger.info(f"Extracted: {requirements.get('project_type')}, "
                    f"Budget: Rs.{requirements.get('budget')}, "
                    f"Deadline: {requirements.get('deadline')}")
@@ -130,7 +186,7 @@ class AutonomousSystem:
         
         # Prepare project for priority scoring
         project_for_scoring = {
-            "project_id": f"P{len(self.active_projects) + 1:03d}",
+            "project_id": self._project_id(email_data),
             "deadline": requirements.get('deadline'),
             "budget": requirements.get('budget'),
             "advance_paid": requirements.get('advance_paid'),
@@ -182,10 +238,11 @@ class AutonomousSystem:
         self.communication_agent.send_email(client_email, email_content)
         
         # Mark email as processed
-        self.email_agent.mark_email_processed(
-            email_data['email_id'],
-            project_for_scoring['project_id']
-        )
+        with self._email_lock:
+            self.email_agent.mark_email_processed(
+                email_data['email_id'],
+                project_for_scoring['project_id']
+            )
         
         # Store project
         project_record = {
@@ -196,7 +253,8 @@ class AutonomousSystem:
             'created_at': datetime.now().isoformat()
         }
         
-        self.active_projects.append(project_record)
+        with self._projects_lock:
+            self.active_projects.append(project_record)
         
         logger.info(f"\n✓ Project {project_for_scoring['project_id']} successfully processed!")
     
@@ -239,16 +297,26 @@ class AutonomousSystem:
                         delay_email
                     )
     
-    def run_continuous_loop(self, interval_minutes: int = 10):
+    def run_continuous_loop(self, interval_minutes: int = 10, use_idle: bool = False):
         """
         Run continuous autonomous loop
         
         Args:
-            interval_minutes: Minutes between checks
+            interval_minutes: Minutes between checks (between project
+                monitoring runs in IDLE mode)
+            use_idle: Wake on IMAP IDLE notifications instead of polling;
+                falls back to polling if the server lacks IDLE
         """
         logger.info(f"\n{'='*80}")
         logger.info("STARTING AUTONOMOUS SYSTEM")
         logger.info(f"{'='*80}\n")
+        
+        if use_idle and isinstance(self.email_agent, MultiSourceIntake):
+            logger.warning("IMAP IDLE watches a single mailbox, polling all sources instead")
+        elif use_idle:
+            self._run_idle_loop(interval_minutes)
+            return
+        
         logger.info(f"Checking every {interval_minutes} minutes...")
         logger.info("Press Ctrl+C to stop\n")
         
@@ -270,6 +338,37 @@ class AutonomousSystem:
             self.email_agent.disconnect()
             logger.info("System stopped")
     
+    def _run_idle_loop(self, interval_minutes: int):
+        """
+        Push-mode loop: process emails as soon as the server reports them
+        
+        Args:
+            interval_minutes: Minutes between project monitoring runs
+        """
+        watcher = IdleWatcher(
+            self.email_agent.connector,
+            on_new_mail=self.run_once,
+            renew_seconds=interval_minutes * 60,
+            poll_interval_minutes=interval_minutes,
+            on_timeout=self._monitor_if_active
+        )
+        
+        logger.info("Waiting for new emails (IMAP IDLE)...")
+        logger.info("Press Ctrl+C to stop\n")
+        
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            logger.info("\n\nStopping autonomous system...")
+            watcher.stop()
+            self.email_agent.disconnect()
+            logger.info("System stopped")
+    
+    def _monitor_if_active(self):
+        """Monitor active projects if there are any"""
+        if self.active_projects:
+            self.monitor_active_projects()
+    
     def run_once(self):
         """Run one iteration (useful for testing)"""
         self.process_new_emails()
@@ -293,3 +392,5 @@ if __name__ == "__main__":
     
     # For continuous operation, use:
     # system.run_continuous_loop(interval_minutes=10)
+    # or, for near-real-time intake with IMAP IDLE:
+    # system.run_continuous_loop(interval_minutes=10, use_idle=True)
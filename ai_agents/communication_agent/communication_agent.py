@@ -4,11 +4,13 @@ Generates and sends professional emails to clients
 """
 
 import os
-import json
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 import google.generativeai as genai
+from pydantic import BaseModel, ConfigDict
+
+from ..llm_client import LLMClient, get_llm_client
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +42,15 @@ Respond with valid JSON only.
 """
 
 
+class GeneratedEmail(BaseModel):
+    """Schema of a generated client email"""
+    model_config = ConfigDict(extra='allow')
+    
+    subject: str
+    body: str
+    tone: Optional[str] = None
+
+
 class CommunicationAgent:
     """
     Client Communication Agent
@@ -47,13 +58,14 @@ class CommunicationAgent:
     Generates professional emails for various scenarios
     """
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, llm_client: LLMClient = None):
         """Initialize Communication Agent"""
         genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
         self.model = genai.GenerativeModel(
             model_name="models/gemini-2.5-flash-lite-preview-09-2025",
             generation_config={"temperature": 0.4}
         )
+        self.llm = llm_client or get_llm_client()
         self.name = "CommunicationAgent"
         self.company_name = os.getenv("COMPANY_NAME", "Our Company")
     
@@ -99,18 +111,7 @@ Deliverables: Ready for review
                 context=context
             )
             
-            response = self.model.generate_content(prompt)
-            
-            # Parse response
-            response_text = response.text.strip()
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            
-            email_data = json.loads(response_text.strip())
+            email_data = self.llm.generate_json(self.model, prompt, GeneratedEmail, expect=dict)
             
             logger.info(f"Generated {email_type} email")
             return email_data
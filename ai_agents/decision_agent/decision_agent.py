@@ -6,11 +6,22 @@ Enhanced with Industry-Standard Priority Scoring
 
 import os
 import json
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 from datetime import datetime
 import google.generativeai as genai
+from pydantic import BaseModel, ConfigDict
 from ..prompts.agent_prompts import DECISION_AGENT_PROMPT, AGENT_CONFIGS
-from .priority_scorer import PriorityScorer, rank_projects
+from ..llm_client import LLMClient, get_llm_client
+from .priority_scorer import PriorityScorer
+from .priority_queue import ProjectPriorityQueue
+
+
+class DecisionResponse(BaseModel):
+    """Schema of the decision response"""
+    model_config = ConfigDict(extra='allow')
+    
+    decisions: List[Dict[str, Any]] = []
+    alerts: List[Dict[str, Any]] = []
 
 
 class DecisionAgent:
@@ -27,7 +38,7 @@ class DecisionAgent:
     2. Service startup project prioritization (email-to-project workflow)
     """
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, llm_client: LLMClient = None):
         # Configure Gemini API
         genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
         self.model = genai.GenerativeModel(
@@ -36,9 +47,12 @@ class DecisionAgent:
                 "temperature": AGENT_CONFIGS["decision_agent"]["temperature"],
             }
         )
+        self.llm = llm_client or get_llm_client()
         self.config = AGENT_CONFIGS["decision_agent"]
         self.name = self.config["name"]
         self.priority_scorer = PriorityScorer()
+        # Kept across calls so unchanged projects are not rescored
+        self.priority_queue = ProjectPriorityQueue(self.priority_scorer)
         
     def make_decision(
         self,
@@ -68,11 +82,8 @@ class DecisionAgent:
 
 Respond with valid JSON only."""
         
-        # Call Gemini API
-        response = self.model.generate_content(full_prompt)
-        
-        # Parse response
-        decision = json.loads(response.text)
+        # Call Gemini API and parse the response
+        decision = self.llm.generate_json(self.model, full_prompt, DecisionResponse, expect=dict)
         
         # Add metadata
         decision["timestamp"] = datetime.now().isoformat()
@@ -123,8 +134,9 @@ Analyze the situation and provide:
             Decision object with ranked projects and actions
         """
         
-        # Use priority scorer to rank projects
-        ranked_projects = rank_projects(projects)
+        # Rank projects, rescoring only the ones that changed since last call
+        self.priority_queue.sync(projects)
+        ranked_projects = self.priority_queue.ranked()
         
         # Generate decisions based on rankings
         decisions = []
@@ -0,0 +1,317 @@
+"""
+Priority Queue - Incrementally maintained project ranking
+Keeps projects in an indexed heap and only rescores the ones whose inputs
+changed or whose deadline crossed an urgency bucket
+"""
+
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .priority_scorer import PriorityScorer, _deadline_epoch
+
+logger = logging.getLogger(__name__)
+
+# Project fields that feed the priority score
+SCORING_FIELDS = (
+    "deadline", "budget", "advance_paid", "full_payment_done",
+    "client_type", "team_load", "penalty_exists"
+)
+
+# Fields the queue adds to each project
+RANKING_FIELDS = ("priority_score", "priority_level", "priority_reasoning", "score_breakdown")
+
+
+class ProjectPriorityQueue:
+    """
+    Indexed max-heap of projects ordered by priority score
+    
+    Deadline urgency is a step function of the days remaining, so a score
+    only changes when a field changes or the deadline crosses one of the
+    deadline day thresholds of the scoring rules. Each project has one
+    pending timer for its next crossing; advance() rescores just the
+    projects whose timers have fired. Ties keep insertion order, as in
+    rank_projects.
+    
+    Entries have the same fields as rank_projects results; their
+    reasoning is only built when an entry is read. All methods are
+    thread-safe.
+    """
+    
+    def __init__(self, scorer: PriorityScorer = None, key_field: str = "project_id"):
+        """
+        Initialize priority queue
+        
+        Args:
+            scorer: Scorer to use (default: a new PriorityScorer)
+            key_field: Project field that identifies a project
+        """
+        self.scorer = scorer or PriorityScorer()
+        self.key_field = key_field
+        
+        self._heap: List[str] = []
+        self._position: Dict[str, int] = {}
+        self._order: Dict[str, Tuple[float, int]] = {}  # key -> (-score, insertion sequence)
+        self._entries: Dict[str, Dict] = {}
+        self._fingerprints: Dict[str, tuple] = {}
+        self._sequence = 0
+        
+        # (fire time, version, key); entries with an old version are stale
+        self._timers: List[Tuple[float, int, str]] = []
+        self._timer_version: Dict[str, int] = {}
+        
+        self._lock = threading.RLock()
+        self.stats = {'scored': 0, 'unchanged': 0, 'bucket_crossings': 0}
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def __contains__(self, key) -> bool:
+        return key in self._position
+    
+    def get(self, key) -> Optional[Dict]:
+        """Ranked entry of one project, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return self._explained(entry) if entry is not None else None
+    
+    def upsert(self, project: Dict, now: float = None) -> Dict:
+        """
+        Add a project or apply changes to it
+        
+        The project is only rescored if one of its SCORING_FIELDS changed.
+        
+        Args:
+            project: Project dictionary (as for calculate_priority_score)
+            now: Unix timestamp (default: now)
+        
+        Returns:
+            The project's ranked entry
+        """
+        now = time.time() if now is None else now
+        key = project[self.key_field]
+        fingerprint = tuple(project.get(field) for field in SCORING_FIELDS)
+        
+        with self._lock:
+            self.advance(now)
+            
+            entry = self._entries.get(key)
+            if entry is not None and self._fingerprints[key] == fingerprint:
+                self.stats['unchanged'] += 1
+                entry = {**project, **{field: entry[field] for field in RANKING_FIELDS}}
+                self._entries[key] = entry
+                return self._explained(entry)
+            
+            self._fingerprints[key] = fingerprint
+            return self._explained(self._rescore(key, project, now))
+    
+    def sync(self, projects: List[Dict], now: float = None):
+        """
+        Make the queue hold exactly these projects
+        
+        Args:
+            projects: Current project dictionaries
+            now: Unix timestamp (default: now)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            current = set()
+            for project in projects:
+                self.upsert(project, now)
+                current.add(project[self.key_field])
+            for key in [key for key in self._position if key not in current]:
+                self.remove(key)
+    
+    def remove(self, key) -> Optional[Dict]:
+        """
+        Remove a project
+        
+        Args:
+            key: Project identifier
+        
+        Returns:
+            The removed entry, or None if it was not queued
+        """
+        with self._lock:
+            if key not in self._position:
+                return None
+            
+            index = self._position.pop(key)
+            last = self._heap.pop()
+            if index < len(self._heap):
+                self._heap[index] = last
+                self._position[last] = index
+                self._sift_up(index)
+                self._sift_down(self._position[last])
+            
+            self._timer_version[key] = self._timer_version.get(key, 0) + 1
+            self._order.pop(key, None)
+            self._fingerprints.pop(key, None)
+            return self._entries.pop(key, None)
+    
+    def clear(self):
+        """Remove all projects"""
+        with self._lock:
+            self._heap.clear()
+            self._position.clear()
+            self._order.clear()
+            self._entries.clear()
+            self._fingerprints.clear()
+            self._timers.clear()
+            self._timer_version.clear()
+    
+    def advance(self, now: float = None) -> List:
+        """
+        Rescore projects whose deadline crossed an urgency bucket
+        
+        Args:
+            now: Unix timestamp (default: now)
+        
+        Returns:
+            Keys of the rescored projects
+        """
+        now = time.time() if now is None else now
+        rescored = []
+        
+        with self._lock:
+            while self._timers and self._timers[0][0] <= now:
+                _, version, key = heapq.heappop(self._timers)
+                if self._timer_version.get(key) != version or key not in self._entries:
+                    continue
+                self._rescore(key, self._entries[key], now)
+                self.stats['bucket_crossings'] += 1
+                rescored.append(key)
+        
+        return rescored
+    
+    def top_k(self, k: int, now: float = None) -> List[Dict]:
+        """
+        Highest-priority projects, without touching the rest
+        
+        Walks the heap from the root, so the cost is O(k log k) once
+        pending bucket crossings are applied.
+        
+        Args:
+            k: Number of projects
+            now: Unix timestamp (default: now)
+        
+        Returns:
+            Up to k ranked entries, highest score first
+        """
+        with self._lock:
+            self.advance(now)
+            
+            result = []
+            frontier = [(self._order[self._heap[0]], 0)] if self._heap and k > 0 else []
+            while frontier and len(result) < k:
+                _, index = heapq.heappop(frontier)
+                result.append(self._explained(self._entries[self._heap[index]]))
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(self._heap):
+                        heapq.heappush(frontier, (self._order[self._heap[child]], child))
+            return result
+    
+    def ranked(self, now: float = None) -> List[Dict]:
+        """
+        All projects, highest priority first
+        
+        Args:
+            now: Unix timestamp (default: now)
+        
+        Returns:
+            Ranked entries
+        """
+        with self._lock:
+            self.advance(now)
+            return [self._explained(self._entries[key]) for key in sorted(self._heap, key=self._order.__getitem__)]
+    
+    def _rescore(self, key, project: Dict, now: float) -> Dict:
+        """Score a project, update its heap position and schedule its next crossing"""
+        score_result = self.scorer.calculate_priority_score(project, now=now, explain=False)
+        entry = self._make_entry(project, score_result)
+        self._entries[key] = entry
+        self.stats['scored'] += 1
+        
+        if key in self._position:
+            sequence = self._order[key][1]
+        else:
+            sequence = self._sequence
+            self._sequence += 1
+        self._order[key] = (-entry["priority_score"], sequence)
+        
+        if key in self._position:
+            index = self._position[key]
+            self._sift_up(index)
+            self._sift_down(self._position[key])
+        else:
+            self._heap.append(key)
+            self._position[key] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+        
+        self._schedule(key, project.get("deadline"), now)
+        return entry
+    
+    def _schedule(self, key, deadline: Optional[str], now: float):
+        """Set the project's timer to its next deadline bucket crossing"""
+        version = self._timer_version.get(key, 0) + 1
+        self._timer_version[key] = version
+        
+        days_remaining = (_deadline_epoch(deadline) - now) / 86400
+        # NaN compares False, so unknown deadlines get no timer
+        upcoming = [days for days in self.scorer.rules.deadline_day_bins if days < days_remaining]
+        if not upcoming:
+            return
+        
+        crossing = _deadline_epoch(deadline) - max(upcoming) * 86400
+        # Never schedule in the past (float rounding at the boundary)
+        heapq.heappush(self._timers, (max(crossing, now + 0.001), version, key))
+    
+    def _explained(self, entry: Dict) -> Dict:
+        """Fill in an entry's reasoning if it hasn't been built yet"""
+        if entry["priority_reasoning"] is None:
+            entry["priority_reasoning"] = self.scorer.explain(entry["score_breakdown"], entry)
+        return entry
+    
+    @staticmethod
+    def _make_entry(project: Dict, score_result: Dict) -> Dict:
+        """Ranked entry from a project and its score result"""
+        return {
+            **project,
+            "priority_score": score_result["priority_score"],
+            "priority_level": score_result["priority_level"],
+            "priority_reasoning": score_result["reasoning"],
+            "score_breakdown": score_result["breakdown"]
+        }
+    
+    def _sift_up(self, index: int):
+        heap, order, position = self._heap, self._order, self._position
+        key = heap[index]
+        while index > 0:
+            parent = (index - 1) // 2
+            if order[heap[parent]] <= order[key]:
+                break
+            heap[index] = heap[parent]
+            position[heap[index]] = index
+            index = parent
+        heap[index] = key
+        position[key] = index
+    
+    def _sift_down(self, index: int):
+        heap, order, position = self._heap, self._order, self._position
+        key = heap[index]
+        size = len(heap)
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and order[heap[child + 1]] < order[heap[child]]:
+                child += 1
+            if order[key] <= order[heap[child]]:
+                break
+            heap[index] = heap[child]
+            position[heap[index]] = index
+            index = child
+        heap[index] = key
+        position[key] = index
@@ -3,10 +3,21 @@ Priority Scoring System - Industry-Standard Decision Rules
 Based on real service startup practices (IT services, agencies, consulting firms)
 """
 
+import time
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:  # rank_projects scores one project at a time instead
+    np = None
+
+try:
+    from .scoring_rules import ScoringRules, load_scoring_rules
+except ImportError:  # loaded as a top-level module by the standalone examples
+    from scoring_rules import ScoringRules, load_scoring_rules
+
 
 class PriorityLevel(str, Enum):
     CRITICAL = "critical"
@@ -15,11 +26,28 @@ class PriorityLevel(str, Enum):
     LOW = "low"
 
 
+# Level codes used by score_batch (index = code)
+LEVELS = [PriorityLevel.LOW, PriorityLevel.NORMAL, PriorityLevel.HIGH, PriorityLevel.CRITICAL]
+
+# Client type codes of the default rules (see ScoringRules.client_codes); unknown types are -1
+CLIENT_TYPE_CODES = dict(ScoringRules().client_codes)
+
+
+def _deadline_epoch(deadline_str: Optional[str]) -> float:
+    """ISO deadline to Unix timestamp (naive = local time); NaN if missing/invalid"""
+    if not deadline_str:
+        return float("nan")
+    try:
+        return datetime.fromisoformat(str(deadline_str).replace('Z', '+00:00')).timestamp()
+    except (TypeError, ValueError):
+        return float("nan")
+
+
 class PriorityScorer:
     """
     Implements industry-standard priority scoring for service startups.
     
-    Scoring Formula:
+    Scoring Formula (default weights, see scoring_rules.DEFAULT_RULES):
     Priority Score = 
         (Deadline Urgency × 0.40) +
         (Payment Status × 0.25) +
@@ -28,23 +56,38 @@ class PriorityScorer:
         (Team Load × 0.10)
     """
     
-    # Weights (must sum to 1.0 for positive factors)
-    WEIGHTS = {
-        "deadline_urgency": 0.40,
-        "payment_status": 0.25,
-        "project_value": 0.15,
-        "client_importance": 0.10,
-        "team_load_penalty": 0.10
-    }
+    def __init__(self,
+                 weights: Dict[str, float] = None,
+                 high_value_threshold: float = None,
+                 medium_value_threshold: float = None,
+                 rules: ScoringRules = None):
+        """
+        Initialize scorer, optionally with a different scoring policy
+        
+        Args:
+            weights: Factor weights overriding the rules' (may be partial)
+            high_value_threshold: Overrides the rules' high-value threshold
+            medium_value_threshold: Overrides the rules' medium-value threshold
+            rules: Rule tables (default: load_scoring_rules(), i.e. the
+                PRIORITY_RULES_FILE config or the built-in defaults)
+        """
+        self.rules = rules or load_scoring_rules()
+        if weights or high_value_threshold is not None or medium_value_threshold is not None:
+            self.rules = self.rules.replace(weights, high_value_threshold, medium_value_threshold)
+    
+    @property
+    def WEIGHTS(self) -> Dict[str, float]:
+        return self.rules.weights
     
-    # Thresholds
-    HIGH_VALUE_THRESHOLD = 100000  # ₹1L
-    MEDIUM_VALUE_THRESHOLD = 50000  # ₹50k
+    @property
+    def HIGH_VALUE_THRESHOLD(self) -> float:
+        return self.rules.high_value_threshold
     
-    def __init__(self):
-        pass
+    @property
+    def MEDIUM_VALUE_THRESHOLD(self) -> float:
+        return self.rules.medium_value_threshold
     
-    def calculate_priority_score(self, project: Dict) -> Dict:
+    def calculate_priority_score(self, project: Dict, now: float = None, explain: bool = True) -> Dict:
         """
         Calculate comprehensive priority score for a project.
         
@@ -57,175 +100,198 @@ class PriorityScorer:
                 - client_type: str (new/repeat/long_term)
                 - team_load: float (0-100, percentage)
                 - penalty_exists: bool (optional)
+            now: Unix timestamp the deadline is measured from (default: now)
+            explain: Build the reasoning strings (else 'reasoning' is None;
+                see explain())
                 
         Returns:
             Dictionary with score, level, and reasoning
         """
+        rules = self.rules
         
         # Calculate individual scores
-        deadline_score = self._score_deadline_urgency(project.get("deadline"))
-        payment_score = self._score_payment_status(
-            project.get("advance_paid", False),
-            project.get("full_payment_done", False)
-        )
-        value_score = self._score_project_value(project.get("budget", 0))
-        client_score = self._score_client_importance(project.get("client_type", "new"))
-        team_penalty = self._score_team_load(project.get("team_load", 0))
+        deadline = project.get("deadline")
+        if deadline:
+            now = time.time() if now is None else now
+            deadline_score = rules.deadline_score((_deadline_epoch(deadline) - now) / 86400)
+        else:
+            deadline_score = rules.deadline_unknown_score
+        payment_score = rules.payment_score(project.get("advance_paid", False), project.get("full_payment_done", False))
+        value_score = rules.value_score(project.get("budget", 0))
+        client_score = rules.client_score(project.get("client_type", "new"))
+        team_penalty = rules.team_load_penalty(project.get("team_load", 0))
         
         # Apply weights
         weighted_score = (
-            deadline_score * self.WEIGHTS["deadline_urgency"] +
-            payment_score * self.WEIGHTS["payment_status"] +
-            value_score * self.WEIGHTS["project_value"] +
-            client_score * self.WEIGHTS["client_importance"] -
-            team_penalty * self.WEIGHTS["team_load_penalty"]
+            deadline_score * rules.weight_deadline +
+            payment_score * rules.weight_payment +
+            value_score * rules.weight_value +
+            client_score * rules.weight_client -
+            team_penalty * rules.weight_team
         )
         
         # Override for penalty/SLA situations
         if project.get("penalty_exists", False):
-            weighted_score = max(weighted_score, 90)  # Force high priority
-        
-        # Determine priority level
-        priority_level = self._get_priority_level(weighted_score)
+            weighted_score = max(weighted_score, rules.penalty_floor)  # Force high priority
         
-        # Generate reasoning
-        reasoning = self._generate_reasoning(
-            deadline_score, payment_score, value_score, 
-            client_score, team_penalty, project
-        )
+        breakdown = {
+            "deadline_urgency": deadline_score,
+            "payment_status": payment_score,
+            "project_value": value_score,
+            "client_importance": client_score,
+            "team_load_penalty": team_penalty
+        }
         
         return {
             "priority_score": round(weighted_score, 2),
-            "priority_level": priority_level,
-            "reasoning": reasoning,
-            "breakdown": {
-                "deadline_urgency": deadline_score,
-                "payment_status": payment_score,
-                "project_value": value_score,
-                "client_importance": client_score,
-                "team_load_penalty": team_penalty
-            }
+            "priority_level": LEVELS[rules.level_code(weighted_score)],
+            "reasoning": self.explain(breakdown, project) if explain else None,
+            "breakdown": breakdown
         }
     
-    def _score_deadline_urgency(self, deadline_str: str) -> float:
+    def score_batch(self,
+                    deadline_epoch: "np.ndarray",
+                    budget: "np.ndarray",
+                    advance_paid: "np.ndarray",
+                    full_payment_done: "np.ndarray",
+                    client_codes: "np.ndarray",
+                    team_load: "np.ndarray",
+                    penalty_exists: "np.ndarray" = None,
+                    now: float = None) -> "PriorityBatch":
         """
-        RULE CATEGORY 1: DEADLINE URGENCY (40% weight)
+        Score many projects at once from columnar arrays
         
-        Industry practice: Late delivery = penalty, reputation loss, churn
+        Applies the same rules and weights as calculate_priority_score,
+        with no per-project Python work. Reasoning strings are only built
+        when asked for (PriorityBatch.reasoning).
         
-        Returns: 0-100 score
-        """
-        if not deadline_str:
-            return 50  # Default medium urgency
-        
-        try:
-            deadline = datetime.fromisoformat(deadline_str.replace('Z', '+00:00'))
-            days_remaining = (deadline - datetime.now()).total_seconds() / 86400
+        Args:
+            deadline_epoch: Deadlines as Unix timestamps (NaN = unknown)
+            budget: Project values (NaN = 0)
+            advance_paid: Booleans
+            full_payment_done: Booleans
+            client_codes: Client type codes from rules.client_code (-1 = unknown)
+            team_load: Team load percentages
+            penalty_exists: Booleans (optional)
+            now: Unix timestamp deadlines are measured from (default: now)
             
-            if days_remaining <= 3:
-                return 100  # CRITICAL
-            elif days_remaining <= 7:
-                return 80   # HIGH
-            elif days_remaining <= 14:
-                return 60   # MEDIUM
-            elif days_remaining <= 30:
-                return 40   # NORMAL
-            else:
-                return 20   # LOW
-                
-        except Exception:
-            return 50
-    
-    def _score_payment_status(self, advance_paid: bool, full_payment: bool) -> float:
+        Returns:
+            PriorityBatch with scores, level codes and factor breakdowns
         """
-        RULE CATEGORY 2: PAYMENT STATUS (25% weight)
+        if np is None:
+            raise ImportError("PriorityScorer.score_batch requires numpy")
         
-        Industry practice: Paid clients always get priority
+        rules = self.rules
+        now = time.time() if now is None else now
+        deadline_epoch = np.asarray(deadline_epoch, dtype=np.float64)
+        budget = np.nan_to_num(np.asarray(budget, dtype=np.float64), nan=0.0)
+        advance_paid = np.asarray(advance_paid, dtype=bool)
+        full_payment_done = np.asarray(full_payment_done, dtype=bool)
+        client_codes = np.asarray(client_codes, dtype=np.int64)
+        team_load = np.nan_to_num(np.asarray(team_load, dtype=np.float64), nan=0.0)
         
-        Returns: 0-100 score
-        """
-        if full_payment:
-            return 100  # Maximum priority
-        elif advance_paid:
-            return 70   # High priority
-        else:
-            return 30   # Lower priority (but not zero - still a client)
-    
-    def _score_project_value(self, budget: float) -> float:
-        """
-        RULE CATEGORY 3: PROJECT VALUE / REVENUE IMPACT (15% weight)
+        days_remaining = (deadline_epoch - now) / 86400
+        deadline_scores = np.where(
+            np.isnan(days_remaining),
+            float(rules.deadline_unknown_score),
+            np.asarray(rules.deadline_scores, dtype=np.float64)[
+                np.digitize(np.nan_to_num(days_remaining), rules.deadline_day_bins, right=True)
+            ]
+        )
         
-        Industry practice: High-value projects justify resource focus
+        payment_scores = np.select(
+            [full_payment_done, advance_paid],
+            [float(rules.payment_full), float(rules.payment_advance)],
+            float(rules.payment_pending)
+        )
         
-        Returns: 0-100 score
-        """
-        # Handle None or invalid budget values
-        if budget is None:
-            budget = 0
-        
-        if budget >= self.HIGH_VALUE_THRESHOLD:
-            return 100
-        elif budget >= self.MEDIUM_VALUE_THRESHOLD:
-            return 60
+        value_scores = np.select(
+            [budget >= rules.high_value_threshold, budget >= rules.medium_value_threshold],
+            [float(rules.high_value_score), float(rules.medium_value_score)],
+            np.minimum(rules.small_value_max_score, (budget / rules.medium_value_threshold) * rules.medium_value_score)
+        )
+        
+        client_table = np.asarray(rules.client_scores_by_code, dtype=np.float64)
+        known = (client_codes >= 0) & (client_codes < len(client_table))
+        client_scores = np.where(known, client_table[np.where(known, client_codes, 0)], float(rules.client_unknown_score))
+        
+        team_penalties = np.asarray(rules.team_load_penalties, dtype=np.float64)[
+            np.digitize(team_load, rules.team_load_bins)
+        ]
+        
+        # Same operation order as calculate_priority_score, so results match exactly
+        scores = (
+            deadline_scores * rules.weight_deadline +
+            payment_scores * rules.weight_payment +
+            value_scores * rules.weight_value +
+            client_scores * rules.weight_client -
+            team_penalties * rules.weight_team
+        )
+        
+        if penalty_exists is not None:
+            scores = np.where(np.asarray(penalty_exists, dtype=bool), np.maximum(scores, rules.penalty_floor), scores)
         else:
-            # Linear scale for smaller projects
-            return min(40, (budget / self.MEDIUM_VALUE_THRESHOLD) * 60)
+            penalty_exists = np.zeros(len(scores), dtype=bool)
+        
+        return PriorityBatch(
+            scores=scores,
+            level_codes=np.digitize(scores, rules.level_bins),
+            breakdown={
+                "deadline_urgency": deadline_scores,
+                "payment_status": payment_scores,
+                "project_value": value_scores,
+                "client_importance": client_scores,
+                "team_load_penalty": team_penalties
+            },
+            flags={
+                "advance_paid": advance_paid,
+                "full_payment_done": full_payment_done,
+                "client_codes": client_codes,
+                "penalty_exists": np.asarray(penalty_exists, dtype=bool)
+            },
+            scorer=self
+        )
     
-    def _score_client_importance(self, client_type: str) -> float:
+    def to_columns(self, projects: Sequence[Dict]) -> Dict[str, "np.ndarray"]:
         """
-        RULE CATEGORY 6: CLIENT IMPORTANCE (10% weight)
-        
-        Industry practice: Repeat/long-term clients get slight boost
+        Convert project dictionaries to score_batch arguments
         
-        Returns: 0-100 score
+        Args:
+            projects: Project dictionaries (as for calculate_priority_score)
+            
+        Returns:
+            Keyword arguments for score_batch
         """
-        client_scores = {
-            "long_term": 100,
-            "repeat": 80,
-            "new": 50,
-            "trial": 30
+        if np is None:
+            raise ImportError("PriorityScorer.to_columns requires numpy")
+        
+        return {
+            "deadline_epoch": np.array([_deadline_epoch(p.get("deadline")) for p in projects], dtype=np.float64),
+            "budget": np.array([p.get("budget") or 0 for p in projects], dtype=np.float64),
+            "advance_paid": np.array([bool(p.get("advance_paid", False)) for p in projects], dtype=bool),
+            "full_payment_done": np.array([bool(p.get("full_payment_done", False)) for p in projects], dtype=bool),
+            "client_codes": np.array(
+                [self.rules.client_code(p.get("client_type", "new")) for p in projects],
+                dtype=np.int64
+            ),
+            "team_load": np.array([p.get("team_load") or 0 for p in projects], dtype=np.float64),
+            "penalty_exists": np.array([bool(p.get("penalty_exists", False)) for p in projects], dtype=bool)
         }
-        return client_scores.get(client_type.lower(), 50)
     
-    def _score_team_load(self, team_load_percentage: float) -> float:
+    def explain(self, breakdown: Dict, project: Dict) -> List[str]:
         """
-        RULE CATEGORY 4: TEAM AVAILABILITY & LOAD (10% penalty)
+        Human-readable reasoning for a priority decision
         
-        Industry practice: Overloading teams leads to failure
-        
-        Returns: 0-100 penalty score (higher = worse)
+        Args:
+            breakdown: Factor scores, as in calculate_priority_score's result
+            project: The scored project
+            
+        Returns:
+            Reasons
         """
-        if team_load_percentage >= 90:
-            return 100  # Team overloaded - major penalty
-        elif team_load_percentage >= 80:
-            return 70   # Team near capacity
-        elif team_load_percentage >= 60:
-            return 40   # Team moderately loaded
-        else:
-            return 10   # Team available
-    
-    def _get_priority_level(self, score: float) -> str:
-        """Convert numeric score to priority level"""
-        if score >= 80:
-            return PriorityLevel.CRITICAL
-        elif score >= 60:
-            return PriorityLevel.HIGH
-        elif score >= 40:
-            return PriorityLevel.NORMAL
-        else:
-            return PriorityLevel.LOW
-    
-    def _generate_reasoning(
-        self, 
-        deadline_score: float, 
-        payment_score: float, 
-        value_score: float,
-        client_score: float,
-        team_penalty: float,
-        project: Dict
-    ) -> List[str]:
-        """Generate human-readable reasoning for the priority decision"""
         reasons = []
+        deadline_score = breakdown["deadline_urgency"]
+        team_penalty = breakdown["team_load_penalty"]
         
         # Deadline reasoning
         if deadline_score >= 80:
@@ -242,12 +308,13 @@ class PriorityScorer:
             reasons.append("Payment pending")
         
         # Value reasoning
-        if value_score >= 80:
+        if breakdown["project_value"] >= 80:
             reasons.append("High-value project")
         
         # Client reasoning
-        if project.get("client_type") in ["repeat", "long_term"]:
-            reasons.append(f"{project.get('client_type').replace('_', ' ').title()} client")
+        client_type = project.get("client_type")
+        if client_type in ["repeat", "long_term"]:
+            reasons.append(self.rules.client_reasons.get(client_type) or f"{client_type.replace('_', ' ').title()} client")
         
         # Team load reasoning
         if team_penalty >= 70:
@@ -262,17 +329,105 @@ class PriorityScorer:
         return reasons
 
 
-def rank_projects(projects: List[Dict]) -> List[Dict]:
+class PriorityBatch:
+    """
+    Result of PriorityScorer.score_batch
+    
+    Scores, level codes and factor breakdowns are NumPy arrays aligned
+    with the input rows; reasoning strings are built per row on demand.
+    """
+    
+    def __init__(self, scores, level_codes, breakdown: Dict, flags: Dict, scorer: PriorityScorer):
+        self.scores = scores
+        self.level_codes = level_codes
+        self.breakdown = breakdown
+        self._flags = flags
+        self._scorer = scorer
+    
+    def __len__(self) -> int:
+        return len(self.scores)
+    
+    def level(self, index: int) -> PriorityLevel:
+        """Priority level of one row"""
+        return LEVELS[int(self.level_codes[index])]
+    
+    def ranking(self) -> "np.ndarray":
+        """Row indices, highest score first (ties keep input order)"""
+        return np.argsort(-np.round(self.scores, 2), kind="stable")
+    
+    def reasoning(self, index: int) -> List[str]:
+        """
+        Human-readable reasoning for one row
+        
+        Args:
+            index: Row index
+            
+        Returns:
+            Reasons, as from calculate_priority_score
+        """
+        flags = self._flags
+        client_code = int(flags["client_codes"][index])
+        client_names = self._scorer.rules.client_names
+        client_type = client_names[client_code] if 0 <= client_code < len(client_names) else None
+        
+        return self._scorer.explain(
+            {factor: float(values[index]) for factor, values in self.breakdown.items()},
+            {
+                "full_payment_done": bool(flags["full_payment_done"][index]),
+                "advance_paid": bool(flags["advance_paid"][index]),
+                "client_type": client_type,
+                "penalty_exists": bool(flags["penalty_exists"][index])
+            }
+        )
+    
+    def result(self, index: int) -> Dict:
+        """
+        One row in calculate_priority_score's format
+        
+        Args:
+            index: Row index
+            
+        Returns:
+            Dictionary with score, level, reasoning and breakdown
+        """
+        return {
+            "priority_score": round(float(self.scores[index]), 2),
+            "priority_level": self.level(index),
+            "reasoning": self.reasoning(index),
+            "breakdown": {factor: float(values[index]) for factor, values in self.breakdown.items()}
+        }
+
+
+# Shared by rank_projects (the scorer holds no state)
+_default_scorer = PriorityScorer()
+
+
+def rank_projects(projects: List[Dict], scorer: PriorityScorer = None) -> List[Dict]:
     """
     Rank multiple projects by priority score.
     
     Args:
         projects: List of project dictionaries
+        scorer: Scorer to use (default: a shared PriorityScorer)
         
     Returns:
         List of projects sorted by priority (highest first) with scores
     """
-    scorer = PriorityScorer()
+    scorer = scorer or _default_scorer
+    
+    if np is not None and projects:
+        batch = scorer.score_batch(**scorer.to_columns(projects))
+        ranked = []
+        for index in batch.ranking():
+            score_result = batch.result(index)
+            ranked.append({
+                **projects[index],
+                "priority_score": score_result["priority_score"],
+                "priority_level": score_result["priority_level"],
+                "priority_reasoning": score_result["reasoning"],
+                "score_breakdown": score_result["breakdown"]
+            })
+        return ranked
     
     # Calculate scores for all projects
     scored_projects = []
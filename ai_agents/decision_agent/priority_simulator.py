@@ -0,0 +1,311 @@
+"""
+Priority Simulator - What-if analysis of priority scoring policies
+Re-ranks the current projects under many weight/threshold settings and
+reports how much the ranking moves and which settings are Pareto-best
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # the simulator needs batch scoring
+    np = None
+
+from .priority_scorer import PriorityScorer
+from .scoring_rules import ScoringRules
+
+logger = logging.getLogger(__name__)
+
+# Metrics a setting is judged on (all maximised) when building the Pareto front
+DEFAULT_OBJECTIVES = ("kendall_tau", "top_k_value", "top_k_urgent")
+
+# Below this many configurations the sweep runs in-process
+MIN_PARALLEL_CONFIGS = 200
+
+
+def kendall_tau(x: "np.ndarray", y: "np.ndarray") -> float:
+    """
+    Kendall rank correlation (tau-b, tie-corrected) in O(n log² n)
+    
+    Args:
+        x: First scores
+        y: Second scores, same length
+    
+    Returns:
+        Tau between -1 and 1 (1.0 if both are constant)
+    """
+    n = len(x)
+    if n < 2:
+        return 1.0
+    
+    order = np.lexsort((y, x))
+    x, y = x[order], y[order]
+    
+    total = n * (n - 1) // 2
+    x_ties = _tied_pairs(x)
+    y_ties = _tied_pairs(np.sort(y))
+    joint_ties = _tied_pairs_joint(x, y)
+    
+    # Pairs tied in x are already in y order, so every inversion left is discordant
+    discordant = _count_inversions(_dense_ranks(y))
+    
+    denominator = np.sqrt(float(total - x_ties) * float(total - y_ties))
+    if denominator == 0:
+        return 1.0 if x_ties == y_ties == total else 0.0
+    return float((total - x_ties - y_ties + joint_ties - 2 * discordant) / denominator)
+
+
+def _tied_pairs(sorted_values: "np.ndarray") -> int:
+    """Pairs of equal values in a sorted array"""
+    boundaries = np.flatnonzero(np.diff(sorted_values)) + 1
+    runs = np.diff(np.concatenate(([0], boundaries, [len(sorted_values)])))
+    return int((runs * (runs - 1) // 2).sum())
+
+
+def _tied_pairs_joint(x: "np.ndarray", y: "np.ndarray") -> int:
+    """Pairs equal in both x and y (arrays sorted by x, then y)"""
+    changes = (np.diff(x) != 0) | (np.diff(y) != 0)
+    boundaries = np.flatnonzero(changes) + 1
+    runs = np.diff(np.concatenate(([0], boundaries, [len(x)])))
+    return int((runs * (runs - 1) // 2).sum())
+
+
+def _dense_ranks(values: "np.ndarray") -> "np.ndarray":
+    """0-based ranks where equal values share a rank"""
+    return np.unique(values, return_inverse=True)[1].astype(np.int64)
+
+
+def _count_inversions(ranks: "np.ndarray") -> int:
+    """
+    Pairs i < j with ranks[i] > ranks[j]
+    
+    Bottom-up merge sort with each level done as a few array operations:
+    blocks are made globally sortable by offsetting values by block id.
+    """
+    n = len(ranks)
+    values = ranks.astype(np.int64)
+    positions = np.arange(n)
+    stride = int(values.max()) + 1 if n else 1
+    inversions = 0
+    
+    width = 1
+    while width < n:
+        block = positions // (2 * width)
+        in_right = (positions // width) % 2 == 1
+        keys = block * stride + values
+        
+        # Left halves are sorted and in block order, so their keys are sorted
+        left_keys = keys[~in_right]
+        right_keys = keys[in_right]
+        right_blocks = block[in_right]
+        not_greater = (np.searchsorted(left_keys, right_keys, side='right') -
+                       np.searchsorted(left_keys, right_blocks * stride, side='left'))
+        # A right half only exists next to a full left half
+        inversions += int((width - not_greater).sum())
+        
+        values = values[np.argsort(keys, kind='stable')]
+        width *= 2
+    
+    return inversions
+
+
+def _evaluate_configs(columns: Dict, baseline_scores: "np.ndarray", configs: List[Dict],
+                      top_k: int, now: float, rules: ScoringRules = None) -> List[Dict]:
+    """Score and compare a chunk of configurations (runs in worker processes)"""
+    baseline_top = set(_ranking(baseline_scores)[:top_k].tolist())
+    budget = np.nan_to_num(np.asarray(columns["budget"], dtype=np.float64), nan=0.0)
+    results = []
+    
+    for config in configs:
+        scorer = PriorityScorer(
+            weights=config.get("weights"),
+            high_value_threshold=config.get("high_value_threshold"),
+            medium_value_threshold=config.get("medium_value_threshold"),
+            rules=rules
+        )
+        batch = scorer.score_batch(now=now, **columns)
+        scores = np.round(batch.scores, 2)
+        top = _ranking(scores)[:top_k]
+        
+        results.append({
+            **config,
+            "kendall_tau": round(kendall_tau(baseline_scores, scores), 4),
+            "top_k_churn": round(1 - len(baseline_top.intersection(top.tolist())) / max(1, len(top)), 4),
+            "top_k_value": float(budget[top].sum()),
+            "top_k_urgent": int((batch.breakdown["deadline_urgency"][top] >= 80).sum())
+        })
+    
+    return results
+
+
+def _ranking(scores: "np.ndarray") -> "np.ndarray":
+    """Indices by score, highest first, ties in input order (as rank_projects)"""
+    return np.argsort(-scores, kind='stable')
+
+
+def pareto_front(results: List[Dict], objectives: Sequence[str] = DEFAULT_OBJECTIVES) -> List[Dict]:
+    """
+    Results not dominated on the given (maximised) metrics
+    
+    Args:
+        results: Evaluated configurations
+        objectives: Metric names; higher is better for each
+    
+    Returns:
+        Non-dominated results, best first on the first objective
+    """
+    candidates = sorted(results, key=lambda result: tuple(-result[name] for name in objectives))
+    front: List[Dict] = []
+    
+    for candidate in candidates:
+        values = [candidate[name] for name in objectives]
+        dominated = any(
+            all(kept[name] >= value for name, value in zip(objectives, values))
+            for kept in front
+        )
+        if not dominated:
+            front.append(candidate)
+    
+    return front
+
+
+class PrioritySimulator:
+    """
+    Weight and threshold sensitivity analysis for PriorityScorer
+    
+    Each configuration re-scores the whole project set with
+    PriorityScorer.score_batch; configurations are spread over a process
+    pool. Rankings are compared with the current policy by Kendall tau
+    and by churn in the top k.
+    """
+    
+    def __init__(self, scorer: PriorityScorer = None, top_k: int = 10, max_workers: int = None):
+        """
+        Initialize simulator
+        
+        Args:
+            scorer: Current policy (default: PriorityScorer())
+            top_k: Size of the "top of the list" the metrics look at
+            max_workers: Worker processes (default: PRIORITY_SIMULATOR_WORKERS
+                env var, else the CPU count)
+        """
+        if np is None:
+            raise ImportError("PrioritySimulator requires numpy")
+        
+        self.scorer = scorer or PriorityScorer()
+        self.top_k = top_k
+        self.max_workers = int(max_workers or os.getenv("PRIORITY_SIMULATOR_WORKERS", 0) or os.cpu_count() or 1)
+    
+    def baseline_config(self) -> Dict:
+        """Configuration of the current policy"""
+        return {
+            "weights": dict(self.scorer.rules.weights),
+            "high_value_threshold": self.scorer.rules.high_value_threshold,
+            "medium_value_threshold": self.scorer.rules.medium_value_threshold
+        }
+    
+    def random_configs(self, samples: int, seed: int = None) -> List[Dict]:
+        """
+        Random policies around the current one
+        
+        Weights are drawn from a Dirichlet distribution centred on the
+        current weights (so they keep the same total); thresholds are
+        scaled by 0.5-2x, keeping high above medium.
+        
+        Args:
+            samples: Number of configurations
+            seed: Random seed
+        
+        Returns:
+            Configuration dictionaries
+        """
+        rng = np.random.default_rng(seed)
+        rules = self.scorer.rules
+        names = list(rules.weights)
+        current = np.array([rules.weights[name] for name in names], dtype=np.float64)
+        total = current.sum()
+        
+        weights = rng.dirichlet(current / total * 20, size=samples) * total
+        medium = rules.medium_value_threshold * rng.uniform(0.5, 2.0, size=samples)
+        ratio = rules.high_value_threshold / rules.medium_value_threshold
+        high = medium * ratio * rng.uniform(0.75, 1.5, size=samples)
+        
+        return [
+            {
+                "weights": {name: round(float(value), 4) for name, value in zip(names, row)},
+                "high_value_threshold": round(float(high_value), -3),
+                "medium_value_threshold": round(float(medium_value), -3)
+            }
+            for row, high_value, medium_value in zip(weights, high, np.minimum(medium, high))
+        ]
+    
+    def sweep(self,
+              projects: Sequence[Dict],
+              configs: List[Dict] = None,
+              samples: int = 1000,
+              seed: int = None,
+              objectives: Sequence[str] = DEFAULT_OBJECTIVES,
+              now: float = None) -> Dict:
+        """
+        Evaluate scoring policies against a project set
+        
+        Args:
+            projects: Project dictionaries (as for calculate_priority_score)
+            configs: Configurations with 'weights', 'high_value_threshold'
+                and/or 'medium_value_threshold' (default: random_configs)
+            samples: Random configurations to draw when configs is None
+            seed: Random seed for random_configs
+            objectives: Metrics (maximised) for the Pareto front
+            now: Unix timestamp deadlines are measured from (default: now)
+        
+        Returns:
+            Dictionary with 'baseline', 'results' (one per configuration,
+            with kendall_tau, top_k_churn, top_k_value and top_k_urgent),
+            'pareto_front' and 'elapsed_seconds'
+        """
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        configs = configs if configs is not None else self.random_configs(samples, seed)
+        
+        columns = self.scorer.to_columns(projects)
+        baseline_scores = np.round(self.scorer.score_batch(now=now, **columns).scores, 2)
+        baseline = _evaluate_configs(columns, baseline_scores, [self.baseline_config()], self.top_k, now, self.scorer.rules)[0]
+        
+        results = self._run(columns, baseline_scores, configs, now)
+        
+        elapsed = time.perf_counter() - started
+        logger.info(f"Evaluated {len(configs)} priority policies on {len(projects)} projects in {elapsed:.2f}s")
+        
+        return {
+            "baseline": baseline,
+            "projects": len(projects),
+            "top_k": self.top_k,
+            "results": results,
+            "pareto_front": pareto_front(results, objectives) if results else [],
+            "elapsed_seconds": round(elapsed, 3)
+        }
+    
+    def _run(self, columns: Dict, baseline_scores: "np.ndarray", configs: List[Dict], now: float) -> List[Dict]:
+        """Evaluate configs, in worker processes when worthwhile"""
+        workers = min(self.max_workers, max(1, len(configs) // (MIN_PARALLEL_CONFIGS // 2)))
+        if workers <= 1 or len(configs) < MIN_PARALLEL_CONFIGS:
+            return _evaluate_configs(columns, baseline_scores, configs, self.top_k, now, self.scorer.rules)
+        
+        # A few chunks per worker evens out uneven chunk times
+        chunk_size = -(-len(configs) // (workers * 4))
+        chunks = [configs[start:start + chunk_size] for start in range(0, len(configs), chunk_size)]
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_evaluate_configs, columns, baseline_scores, chunk, self.top_k, now, self.scorer.rules)
+                    for chunk in chunks
+                ]
+                return [result for future in futures for result in future.result()]
+        except Exception as e:
+            logger.error(f"Error in parallel priority simulation, running in-process: {e}")
+            return _evaluate_configs(columns, baseline_scores, configs, self.top_k, now, self.scorer.rules)
@@ -0,0 +1,279 @@
+"""
+Scoring Rules - Rule tables behind the priority score
+Thresholds, factor scores and weights as precompiled lookup tables,
+loadable from a JSON file so policy changes need no code edits
+"""
+
+import os
+import copy
+import json
+import math
+import logging
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Current policy; a rules file only needs the parts it changes
+DEFAULT_RULES = {
+    # Weights (must sum to 1.0 for positive factors)
+    "weights": {
+        "deadline_urgency": 0.40,
+        "payment_status": 0.25,
+        "project_value": 0.15,
+        "client_importance": 0.10,
+        "team_load_penalty": 0.10
+    },
+    # RULE CATEGORY 1: late delivery = penalty, reputation loss, churn
+    "deadline": {
+        "day_bins": [3, 7, 14, 30],  # upper bounds (inclusive)
+        "scores": [100, 80, 60, 40, 20],
+        "unknown_score": 50
+    },
+    # RULE CATEGORY 2: paid clients always get priority
+    "payment": {
+        "full": 100,
+        "advance": 70,
+        "pending": 30  # not zero - still a client
+    },
+    # RULE CATEGORY 3: high-value projects justify resource focus
+    "value": {
+        "high_threshold": 100000,  # ₹1L
+        "medium_threshold": 50000,  # ₹50k
+        "high_score": 100,
+        "medium_score": 60,
+        "small_max_score": 40  # below medium: linear, capped
+    },
+    # RULE CATEGORY 6: repeat/long-term clients get a slight boost
+    "client": {
+        "scores": {"trial": 30, "new": 50, "repeat": 80, "long_term": 100},
+        "unknown_score": 50
+    },
+    # RULE CATEGORY 4: overloading teams leads to failure
+    "team_load": {
+        "bins": [60, 80, 90],  # lower bounds (inclusive)
+        "penalties": [10, 40, 70, 100]
+    },
+    # Score thresholds for normal, high and critical
+    "levels": {
+        "bins": [40, 60, 80]
+    },
+    # SLA/penalty projects score at least this much
+    "penalty_floor": 90
+}
+
+WEIGHT_NAMES = ("deadline_urgency", "payment_status", "project_value", "client_importance", "team_load_penalty")
+
+
+class ScoringRules:
+    """
+    Compiled priority rules
+    
+    Thresholds are sorted tuples searched with bisect, client types are
+    interned to integer codes, and reason strings are built once, so
+    scoring a project allocates nothing but its result.
+    """
+    
+    __slots__ = (
+        "config", "weights", "weight_deadline", "weight_payment", "weight_value", "weight_client", "weight_team",
+        "deadline_day_bins", "deadline_scores", "deadline_unknown_score",
+        "payment_full", "payment_advance", "payment_pending",
+        "high_value_threshold", "medium_value_threshold", "high_value_score", "medium_value_score",
+        "small_value_max_score",
+        "client_codes", "client_names", "client_scores", "client_scores_by_code", "client_unknown_score",
+        "client_reasons", "team_load_bins", "team_load_penalties", "level_bins", "penalty_floor"
+    )
+    
+    def __init__(self, config: Dict = None):
+        """
+        Compile rules
+        
+        Args:
+            config: Rule configuration; missing sections and keys fall back
+                to DEFAULT_RULES
+        
+        Raises:
+            ValueError: If a table is inconsistent (unsorted thresholds,
+                wrong number of scores, unknown weight)
+        """
+        config = _merge(DEFAULT_RULES, config or {})
+        self.config = config
+        
+        unknown = set(config["weights"]) - set(WEIGHT_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown priority weights: {sorted(unknown)}")
+        self.weights = {name: float(config["weights"][name]) for name in WEIGHT_NAMES}
+        (self.weight_deadline, self.weight_payment, self.weight_value,
+         self.weight_client, self.weight_team) = (self.weights[name] for name in WEIGHT_NAMES)
+        
+        deadline = config["deadline"]
+        self.deadline_day_bins = _bins(deadline["day_bins"], "deadline.day_bins")
+        self.deadline_scores = _scores(deadline["scores"], self.deadline_day_bins, "deadline.scores")
+        self.deadline_unknown_score = deadline["unknown_score"]
+        
+        payment = config["payment"]
+        self.payment_full = payment["full"]
+        self.payment_advance = payment["advance"]
+        self.payment_pending = payment["pending"]
+        
+        value = config["value"]
+        self.high_value_threshold = value["high_threshold"]
+        self.medium_value_threshold = value["medium_threshold"]
+        if not 0 < self.medium_value_threshold <= self.high_value_threshold:
+            raise ValueError("value.medium_threshold must be positive and at most value.high_threshold")
+        self.high_value_score = value["high_score"]
+        self.medium_value_score = value["medium_score"]
+        self.small_value_max_score = value["small_max_score"]
+        
+        client = config["client"]
+        names = [name.lower() for name in client["scores"]]
+        self.client_codes = {name: code for code, name in enumerate(names)}
+        self.client_names = tuple(names)
+        self.client_scores = {name.lower(): score for name, score in client["scores"].items()}
+        self.client_scores_by_code = tuple(self.client_scores[name] for name in names)
+        self.client_unknown_score = client["unknown_score"]
+        self.client_reasons = {name: f"{name.replace('_', ' ').title()} client" for name in names}
+        
+        team_load = config["team_load"]
+        self.team_load_bins = _bins(team_load["bins"], "team_load.bins")
+        self.team_load_penalties = _scores(team_load["penalties"], self.team_load_bins, "team_load.penalties")
+        
+        self.level_bins = _bins(config["levels"]["bins"], "levels.bins")
+        if len(self.level_bins) != 3:
+            raise ValueError("levels.bins needs three thresholds (normal, high, critical)")
+        
+        self.penalty_floor = config["penalty_floor"]
+    
+    @classmethod
+    def from_file(cls, path: str) -> "ScoringRules":
+        """
+        Load rules from a JSON file
+        
+        Args:
+            path: Path to JSON rule configuration
+        
+        Returns:
+            Compiled rules
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+    
+    def to_dict(self) -> Dict:
+        """Full configuration (a starting point for a rules file)"""
+        return copy.deepcopy(self.config)
+    
+    def replace(self,
+                weights: Dict[str, float] = None,
+                high_value_threshold: float = None,
+                medium_value_threshold: float = None) -> "ScoringRules":
+        """
+        Copy with different weights and/or value thresholds
+        
+        Args:
+            weights: Factor weights to change (may be partial)
+            high_value_threshold: New high-value threshold
+            medium_value_threshold: New medium-value threshold
+        
+        Returns:
+            New compiled rules
+        """
+        value = {}
+        if high_value_threshold is not None:
+            value["high_threshold"] = high_value_threshold
+        if medium_value_threshold is not None:
+            value["medium_threshold"] = medium_value_threshold
+        return ScoringRules(_merge(self.config, {"weights": weights or {}, "value": value}))
+    
+    def deadline_score(self, days_remaining: float) -> float:
+        """Urgency score for days left (NaN = unknown deadline)"""
+        if math.isnan(days_remaining):
+            return self.deadline_unknown_score
+        return self.deadline_scores[bisect_left(self.deadline_day_bins, days_remaining)]
+    
+    def payment_score(self, advance_paid: bool, full_payment: bool) -> float:
+        """Score for payment status"""
+        if full_payment:
+            return self.payment_full
+        if advance_paid:
+            return self.payment_advance
+        return self.payment_pending
+    
+    def value_score(self, budget: Optional[float]) -> float:
+        """Score for project value (None = 0)"""
+        budget = budget or 0
+        if budget >= self.high_value_threshold:
+            return self.high_value_score
+        if budget >= self.medium_value_threshold:
+            return self.medium_value_score
+        return min(self.small_value_max_score, (budget / self.medium_value_threshold) * self.medium_value_score)
+    
+    def client_score(self, client_type: Optional[str]) -> float:
+        """Score for client type (unknown types get the default)"""
+        score = self.client_scores.get(client_type)
+        if score is None and client_type:
+            score = self.client_scores.get(client_type.lower())
+        return self.client_unknown_score if score is None else score
+    
+    def team_load_penalty(self, team_load: Optional[float]) -> float:
+        """Penalty for team load percentage (higher = worse)"""
+        return self.team_load_penalties[bisect_right(self.team_load_bins, team_load or 0)]
+    
+    def level_code(self, score: float) -> int:
+        """0 = low, 1 = normal, 2 = high, 3 = critical"""
+        return bisect_right(self.level_bins, score)
+    
+    def client_code(self, client_type: Optional[str]) -> int:
+        """Interned code of a client type (-1 = unknown)"""
+        return self.client_codes.get(str(client_type).lower(), -1)
+
+
+def _merge(base: Dict, override: Dict) -> Dict:
+    """Deep-merge override into a copy of base (tables are replaced whole)"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict) and key != "scores":
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _bins(values: List[float], name: str) -> Tuple:
+    """Validated, sorted threshold tuple"""
+    values = tuple(values)
+    if list(values) != sorted(values):
+        raise ValueError(f"{name} must be in ascending order")
+    return values
+
+
+def _scores(values: List[float], bins: Tuple, name: str) -> Tuple:
+    """Score tuple with one entry per bin interval"""
+    if len(values) != len(bins) + 1:
+        raise ValueError(f"{name} needs {len(bins) + 1} entries, got {len(values)}")
+    return tuple(values)
+
+
+@lru_cache(maxsize=8)
+def load_scoring_rules(path: str = None) -> ScoringRules:
+    """
+    Get the configured rules
+    
+    Args:
+        path: JSON rules file (default: PRIORITY_RULES_FILE env var; the
+            built-in DEFAULT_RULES if neither is set)
+    
+    Returns:
+        Compiled rules (defaults if the file can't be loaded)
+    """
+    path = path or os.getenv("PRIORITY_RULES_FILE")
+    if not path:
+        return ScoringRules()
+    
+    try:
+        rules = ScoringRules.from_file(path)
+        logger.info(f"Loaded priority rules from {path}")
+        return rules
+    except Exception as e:
+        logger.error(f"Error loading priority rules from {path}, using defaults: {e}")
+        return ScoringRules()
@@ -0,0 +1,350 @@
+"""
+Body Extractor - Streaming MIME text extraction
+Pulls the first usable text part out of raw message bytes line by line,
+without building a message tree or decoding attachments
+"""
+
+import re
+import codecs
+import binascii
+import logging
+from email.parser import BytesHeaderParser
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Default cap on extracted body text (characters)
+MAX_BODY_CHARS = 50000
+
+# Longer runs without a newline (binary junk) are scanned in pieces
+MAX_LINE_BYTES = 64 * 1024
+
+# Header blocks are truncated beyond this size
+MAX_HEADER_BYTES = 64 * 1024
+
+# Characters outside the base64 alphabet (line breaks, stray whitespace)
+BASE64_JUNK_PATTERN = re.compile(rb'[^A-Za-z0-9+/=]')
+
+# HTML elements that break lines in the extracted text
+HTML_BLOCK_TAGS = {'p', 'div', 'br', 'li', 'tr', 'table', 'ul', 'ol', 'blockquote',
+                   'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'pre'}
+
+# HTML elements whose content is never text
+HTML_SKIP_TAGS = {'script', 'style', 'head', 'title'}
+
+
+def extract_text_body(source: Union[bytes, Iterable[bytes]], max_chars: int = MAX_BODY_CHARS) -> str:
+    """
+    Extract the body text of a raw RFC 822 message
+    
+    Returns the first non-empty text/plain part, else the first text/html
+    part converted to text. Scanning stops as soon as a text/plain part is
+    complete (or the cap is reached), so attachments after it are never
+    read. Attachments before it are skipped without decoding.
+    
+    Args:
+        source: Message bytes, or an iterable of chunks of them
+        max_chars: Maximum characters of body text to return
+    
+    Returns:
+        Body text (stripped), or '' if the message has no text part
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = [bytes(source)]
+    
+    scanner = _MimeScanner(max_chars)
+    try:
+        for line in _iter_lines(source):
+            if scanner.feed_line(line):
+                break
+    except Exception as e:
+        logger.error(f"Error extracting email body: {e}")
+    
+    return scanner.result()
+
+
+class _HTMLTextStripper(HTMLParser):
+    """Collects the visible text of an HTML document fed in pieces"""
+    
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.chars = 0
+        self._parts: List[str] = []
+        self._skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in HTML_SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in HTML_BLOCK_TAGS:
+            self._parts.append('\n')
+    
+    def handle_endtag(self, tag):
+        if tag in HTML_SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in HTML_BLOCK_TAGS:
+            self._parts.append('\n')
+    
+    def handle_data(self, data):
+        if self._skip_depth or self.chars >= self.max_chars:
+            return
+        data = data[:self.max_chars - self.chars]
+        self.chars += len(data)
+        self._parts.append(data)
+    
+    def get_text(self) -> str:
+        """Extracted text with runs of whitespace collapsed"""
+        lines = (' '.join(line.split()) for line in ''.join(self._parts).splitlines())
+        return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+class _PartDecoder:
+    """
+    Decodes one leaf part (transfer encoding, then declared charset)
+    incrementally, up to a character cap
+    """
+    
+    def __init__(self, transfer_encoding: str, charset: str, max_chars: int):
+        self.transfer_encoding = (transfer_encoding or '7bit').strip().lower()
+        try:
+            decoder_class = codecs.getincrementaldecoder(charset or 'utf-8')
+        except LookupError:
+            logger.debug(f"Unknown charset '{charset}', decoding as UTF-8")
+            decoder_class = codecs.getincrementaldecoder('utf-8')
+        self._decoder = decoder_class(errors='replace')
+        self._pending = b''
+        self.max_chars = max_chars
+        self.chars = 0
+        self.full = False
+    
+    def feed(self, data: bytes):
+        """Feed raw (still transfer-encoded) bytes"""
+        if self.full:
+            return
+        
+        if self.transfer_encoding == 'base64':
+            data = self._pending + BASE64_JUNK_PATTERN.sub(b'', data)
+            usable = len(data) - len(data) % 4
+            self._pending = data[usable:]
+            raw = self._decode_base64(data[:usable])
+        elif self.transfer_encoding == 'quoted-printable':
+            # Soft line breaks ("=" at end of line) need the whole line
+            data = self._pending + data
+            cut = data.rfind(b'\n') + 1
+            self._pending = data[cut:]
+            raw = binascii.a2b_qp(data[:cut])
+        else:
+            raw = data
+        
+        if raw:
+            self._emit(self._decoder.decode(raw))
+    
+    def close(self):
+        """Flush buffered bytes at the end of the part"""
+        if self.full:
+            return
+        
+        tail, self._pending = self._pending, b''
+        if self.transfer_encoding == 'base64':
+            raw = self._decode_base64(tail + b'=' * (-len(tail) % 4)) if len(tail) > 1 else b''
+        elif self.transfer_encoding == 'quoted-printable':
+            raw = binascii.a2b_qp(tail)
+        else:
+            raw = tail
+        self._emit(self._decoder.decode(raw, final=True))
+    
+    def write(self, text: str):
+        """Receive decoded text (implemented by subclasses)"""
+        raise NotImplementedError
+    
+    def _emit(self, text: str):
+        """Pass decoded text on, enforcing the cap"""
+        remaining = self.max_chars - self.chars
+        if len(text) >= remaining:
+            text = text[:remaining]
+            self.full = True
+        self.chars += len(text)
+        if text:
+            self.write(text)
+    
+    def _decode_base64(self, data: bytes) -> bytes:
+        try:
+            return binascii.a2b_base64(data)
+        except binascii.Error as e:
+            logger.debug(f"Invalid base64 in email body: {e}")
+            return b''
+
+
+class _PlainDecoder(_PartDecoder):
+    """Collects a text/plain part"""
+    
+    def __init__(self, transfer_encoding: str, charset: str, max_chars: int):
+        super().__init__(transfer_encoding, charset, max_chars)
+        self._parts: List[str] = []
+    
+    def write(self, text: str):
+        self._parts.append(text)
+    
+    def get_text(self) -> str:
+        return ''.join(self._parts).strip()
+
+
+class _HTMLDecoder(_PartDecoder):
+    """Strips a text/html part to text while it is decoded"""
+    
+    # Markup is much longer than the text it carries
+    SOURCE_CHARS_PER_TEXT_CHAR = 4
+    
+    def __init__(self, transfer_encoding: str, charset: str, max_chars: int):
+        super().__init__(transfer_encoding, charset, max_chars * self.SOURCE_CHARS_PER_TEXT_CHAR)
+        self._stripper = _HTMLTextStripper(max_chars)
+    
+    def write(self, text: str):
+        self._stripper.feed(text)
+    
+    def get_text(self) -> str:
+        self._stripper.close()
+        return self._stripper.get_text()
+
+
+class _MimeScanner:
+    """
+    Line-driven MIME state machine
+    
+    States: 'headers' (collecting an entity's header block), 'body' (leaf
+    content, decoded or skipped), 'preamble' (multipart before its first
+    boundary) and 'epilogue' (after a closing boundary).
+    """
+    
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.state = 'headers'
+        self.boundaries: List[bytes] = []
+        self.decoder: Optional[_PartDecoder] = None
+        self.plain_text: Optional[str] = None
+        self.html_text: Optional[str] = None
+        self._header_lines: List[bytes] = []
+        self._header_size = 0
+        self._pending_eol = b''
+    
+    def feed_line(self, line: bytes) -> bool:
+        """
+        Process one line
+        
+        Returns:
+            True once a text/plain part has been extracted (stop reading)
+        """
+        if self.boundaries and line.startswith(b'--'):
+            marker = line.rstrip()
+            for depth in range(len(self.boundaries) - 1, -1, -1):
+                boundary = b'--' + self.boundaries[depth]
+                if marker == boundary:
+                    self._finish_part()
+                    del self.boundaries[depth + 1:]
+                    self._start_headers()
+                    return self.plain_text is not None
+                if marker == boundary + b'--':
+                    self._finish_part()
+                    del self.boundaries[depth:]
+                    self.state = 'epilogue'
+                    return self.plain_text is not None
+        
+        if self.state == 'headers':
+            if line in (b'\r\n', b'\n'):
+                self._start_body()
+            elif self._header_size < MAX_HEADER_BYTES:
+                self._header_lines.append(line)
+                self._header_size += len(line)
+        
+        elif self.state == 'body' and self.decoder is not None:
+            # The line break before a boundary belongs to the boundary
+            if line.endswith(b'\r\n'):
+                content, eol = line[:-2], b'\r\n'
+            elif line.endswith(b'\n'):
+                content, eol = line[:-1], b'\n'
+            else:
+                content, eol = line, b''
+            self.decoder.feed(self._pending_eol + content)
+            self._pending_eol = eol
+            
+            if self.decoder.full and isinstance(self.decoder, _PlainDecoder):
+                self._finish_part()
+                return self.plain_text is not None
+        
+        return False
+    
+    def result(self) -> str:
+        """Finish the current part (input may have been truncated) and return the best text found"""
+        self._finish_part()
+        return self.plain_text or self.html_text or ''
+    
+    def _start_headers(self):
+        self.state = 'headers'
+        self._header_lines = []
+        self._header_size = 0
+    
+    def _start_body(self):
+        """Header block complete: decide how to handle the entity"""
+        headers = BytesHeaderParser().parsebytes(b''.join(self._header_lines))
+        self._header_lines = []
+        self.state = 'body'
+        self.decoder = None
+        self._pending_eol = b''
+        
+        content_type = headers.get_content_type()
+        transfer_encoding = headers.get('Content-Transfer-Encoding', '')
+        
+        if headers.get_content_disposition() == 'attachment':
+            return
+        
+        if headers.get_content_maintype() == 'multipart':
+            boundary = headers.get_param('boundary')
+            if boundary:
+                self.boundaries.append(str(boundary).encode('utf-8', errors='replace'))
+                self.state = 'preamble'
+        elif content_type == 'message/rfc822':
+            # Forwarded message: its own headers follow
+            self._start_headers()
+        elif content_type == 'text/plain':
+            self.decoder = _PlainDecoder(transfer_encoding, headers.get_content_charset(), self.max_chars)
+        elif content_type == 'text/html' and self.html_text is None:
+            self.decoder = _HTMLDecoder(transfer_encoding, headers.get_content_charset(), self.max_chars)
+    
+    def _finish_part(self):
+        """Close the current decoder and keep its text if usable"""
+        decoder, self.decoder = self.decoder, None
+        self._pending_eol = b''
+        if decoder is None:
+            return
+        
+        decoder.close()
+        text = decoder.get_text()
+        if not text:
+            return
+        if isinstance(decoder, _PlainDecoder):
+            if self.plain_text is None:
+                self.plain_text = text
+        elif self.html_text is None:
+            self.html_text = text
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a stream of chunks into lines (line endings kept)"""
+    pending = b''
+    for chunk in chunks:
+        data = pending + chunk if pending else chunk
+        start = 0
+        while True:
+            end = data.find(b'\n', start)
+            if end == -1:
+                break
+            yield data[start:end + 1]
+            start = end + 1
+        pending = data[start:]
+        while len(pending) > MAX_LINE_BYTES:
+            yield pending[:MAX_LINE_BYTES]
+            pending = pending[MAX_LINE_BYTES:]
+    
+    if pending:
+        yield pending
@@ -0,0 +1,261 @@
+"""
+Email Connection Pool - Shared, self-healing IMAP connections
+Avoids a TLS handshake and LOGIN on every API request
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from .email_connector import EmailConnector
+
+logger = logging.getLogger(__name__)
+
+
+class EmailConnectionPool:
+    """
+    Bounded pool of logged-in EmailConnectors for one account
+    
+    - At most ``max_size`` connections are open at a time; callers block
+      until one is returned
+    - Connections idle for longer than ``health_check_seconds`` are checked
+      with NOOP before being handed out, dead ones are reconnected with
+      exponential backoff
+    - A background thread sends NOOP to idle connections every
+      ``keepalive_seconds`` so servers don't drop them (~30 min auto-logout)
+    - Each connector keeps its SELECT state, so repeated requests for the
+      same folder skip the SELECT
+    """
+    
+    # Reconnect attempts and backoff (seconds) when a connection is dead
+    MAX_RECONNECT_ATTEMPTS = 3
+    INITIAL_BACKOFF_SECONDS = 1.0
+    
+    def __init__(self,
+                 email_address: str = None,
+                 password: str = None,
+                 imap_server: str = None,
+                 imap_port: int = None,
+                 max_size: int = 2,
+                 health_check_seconds: float = 60,
+                 keepalive_seconds: float = 300):
+        """
+        Initialize connection pool (connections are opened lazily)
+        
+        Args:
+            email_address: Email account to connect to
+            password: App password
+            imap_server: IMAP server address (default: IMAP_SERVER env var)
+            imap_port: IMAP port (default: IMAP_PORT env var)
+            max_size: Maximum number of open connections
+            health_check_seconds: Idle time after which a connection is
+                NOOP-checked before reuse
+            keepalive_seconds: Interval of background NOOPs on idle connections
+                (0 disables the keep-alive thread)
+        """
+        self.email_address = email_address or os.getenv("COMPANY_EMAIL")
+        self.password = password or os.getenv("EMAIL_PASSWORD")
+        self.imap_server = imap_server or os.getenv("IMAP_SERVER", "imap.gmail.com")
+        self.imap_port = int(imap_port or os.getenv("IMAP_PORT", 993))
+        self.max_size = max_size
+        self.health_check_seconds = health_check_seconds
+        self.keepalive_seconds = keepalive_seconds
+        
+        # Idle connectors, most recently used last: [(connector, last_used)]
+        self._idle: List[tuple] = []
+        self._open_count = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._keepalive_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        
+        self.stats = {
+            'connections_opened': 0,
+            'reconnects': 0,
+            'checkouts': 0,
+            'reused': 0
+        }
+    
+    @contextmanager
+    def connection(self, timeout: float = 30) -> Iterator[EmailConnector]:
+        """
+        Borrow a logged-in connector
+        
+        Args:
+            timeout: Seconds to wait for a free connection
+        
+        Yields:
+            Connected EmailConnector (do not call disconnect() on it)
+        
+        Raises:
+            ConnectionError: If no healthy connection could be obtained
+        """
+        connector = self._acquire(timeout)
+        healthy = True
+        try:
+            yield connector
+        except Exception:
+            # The caller's error may have left the connection mid-command
+            healthy = connector.is_alive()
+            raise
+        finally:
+            self._release(connector, healthy)
+    
+    def close(self):
+        """Log out all idle connections and stop the keep-alive thread"""
+        self._stop_event.set()
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open_count -= len(idle)
+            self._condition.notify_all()
+        
+        for connector, _ in idle:
+            connector.disconnect()
+    
+    def get_stats(self) -> Dict:
+        """
+        Get pool statistics
+        
+        Returns:
+            Dictionary with stats
+        """
+        with self._condition:
+            return {
+                **self.stats,
+                'open_connections': self._open_count,
+                'idle_connections': len(self._idle),
+                'max_size': self.max_size
+            }
+    
+    def _acquire(self, timeout: float) -> EmailConnector:
+        """Take an idle connector or open a new one, health-checking as needed"""
+        deadline = time.monotonic() + timeout
+        
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ConnectionError("Email connection pool is closed")
+                
+                if self._idle:
+                    connector, last_used = self._idle.pop()
+                    break
+                
+                if self._open_count < self.max_size:
+                    # Reserve the slot, connect outside the lock
+                    self._open_count += 1
+                    connector, last_used = None, None
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConnectionError(f"No free email connection after {timeout}s")
+                self._condition.wait(remaining)
+            
+            self.stats['checkouts'] += 1
+        
+        try:
+            if connector is None:
+                connector = EmailConnector(self.email_address, self.password,
+                                           self.imap_server, self.imap_port)
+                self._connect_with_backoff(connector)
+                self.stats['connections_opened'] += 1
+                self._start_keepalive()
+            elif time.monotonic() - last_used > self.health_check_seconds and not connector.is_alive():
+                logger.info("Pooled email connection is dead, reconnecting...")
+                connector.disconnect()
+                self._connect_with_backoff(connector)
+                self.stats['reconnects'] += 1
+            else:
+                self.stats['reused'] += 1
+        except Exception:
+            with self._condition:
+                self._open_count -= 1
+                self._condition.notify()
+            raise
+        
+        return connector
+    
+    def _release(self, connector: EmailConnector, healthy: bool = True):
+        """Return a connector to the pool, dropping it if it is dead"""
+        with self._condition:
+            if healthy and connector.connection and not self._closed:
+                self._idle.append((connector, time.monotonic()))
+                connector = None
+            else:
+                self._open_count -= 1
+            self._condition.notify()
+        
+        if connector is not None:
+            connector.disconnect()
+    
+    def _connect_with_backoff(self, connector: EmailConnector):
+        """
+        Connect, retrying with exponential backoff
+        
+        Raises:
+            ConnectionError: If all attempts fail
+        """
+        delay = self.INITIAL_BACKOFF_SECONDS
+        for attempt in range(1, self.MAX_RECONNECT_ATTEMPTS + 1):
+            if connector.connect():
+                return
+            if attempt < self.MAX_RECONNECT_ATTEMPTS:
+                logger.warning(f"Email connection attempt {attempt} failed, retrying in {delay:.0f}s")
+                time.sleep(delay)
+                delay *= 2
+        
+        raise ConnectionError(f"Could not connect to {connector.email_address} "
+                              f"after {self.MAX_RECONNECT_ATTEMPTS} attempts")
+    
+    def _start_keepalive(self):
+        """Start the keep-alive thread once the first connection exists"""
+        if not self.keepalive_seconds or self._keepalive_thread:
+            return
+        
+        self._keepalive_thread = threading.Thread(
+            target=self._keepalive_loop, name="imap-keepalive", daemon=True
+        )
+        self._keepalive_thread.start()
+    
+    def _keepalive_loop(self):
+        """NOOP idle connections and drop the dead ones"""
+        while not self._stop_event.wait(self.keepalive_seconds):
+            with self._condition:
+                due = [entry for entry in self._idle
+                       if time.monotonic() - entry[1] >= self.keepalive_seconds]
+                for entry in due:
+                    self._idle.remove(entry)
+            
+            for connector, _ in due:
+                # Checked out of the pool while pinging, so no one else uses it
+                self._release(connector, connector.is_alive())
+
+
+_pools: Dict[str, EmailConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(email_address: str = None, password: str = None, **kwargs) -> EmailConnectionPool:
+    """
+    Get the process-wide connection pool for an account
+    
+    Args:
+        email_address: Email account (default: COMPANY_EMAIL env var)
+        password: App password (default: EMAIL_PASSWORD env var)
+        **kwargs: Passed to EmailConnectionPool when the pool is created
+    
+    Returns:
+        Shared EmailConnectionPool
+    """
+    email_address = email_address or os.getenv("COMPANY_EMAIL")
+    
+    with _pools_lock:
+        pool = _pools.get(email_address)
+        if pool is None or pool._closed:
+            pool = EmailConnectionPool(email_address, password, **kwargs)
+            _pools[email_address] = pool
+        return pool
@@ -0,0 +1,247 @@
+"""
+Dedup Index - Memory-compact set of processed email IDs
+Stores 64-bit hashes in sorted arrays behind a Bloom filter
+"""
+
+import sys
+import math
+import time
+import base64
+import hashlib
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator
+
+
+class BloomFilter:
+    """
+    Bloom filter over precomputed 64-bit hashes
+    
+    A negative answer is certain, so lookups of unseen IDs (the common case
+    when polling) never touch the sorted arrays.
+    """
+    
+    def __init__(self, capacity: int = 1024, error_rate: float = 0.01):
+        """
+        Initialize Bloom filter
+        
+        Args:
+            capacity: Expected number of entries
+            error_rate: Target false positive rate at capacity
+        """
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def add(self, value: int):
+        """Add a 64-bit hash"""
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, value: int) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+    
+    def _positions(self, value: int) -> Iterator[int]:
+        """Bit positions via double hashing of the two 32-bit halves"""
+        h1 = value & 0xFFFFFFFF
+        h2 = (value >> 32) | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+
+class ProcessedIdIndex:
+    """
+    Set-like index of processed email IDs with per-entry timestamps
+    
+    Each ID is stored as a 64-bit BLAKE2b hash in a sorted ``array('Q')``
+    (looked up with bisect) plus a parallel ``array('I')`` of epoch seconds
+    used for age-based expiry: about 12 bytes per entry instead of ~100 for
+    a Python string in a set. New IDs go to a small pending dict that is
+    merged into the arrays in bulk.
+    """
+    
+    # Pending entries merged into the sorted arrays at once
+    MERGE_THRESHOLD = 1024
+    
+    def __init__(self, hashes: array = None, times: array = None, bloom: BloomFilter = None):
+        """
+        Initialize index
+        
+        Args:
+            hashes: Sorted, unique hashes (takes ownership)
+            times: Epoch seconds parallel to hashes
+            bloom: Bloom filter already holding all hashes (rebuilt if None)
+        """
+        self._hashes = hashes if hashes is not None else array('Q')
+        self._times = times if times is not None else array('I')
+        self._pending: Dict[int, int] = {}
+        if bloom is not None:
+            self._bloom = bloom
+        else:
+            self._rebuild_bloom()
+    
+    @staticmethod
+    def hash_id(email_id: str) -> int:
+        """
+        Hash an email ID to 64 bits
+        
+        Args:
+            email_id: Email ID
+        
+        Returns:
+            Unsigned 64-bit hash
+        """
+        digest = hashlib.blake2b(email_id.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+    
+    def add(self, email_id: str, timestamp: float = None):
+        """
+        Add an email ID (re-adding refreshes its timestamp)
+        
+        Args:
+            email_id: Email ID
+            timestamp: Epoch seconds it was processed (default: now)
+        """
+        self._add_hash(self.hash_id(email_id), int(timestamp if timestamp is not None else time.time()))
+    
+    def __contains__(self, email_id: str) -> bool:
+        value = self.hash_id(email_id)
+        if value not in self._bloom:
+            return False
+        if value in self._pending:
+            return True
+        index = bisect_left(self._hashes, value)
+        return index < len(self._hashes) and self._hashes[index] == value
+    
+    def __len__(self) -> int:
+        self._merge()
+        return len(self._hashes)
+    
+    def expire(self, max_age_seconds: float, now: float = None) -> int:
+        """
+        Drop entries processed more than max_age_seconds ago
+        
+        Args:
+            max_age_seconds: Maximum entry age
+            now: Current epoch seconds (default: now)
+        
+        Returns:
+            Number of entries removed
+        """
+        self._merge()
+        cutoff = (now if now is not None else time.time()) - max_age_seconds
+        
+        keep = [i for i, processed_at in enumerate(self._times) if processed_at >= cutoff]
+        removed = len(self._hashes) - len(keep)
+        if removed:
+            self._hashes = array('Q', (self._hashes[i] for i in keep))
+            self._times = array('I', (self._times[i] for i in keep))
+            self._rebuild_bloom()
+        return removed
+    
+    def copy(self) -> 'ProcessedIdIndex':
+        """Snapshot copy (e.g. for writing in background)"""
+        self._merge()
+        bloom = BloomFilter(capacity=self._bloom.capacity, error_rate=self._bloom.error_rate)
+        bloom.bits = bytearray(self._bloom.bits)
+        return ProcessedIdIndex(array('Q', self._hashes), array('I', self._times), bloom)
+    
+    def to_dict(self) -> Dict[str, str]:
+        """
+        Serialize for JSON storage
+        
+        Returns:
+            Dictionary with base64-encoded little-endian arrays and the
+            Bloom filter bits (so loading doesn't rehash every entry)
+        """
+        self._merge()
+        return {
+            'hashes': _encode_array(self._hashes),
+            'times': _encode_array(self._times),
+            'bloom_capacity': self._bloom.capacity,
+            'bloom': base64.b64encode(bytes(self._bloom.bits)).decode('ascii')
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> 'ProcessedIdIndex':
+        """
+        Deserialize from to_dict() output
+        
+        Args:
+            data: Dictionary with 'hashes' and 'times'
+        
+        Returns:
+            ProcessedIdIndex
+        """
+        hashes = _decode_array('Q', data.get('hashes', ''))
+        times = _decode_array('I', data.get('times', ''))
+        if len(hashes) != len(times):
+            raise ValueError("Corrupt dedup index: hashes and times differ in length")
+        
+        bloom = None
+        if data.get('bloom') and data.get('bloom_capacity', 0) >= len(hashes):
+            bloom = BloomFilter(capacity=data['bloom_capacity'])
+            bits = base64.b64decode(data['bloom'])
+            if len(bits) == len(bloom.bits):
+                bloom.bits = bytearray(bits)
+            else:
+                bloom = None
+        return cls(hashes, times, bloom)
+    
+    def _add_hash(self, value: int, timestamp: int):
+        """Add a hash to the pending buffer"""
+        self._pending[value] = max(timestamp, self._pending.get(value, 0))
+        self._bloom.add(value)
+        if len(self._pending) >= self.MERGE_THRESHOLD:
+            self._merge()
+    
+    def _merge(self):
+        """Merge pending entries into the sorted arrays (linear merge)"""
+        if not self._pending:
+            return
+        
+        pending = sorted(self._pending.items())
+        self._pending = {}
+        
+        hashes = array('Q')
+        times = array('I')
+        for value, timestamp in heapq.merge(zip(self._hashes, self._times), pending):
+            if hashes and hashes[-1] == value:
+                times[-1] = max(times[-1], timestamp)
+            else:
+                hashes.append(value)
+                times.append(timestamp)
+        
+        self._hashes, self._times = hashes, times
+        
+        if len(self._hashes) > self._bloom.capacity:
+            self._rebuild_bloom()
+    
+    def _rebuild_bloom(self):
+        """Size the Bloom filter for twice the current entries and refill it"""
+        entries = len(self._hashes) + len(self._pending)
+        self._bloom = BloomFilter(capacity=max(1024, entries * 2))
+        for value in self._hashes:
+            self._bloom.add(value)
+        for value in self._pending:
+            self._bloom.add(value)
+
+
+def _encode_array(values: array) -> str:
+    """Base64 of an array in little-endian byte order"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _decode_array(typecode: str, encoded: str) -> array:
+    """Inverse of _encode_array"""
+    values = array(typecode)
+    values.frombytes(base64.b64decode(encoded))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
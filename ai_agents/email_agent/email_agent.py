@@ -8,7 +8,9 @@ import logging
 from typing import List, Dict, Optional
 from datetime import datetime
 from .email_connector import EmailConnector
-from .email_storage import EmailStorage
+from .email_storage import EmailStorage, create_email_storage
+from .keyword_matcher import get_keyword_matcher
+from .email_classifier import get_email_classifier
 
 logger = logging.getLogger(__name__)
 
@@ -24,23 +26,67 @@ class EmailAgent:
     - Triggers requirement extraction for valid projects
     """
     
+    # Rejected when found anywhere in sender or subject (spam, notifications, etc.)
+    EXCLUSION_KEYWORDS = [
+        'security alert', 'no-reply', 'noreply', 'newsletter', 
+        'verify', 'verification', 'code', 'otp', 'login', 
+        'signin', 'alert', 'update', 'promotion', 'advertisement',
+        'linkedin', 'google', 'facebook', 'twitter', 'instagram'
+    ]
+    
+    # Matched against subject + body as whole words
+    PROJECT_KEYWORDS = [
+        'project', 'website', 'mobile app', 'web app', 'application', 
+        'development', 'design', 'build', 'create', 'looking for', 
+        'quote', 'estimate', 'proposal', 'budget', 'deadline',
+        'software', 'system', 'platform', 'e-commerce', 'ecommerce',
+        'need a', 'require', 'urgent'
+    ]
+    
+    # Keyword matches the model scores below this are rejected. Kept very
+    # low: the model is trained on a handful of examples, so it may only
+    # veto obvious non-projects, never reject on its own
+    MODEL_VETO_SCORE = 0.05
+    
     def __init__(self, 
                  email_address: str = None,
-                 password: str = None):
+                 password: str = None,
+                 sync_mode: str = None,
+                 fetch_mode: str = None,
+                 connector: EmailConnector = None,
+                 folder: str = "INBOX",
+                 storage: EmailStorage = None):
         """
         Initialize Email Agent
         
         Args:
             email_address: Company email to monitor
             password: Email password (App Password for Gmail)
+            sync_mode: "recent" scans the last 24 hours on every poll,
+                "incremental" only fetches UIDs above the stored cursor,
+                which stays below the first email not processed yet
+                (default: EMAIL_SYNC_MODE env var, else "recent")
+            fetch_mode: "full" downloads every candidate as RFC822,
+                "headers_first" runs the exclusion filter on headers and
+                only downloads bodies of the survivors
+                (default: EMAIL_FETCH_MODE env var, else "full")
+            connector: Existing (e.g. pooled) connector to use instead of
+                creating one
+            folder: Folder to monitor
+            storage: Processed-email storage shared with other agents
+                (default: a new one from create_email_storage())
         """
-        self.connector = EmailConnector(email_address, password)
-        self.storage = EmailStorage()
+        self.connector = connector or EmailConnector(email_address, password)
+        self.storage = storage or create_email_storage()
+        self.folder = folder
+        self.sync_mode = (sync_mode or os.getenv("EMAIL_SYNC_MODE", "recent")).lower()
+        self.fetch_mode = (fetch_mode or os.getenv("EMAIL_FETCH_MODE", "full")).lower()
         self.name = "EmailAgent"
     
     def check_new_emails(self, limit: int = 10) -> List[Dict]:
         """
-        Check for new emails (from last 24 hours)
+        Check for new emails (from last 24 hours, or since the last sync
+        in incremental mode)
         
         Args:
             limit: Maximum number of emails to fetch
@@ -48,23 +94,63 @@ class EmailAgent:
         Returns:
             List of new project-related emails
         """
-        logger.info("Checking for new emails...")
+        logger.info(f"Checking for new emails (sync mode: {self.sync_mode})...")
+        
+        # Header-first mode: processed and excluded emails never download a body
+        header_filter = self._accept_headers if self.fetch_mode == "headers_first" else None
         
-        # Fetch recent emails (last 24 hours, regardless of read status)
-        # This allows us to find emails even if they were opened in Gmail
-        emails = self.connector.fetch_recent_emails(days=1, limit=limit)
+        if self.sync_mode == "incremental":
+            # Only messages above the per-folder UID cursor
+            emails = self.connector.fetch_new_emails(self.folder, limit=limit, header_filter=header_filter,
+                                                     is_processed=self.storage.is_processed)
+        else:
+            # Fetch recent emails (last 24 hours, regardless of read status)
+            # This allows us to find emails even if they were opened in Gmail
+            emails = self.connector.fetch_recent_emails(self.folder, days=1, limit=limit,
+                                                        header_filter=header_filter)
         
-        # Filter out already processed emails
+        # Filter out already processed emails (and copies of the same
+        # Message-ID within this poll)
         new_emails = []
+        seen_ids = set()
         for email_data in emails:
             email_id = email_data['email_id']
             
-            if not self.storage.is_processed(email_id):
+            if email_id not in seen_ids and not self.storage.is_processed(email_id):
                 new_emails.append(email_data)
+            seen_ids.add(email_id)
         
         logger.info(f"Found {len(new_emails)} new unprocessed emails")
         return new_emails
     
+    def _accept_headers(self, email_data: Dict) -> bool:
+        """
+        Header filter for header-first fetching
+        
+        Args:
+            email_data: Email dictionary without body
+            
+        Returns:
+            True if the email body should be downloaded
+        """
+        if self.storage.is_processed(email_data['email_id']):
+            return False
+        return not self.is_excluded(email_data)
+    
+    def is_excluded(self, email_data: Dict) -> bool:
+        """
+        Check sender and subject against exclusions (spam, notifications, etc.)
+        
+        Only needs headers, so it can run before the body is downloaded.
+        
+        Args:
+            email_data: Email dictionary (body not required)
+            
+        Returns:
+            True if email is definitely not a project request
+        """
+        return self._classify(email_data, check_body=False) is None
+    
     def is_project_email(self, email_data: Dict) -> bool:
         """
         Determine if email is a project request
@@ -77,48 +163,91 @@ class EmailAgent:
         Returns:
             True if email appears to be a project request
         """
-        subject = email_data.get('subject', '').lower()
-        body = email_data.get('body', '').lower()
-        sender = email_data.get('from', '').lower()
+        found_keywords = self._classify(email_data)
         
-        # 1. Check EXCLUSIONS first (spam, notifications, etc.)
-        exclusions = [
-            'security alert', 'no-reply', 'noreply', 'newsletter', 
-            'verify', 'verification', 'code', 'otp', 'login', 
-            'signin', 'alert', 'update', 'promotion', 'advertisement',
-            'linkedin', 'google', 'facebook', 'twitter', 'instagram'
-        ]
-        
-        # Check sender and subject for exclusions
-        if any(ex in sender for ex in exclusions):
-            logger.debug(f"Email rejected: sender contains exclusion '{sender}'")
-            return False
+        if found_keywords:
+            logger.info(f"Email classified as project request (matched: {found_keywords})")
+            return True
+        
+        if found_keywords is not None:
+            logger.debug("Email does not appear to be a project request")
+        return False
+    
+    def _classify(self, email_data: Dict, check_body: bool = True) -> Optional[List[str]]:
+        """
+        Scan sender, subject and body once each with the keyword automaton
+        
+        Args:
+            email_data: Email dictionary
+            check_body: Also collect project keywords (from subject and body)
             
-        if any(ex in subject for ex in exclusions):
-            logger.debug(f"Email rejected: subject contains exclusion '{subject}'")
-            return False
+        Returns:
+            None if excluded, else the project keywords found (empty list
+            if none, or if check_body is False)
+        """
+        matcher = get_keyword_matcher(tuple(self.EXCLUSION_KEYWORDS), tuple(self.PROJECT_KEYWORDS))
         
-        # 2. Check PROJECT keywords
-        # Use simple word boundary check by padding with spaces
-        text = f" {subject} {body} "
+        # 1. Check EXCLUSIONS first (spam, notifications, etc.)
+        sender_hits = matcher.scan(email_data.get('from', ''))
+        if 'exclusion' in sender_hits:
+            logger.debug(f"Email rejected: sender contains exclusion {sender_hits['exclusion']}")
+            return None
         
-        project_keywords = [
-            ' project ', ' website ', ' mobile app ', ' web app ', ' application ', 
-            ' development ', ' design ', ' build ', ' create ', ' looking for ', 
-            ' quote ', ' estimate ', ' proposal ', ' budget ', ' deadline ',
-            ' software ', ' system ', ' platform ', ' e-commerce ', ' ecommerce ',
-            ' need a ', ' require ', ' urgent '
-        ]
+        subject_hits = matcher.scan(email_data.get('subject', ''))
+        if 'exclusion' in subject_hits:
+            logger.debug(f"Email rejected: subject contains exclusion {subject_hits['exclusion']}")
+            return None
         
-        # Check if any keyword is in subject or body
-        found_keywords = [kw.strip() for kw in project_keywords if kw in text]
+        if not check_body:
+            return []
         
-        if found_keywords:
-            logger.info(f"Email classified as project request (matched: {found_keywords})")
-            return True
+        # 2. Check PROJECT keywords in subject and body
+        found_keywords = subject_hits.get('project', [])
+        for keyword in matcher.scan(email_data.get('body', '')).get('project', []):
+            if keyword not in found_keywords:
+                found_keywords.append(keyword)
+        return found_keywords
+    
+    def classify_batch(self, emails: List[Dict]) -> List[Dict]:
+        """
+        Classify many emails at once
         
-        logger.debug("Email does not appear to be a project request")
-        return False
+        Exclusion and keyword rules decide, as in is_project_email. The
+        emails are also scored together by the hashed bag-of-words model,
+        which can only veto a keyword match it scores below
+        MODEL_VETO_SCORE (skipped if numpy is missing).
+        
+        Args:
+            emails: Email dictionaries
+            
+        Returns:
+            One dictionary per email with 'is_project', 'score' (model
+            probability or None) and 'method' ('exclusion', 'keywords' or
+            'model' for a veto)
+        """
+        results = [None] * len(emails)
+        matched = []
+        
+        for index, email_data in enumerate(emails):
+            found_keywords = self._classify(email_data)
+            if found_keywords is None:
+                results[index] = {'is_project': False, 'score': None, 'method': 'exclusion'}
+            elif not found_keywords:
+                results[index] = {'is_project': False, 'score': None, 'method': 'keywords'}
+            else:
+                matched.append(index)
+        
+        classifier = get_email_classifier()
+        scores = classifier.predict_proba([emails[i] for i in matched]) if classifier and matched else None
+        
+        for position, index in enumerate(matched):
+            score = float(scores[position]) if scores is not None else None
+            if score is not None and score < self.MODEL_VETO_SCORE:
+                results[index] = {'is_project': False, 'score': score, 'method': 'model'}
+            else:
+                results[index] = {'is_project': True, 'score': score, 'method': 'keywords'}
+        
+        return results
     
     def process_new_emails(self) -> List[Dict]:
         """
@@ -132,16 +261,19 @@ class EmailAgent:
         
         # Filter project emails
         project_emails = []
+        non_project_ids = []
         
-        for email_data in new_emails:
-            if self.is_project_email(email_data):
+        for email_data, result in zip(new_emails, self.classify_batch(new_emails)):
+            if result['is_project']:
                 project_emails.append(email_data)
-                logger.info(f"Project email detected: {email_data['subject']}")
+                logger.info(f"Project email detected ({result['method']}): {email_data['subject']}")
             else:
-                # Mark non-project emails as processed
-                self.storage.mark_processed(email_data['email_id'])
+                non_project_ids.append(email_data['email_id'])
                 logger.debug(f"Non-project email marked as processed: {email_data['subject']}")
         
+        # Mark non-project emails as processed (one write for the whole poll)
+        self.storage.mark_processed_many(non_project_ids)
+        
         return project_emails
     
     def mark_email_processed(self, email_id: str, project_id: str = None):
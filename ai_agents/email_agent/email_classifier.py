@@ -0,0 +1,208 @@
+"""
+Email Classifier - Hashed bag-of-words logistic model
+Scores whole batches of emails as project requests with NumPy
+"""
+
+import os
+import re
+import zlib
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # keyword rules are used instead
+    np = None
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Labelled examples: "## 📧 ..." sections are projects, "## 🚫 ..." are not
+EXAMPLES_FILE = os.path.join(PROJECT_ROOT, "docs", "TEST_EMAIL_EXAMPLES.md")
+
+# Words (letters/digits), as in the keyword matcher's word boundaries
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+SECTION_PATTERN = re.compile(r'^## (📧|🚫) ', re.MULTILINE)
+SUBJECT_PATTERN = re.compile(r'^\*\*Subject:\*\*\s*(.+?)\s*$', re.MULTILINE)
+BODY_PATTERN = re.compile(r'\*\*Body:\*\*\s*```[^\n]*\n(.*?)```', re.DOTALL)
+
+
+class EmailClassifier:
+    """
+    Logistic regression over hashed unigram/bigram features
+    
+    Feature rows are built in sparse COO form (row ids, column indices,
+    values), so scoring a batch is one gather and one bincount instead of
+    a dense matrix product; no SciPy needed. Subject tokens are hashed
+    separately from body tokens. Rows are L2-normalised so long emails
+    don't dominate.
+    
+    Features are hashed with CRC-32 rather than Python's per-process salted
+    hash(), so scores don't change between runs.
+    """
+    
+    def __init__(self, dimensions: int = 2 ** 18, max_body_chars: int = 8000):
+        """
+        Initialize an untrained classifier
+        
+        Args:
+            dimensions: Size of the hashed feature space
+            max_body_chars: Body characters used for features
+        """
+        if np is None:
+            raise ImportError("EmailClassifier requires numpy")
+        
+        self.dimensions = dimensions
+        self.max_body_chars = max_body_chars
+        self.weights = np.zeros(dimensions, dtype=np.float64)
+        self.bias = 0.0
+        self.trained = False
+    
+    def featurize(self, emails: List[Dict]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        Build the sparse feature matrix of a batch
+        
+        Args:
+            emails: Email dictionaries with 'subject' and 'body'
+        
+        Returns:
+            (row_ids, indices, values): one entry per non-zero feature
+        """
+        mask = self.dimensions - 1
+        row_ids: List[int] = []
+        indices: List[int] = []
+        counts: List[int] = []
+        
+        for row, email_data in enumerate(emails):
+            features = set()
+            for prefix, text in (('s', email_data.get('subject', '')),
+                                 ('b', email_data.get('body', '')[:self.max_body_chars])):
+                tokens = TOKEN_PATTERN.findall(text.lower())
+                features.update(f"{prefix}:{token}" for token in tokens)
+                features.update(f"{prefix}:{first} {second}" for first, second in zip(tokens, tokens[1:]))
+            
+            hashed = {zlib.crc32(feature.encode('utf-8')) & mask for feature in features}
+            indices.extend(hashed)
+            row_ids.extend([row] * len(hashed))
+            counts.append(len(hashed))
+        
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        norms = np.sqrt(np.maximum(np.asarray(counts, dtype=np.float64), 1.0))
+        values = 1.0 / norms[row_ids] if len(row_ids) else np.zeros(0)
+        return row_ids, indices, values
+    
+    def decision_function(self, features: Tuple, n_rows: int) -> "np.ndarray":
+        """Linear scores of a featurized batch"""
+        row_ids, indices, values = features
+        return np.bincount(row_ids, weights=self.weights[indices] * values, minlength=n_rows) + self.bias
+    
+    def predict_proba(self, emails: List[Dict]) -> "np.ndarray":
+        """
+        Probability that each email is a project request
+        
+        Args:
+            emails: Email dictionaries
+        
+        Returns:
+            Array of probabilities, one per email
+        """
+        if not emails:
+            return np.zeros(0)
+        scores = self.decision_function(self.featurize(emails), len(emails))
+        return 1.0 / (1.0 + np.exp(-scores))
+    
+    def fit(self,
+            emails: List[Dict],
+            labels: List[int],
+            epochs: int = 300,
+            learning_rate: float = 1.0,
+            l2: float = 1e-3) -> "EmailClassifier":
+        """
+        Train with full-batch gradient descent on the log loss
+        
+        Args:
+            emails: Training emails
+            labels: 1 for project requests, 0 otherwise
+            epochs: Gradient steps
+            learning_rate: Step size
+            l2: L2 regularisation strength
+        
+        Returns:
+            self
+        """
+        y = np.asarray(labels, dtype=np.float64)
+        n_rows = len(emails)
+        features = self.featurize(emails)
+        row_ids, indices, values = features
+        
+        for _ in range(epochs):
+            probabilities = 1.0 / (1.0 + np.exp(-self.decision_function(features, n_rows)))
+            error = (probabilities - y) / n_rows
+            gradient = np.bincount(indices, weights=values * error[row_ids], minlength=self.dimensions)
+            self.weights -= learning_rate * (gradient + l2 * self.weights)
+            self.bias -= learning_rate * float(error.sum())
+        
+        self.trained = True
+        return self
+
+
+def load_labelled_examples(path: str = EXAMPLES_FILE) -> Tuple[List[Dict], List[int]]:
+    """
+    Parse labelled example emails from a markdown file
+    
+    Args:
+        path: Markdown file with "## 📧" (project) / "## 🚫" (not a project)
+            sections, each with a **Subject:** line and a fenced **Body:**
+    
+    Returns:
+        (emails, labels)
+    """
+    emails: List[Dict] = []
+    labels: List[int] = []
+    
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except OSError as e:
+        logger.warning(f"Could not read labelled email examples: {e}")
+        return emails, labels
+    
+    matches = list(SECTION_PATTERN.finditer(text))
+    for match, following in zip(matches, matches[1:] + [None]):
+        section = text[match.end():following.start() if following else len(text)]
+        subject = SUBJECT_PATTERN.search(section)
+        body = BODY_PATTERN.search(section)
+        if not subject or not body:
+            continue
+        emails.append({'subject': subject.group(1), 'body': body.group(1).strip()})
+        labels.append(1 if match.group(1) == '📧' else 0)
+    
+    return emails, labels
+
+
+@lru_cache(maxsize=1)
+def get_email_classifier() -> Optional[EmailClassifier]:
+    """
+    Get the process-wide classifier, trained on first use
+    
+    Returns:
+        Trained EmailClassifier, or None if numpy is missing or the
+        examples don't cover both classes
+    """
+    if np is None:
+        logger.info("numpy not installed, email classification uses keyword rules only")
+        return None
+    
+    emails, labels = load_labelled_examples()
+    if len(set(labels)) < 2:
+        logger.warning("Labelled email examples lack projects or non-projects, using keyword rules only")
+        return None
+    
+    classifier = EmailClassifier().fit(emails, labels)
+    logger.info(f"Trained email classifier on {len(emails)} labelled examples "
+                f"({sum(labels)} projects)")
+    return classifier
@@ -4,15 +4,53 @@ Handles email fetching and parsing
 """
 
 import os
+import re
+import json
+import hashlib
 import imaplib
+import threading
 import email
+from collections import OrderedDict
 from email.header import decode_header
-from typing import List, Dict, Optional
-from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Callable, List, Dict, Iterator, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 import logging
 
+from .body_extractor import extract_text_body
+
 logger = logging.getLogger(__name__)
 
+# Matches the start of a FETCH response item, e.g. b'12 (UID 1234 RFC822 {5678}' -> b'12'
+FETCH_HEADER_PATTERN = re.compile(rb'^(\d+) \(')
+
+# UID data item; RFC 3501 allows any item order, so it may come in a later chunk
+FETCH_UID_PATTERN = re.compile(rb'\bUID (\d+)')
+
+# Matches the section name of a literal, e.g. b'BODY[TEXT]<0> {1234}' -> b'TEXT'
+FETCH_SECTION_PATTERN = re.compile(rb'BODY\[([^\]]*)\]')
+
+FETCH_SIZE_PATTERN = re.compile(rb'RFC822\.SIZE (\d+)')
+
+FETCH_INTERNALDATE_PATTERN = re.compile(rb'INTERNALDATE "([^"]+)"')
+
+# Serializes read-merge-write of the shared sync state file between connectors
+SYNC_STATE_LOCK = threading.Lock()
+
+# IMAP dates use English month names regardless of locale (RFC 3501 date-month)
+IMAP_MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Phase 1 of a header-first fetch: just enough to run the exclusion filter
+HEADER_FETCH_PARTS = '(UID INTERNALDATE RFC822.SIZE BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE MESSAGE-ID)])'
+
+# Phase 2: MIME headers needed to decode the body, plus the (capped) body text
+BODY_FETCH_PARTS = ('(UID BODY.PEEK[HEADER.FIELDS (MIME-VERSION CONTENT-TYPE CONTENT-TRANSFER-ENCODING)] '
+                    'BODY.PEEK[TEXT]<0.{max_bytes}>)')
+
+# Full fetch: complete header plus the (capped) body text; like RFC822 this
+# marks the message as read
+FULL_FETCH_PARTS = '(UID INTERNALDATE BODY[HEADER] BODY[TEXT]<0.{max_bytes}>)'
+
 
 class EmailConnector:
     """
@@ -20,11 +58,25 @@ class EmailConnector:
     Supports Gmail and other IMAP providers
     """
     
+    # Messages requested per UID FETCH command
+    FETCH_BATCH_SIZE = 50
+    
+    # Bytes of body text downloaded per message; the text part comes first
+    # in practically all mail, so attachments are cut off
+    MAX_BODY_FETCH_BYTES = 256 * 1024
+    
+    # Characters of decoded body text kept per message
+    MAX_BODY_CHARS = 50000
+    
+    # Email IDs remembered for mark_as_read (oldest are dropped first)
+    UID_MAP_MAX_ENTRIES = 10000
+    
     def __init__(self, 
                  email_address: str = None,
                  password: str = None,
                  imap_server: str = "imap.gmail.com",
-                 imap_port: int = 993):
+                 imap_port: int = 993,
+                 sync_state_file: str = None):
         """
         Initialize email connector
         
@@ -33,12 +85,35 @@ class EmailConnector:
             password: App password (for Gmail, use App Password, not regular password)
             imap_server: IMAP server address
             imap_port: IMAP port (usually 993 for SSL)
+            sync_state_file: Path to file storing UID sync cursors per folder
         """
         self.email_address = email_address or os.getenv("COMPANY_EMAIL")
         self.password = password or os.getenv("EMAIL_PASSWORD")
         self.imap_server = imap_server
         self.imap_port = imap_port
         self.connection = None
+        
+        # Folder currently selected on the connection and its UIDVALIDITY
+        self.selected_folder: Optional[str] = None
+        self.selected_uidvalidity: Optional[int] = None
+        
+        # UID sync cursors: {"<account>:<folder>": {"uidvalidity": int, "last_uid": int}}
+        self.sync_state_file = sync_state_file or os.getenv("IMAP_SYNC_STATE_FILE", "imap_sync_state.json")
+        self.sync_state: Dict[str, Dict] = {}
+        self._load_sync_state()
+        
+        # Stable email ID (Message-ID) -> (folder, UIDVALIDITY, UID) of fetched emails
+        self.uid_map: "OrderedDict[str, Tuple[str, Optional[int], int]]" = OrderedDict()
+        
+        # Lowest UID of a batch whose FETCH failed, and the UIDs the server
+        # actually returned, during the current fetch_emails() call
+        self._failed_fetch_uid: Optional[int] = None
+        self._returned_uids: set = set()
+        
+        # Incremental sync with is_processed: per sync key, the highest UID
+        # fetched by this process and the (UID, email ID) of fetched emails
+        # not yet processed; the saved cursor stays below the first of those
+        self._unconfirmed: Dict[str, Dict] = {}
     
     def connect(self) -> bool:
         """
@@ -47,6 +122,9 @@ class EmailConnector:
         Returns:
             True if connected successfully
         """
+        self.selected_folder = None
+        self.selected_uidvalidity = None
+        
         try:
             self.connection = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
             self.connection.login(self.email_address, self.password)
@@ -54,25 +132,54 @@ class EmailConnector:
             return True
         except Exception as e:
             logger.error(f"Failed to connect: {e}")
+            self.connection = None
             return False
     
     def disconnect(self):
         """Disconnect from email server"""
         if self.connection:
             try:
-                self.connection.close()
+                # CLOSE is only valid while a folder is selected
+                if self.selected_folder:
+                    self.connection.close()
                 self.connection.logout()
                 logger.info("Disconnected from email server")
-            except:
-                pass
+            except Exception as e:
+                logger.warning(f"Error while disconnecting from {self.email_address} "
+                               f"(connection was probably already dead): {e}")
+            finally:
+                self.connection = None
+                self.selected_folder = None
+                self.selected_uidvalidity = None
     
-    def fetch_unread_emails(self, folder: str = "INBOX", limit: int = 10) -> List[Dict]:
+    def is_alive(self) -> bool:
+        """
+        Check the connection with a NOOP
+        
+        Returns:
+            True if the server answered
+        """
+        if not self.connection:
+            return False
+        
+        try:
+            status, _ = self.connection.noop()
+            return status == 'OK'
+        except Exception as e:
+            logger.warning(f"Connection to {self.email_address} is dead: {e}")
+            return False
+    
+    def fetch_unread_emails(self,
+                            folder: str = "INBOX",
+                            limit: int = 10,
+                            header_filter: Callable[[Dict], bool] = None) -> List[Dict]:
         """
         Fetch unread emails from specified folder
         
         Args:
             folder: Email folder to check (default: INBOX)
             limit: Maximum number of emails to fetch
+            header_filter: Enables header-first fetching, see fetch_emails()
             
         Returns:
             List of email dictionaries with parsed content
@@ -83,41 +190,21 @@ class EmailConnector:
         
         try:
             # Select folder
-            self.connection.select(folder)
+            self._select_folder(folder)
             
             # Search for unread emails
-            status, messages = self.connection.search(None, 'UNSEEN')
+            status, messages = self.connection.uid('search', None, 'UNSEEN')
             
             if status != 'OK':
                 logger.warning("No unread emails found")
                 return []
             
-            email_ids = messages[0].split()
+            uids = [int(uid) for uid in messages[0].split()]
             
             # Limit number of emails
-            email_ids = email_ids[-limit:] if len(email_ids) > limit else email_ids
-            
-            emails = []
+            uids = uids[-limit:] if len(uids) > limit else uids
             
-            for email_id in email_ids:
-                try:
-                    # Fetch email
-                    status, msg_data = self.connection.fetch(email_id, '(RFC822)')
-                    
-                    if status != 'OK':
-                        continue
-                    
-                    # Parse email
-                    raw_email = msg_data[0][1]
-                    email_message = email.message_from_bytes(raw_email)
-                    
-                    # Extract email details
-                    parsed_email = self._parse_email(email_message, email_id.decode())
-                    emails.append(parsed_email)
-                    
-                except Exception as e:
-                    logger.error(f"Error parsing email {email_id}: {e}")
-                    continue
+            emails = list(self.fetch_emails(uids, header_filter=header_filter))
             
             logger.info(f"Fetched {len(emails)} unread emails")
             return emails
@@ -126,7 +213,11 @@ class EmailConnector:
             logger.error(f"Error fetching emails: {e}")
             return []
     
-    def fetch_recent_emails(self, folder: str = "INBOX", days: int = 1, limit: int = 20) -> List[Dict]:
+    def fetch_recent_emails(self,
+                            folder: str = "INBOX",
+                            days: int = 1,
+                            limit: int = 20,
+                            header_filter: Callable[[Dict], bool] = None) -> List[Dict]:
         """
         Fetch recent emails from last N days (regardless of read status)
         
@@ -134,6 +225,7 @@ class EmailConnector:
             folder: Email folder to check (default: INBOX)
             days: Number of days to look back (default: 1)
             limit: Maximum number of emails to fetch
+            header_filter: Enables header-first fetching, see fetch_emails()
             
         Returns:
             List of email dictionaries with parsed content
@@ -148,70 +240,52 @@ class EmailConnector:
             logger.info("Connected successfully")
         
         try:
-            from datetime import datetime, timedelta
-            
             # Select folder
             logger.info(f"Selecting folder: {folder}")
-            self.connection.select(folder)
+            self._select_folder(folder)
+            
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+            logger.info(f"Cutoff date: {cutoff_date}")
             
-            # Instead of using SINCE (which has timezone issues), 
-            # fetch ALL emails and filter by date in Python
-            # This is more reliable across different IMAP servers
-            logger.info("Searching for ALL emails...")
-            status, messages = self.connection.search(None, 'ALL')
+            # SINCE only has day granularity and servers interpret it in their
+            # own timezone, so search one extra day and trim exactly below
+            since = self._imap_date(cutoff_date - timedelta(days=1))
+            logger.info(f"Searching for emails SINCE {since}...")
+            status, messages = self.connection.uid('search', None, 'SINCE', since)
             
             if status != 'OK':
                 logger.warning(f"Search returned status: {status}")
                 return []
             
-            email_ids = messages[0].split()
-            logger.info(f"Found {len(email_ids)} total emails in inbox")
-            
-            # Get most recent emails (last N)
-            # Fetch more than limit to account for filtering
-            fetch_count = min(len(email_ids), limit * 3)
-            email_ids = email_ids[-fetch_count:] if len(email_ids) > fetch_count else email_ids
-            
-            logger.info(f"Will fetch {len(email_ids)} most recent emails")
+            uids = [int(uid) for uid in messages[0].split()]
+            logger.info(f"Will check {len(uids)} candidate emails from the server-side date window")
             
             emails = []
-            cutoff_date = datetime.now() - timedelta(days=days)
-            logger.info(f"Cutoff date: {cutoff_date}")
             
-            for i, email_id in enumerate(reversed(email_ids)):  # Start from most recent
-                try:
-                    # Fetch email
-                    status, msg_data = self.connection.fetch(email_id, '(RFC822)')
-                    
-                    if status != 'OK':
-                        logger.warning(f"Failed to fetch email {email_id}")
-                        continue
-                    
-                    # Parse email
-                    raw_email = msg_data[0][1]
-                    email_message = email.message_from_bytes(raw_email)
-                    
-                    # Extract email details
-                    parsed_email = self._parse_email(email_message, email_id.decode())
+            if header_filter:
+                # Don't download bodies of emails that are too old anyway
+                user_filter = header_filter
+                header_filter = lambda e: (datetime.fromisoformat(e['received_at']) >= cutoff_date
+                                           and user_filter(e))
                     
-                    # Check if email is within date range
-                    # Use received_at timestamp
-                    email_date = datetime.fromisoformat(parsed_email['received_at'])
+            # Start from most recent; batches are small enough that stopping
+            # at the limit wastes at most one partial batch
+            for i, parsed_email in enumerate(self.fetch_emails(uids, newest_first=True,
+                                                               header_filter=header_filter)):
+                # Check if email is within date range
+                # Use received_at timestamp
+                email_date = datetime.fromisoformat(parsed_email['received_at'])
                     
-                    if email_date >= cutoff_date:
-                        emails.append(parsed_email)
-                        logger.info(f"Email {i+1}: '{parsed_email.get('subject', '(no subject)')}' - INCLUDED (date: {email_date})")
-                        
-                        # Stop if we have enough
-                        if len(emails) >= limit:
-                            logger.info(f"Reached limit of {limit} emails")
-                            break
-                    else:
-                        logger.debug(f"Email {i+1}: '{parsed_email.get('subject', '(no subject)')}' - SKIPPED (too old: {email_date})")
+                if email_date >= cutoff_date:
+                    emails.append(parsed_email)
+                    logger.info(f"Email {i+1}: '{parsed_email.get('subject', '(no subject)')}' - INCLUDED (date: {email_date})")
                     
-                except Exception as e:
-                    logger.error(f"Error parsing email {email_id}: {e}")
-                    continue
+                    # Stop if we have enough
+                    if len(emails) >= limit:
+                        logger.info(f"Reached limit of {limit} emails")
+                        break
+                else:
+                    logger.debug(f"Email {i+1}: '{parsed_email.get('subject', '(no subject)')}' - SKIPPED (too old: {email_date})")
             
             logger.info(f"Returning {len(emails)} recent emails from last {days} day(s)")
             return emails
@@ -222,16 +296,605 @@ class EmailConnector:
             logger.error(traceback.format_exc())
             return []
     
-    def _parse_email(self, email_message, email_id: str) -> Dict:
+    def fetch_emails(self,
+                     uids: List[int],
+                     newest_first: bool = False,
+                     header_filter: Callable[[Dict], bool] = None,
+                     stop_on_error: bool = False) -> Iterator[Dict]:
+        """
+        Fetch emails, optionally in two phases (headers first, then bodies)
+        
+        Without a header_filter every message is fetched as BODY[HEADER] plus
+        a capped BODY[TEXT]<0.N> (N = MAX_BODY_FETCH_BYTES), so bodies longer
+        than that are truncated. With one, only From/Subject/Date/Message-ID
+        and the size are fetched first; the filter decides per email, and
+        only the survivors have their (equally capped) body text downloaded.
+        Rejected emails are not yielded.
+        
+        Args:
+            uids: UIDs to fetch (in the currently selected folder)
+            newest_first: Yield highest UIDs first
+            header_filter: Called with a header-only email dictionary
+                (body is empty), returns True to download the body
+            stop_on_error: Stop at the first batch whose FETCH fails instead
+                of skipping it (its lowest UID is kept in _failed_fetch_uid)
+            
+        Yields:
+            Email dictionaries with parsed content
+        """
+        self._failed_fetch_uid = None
+        self._returned_uids = set()
+        
+        if header_filter is None:
+            yield from self.fetch_emails_by_uid(uids, newest_first=newest_first, stop_on_error=stop_on_error)
+            return
+        
+        ordered = sorted(set(uids), reverse=newest_first)
+        batch_size = self.FETCH_BATCH_SIZE
+        
+        for start in range(0, len(ordered), batch_size):
+            chunk = ordered[start:start + batch_size]
+            headers = list(self.fetch_headers_by_uid(chunk, newest_first=newest_first,
+                                                     stop_on_error=stop_on_error))
+            if stop_on_error and self._failed_fetch_uid is not None:
+                return
+            
+            accepted = [email_data for email_data in headers if header_filter(email_data)]
+            
+            logger.debug(f"Header filter kept {len(accepted)} of {len(headers)} emails")
+            if not accepted:
+                continue
+            
+            bodies = self.fetch_bodies_by_uid([email_data['uid'] for email_data in accepted],
+                                              stop_on_error=stop_on_error)
+            if stop_on_error and self._failed_fetch_uid is not None:
+                # None of this chunk was yielded, so it counts as failed as a whole
+                self._failed_fetch_uid = min(chunk)
+                return
+            
+            missing = [email_data['uid'] for email_data in accepted if email_data['uid'] not in bodies]
+            if missing:
+                # Not done with these: leave them for the next poll
+                logger.warning(f"No body returned for {len(missing)} emails (UIDs {missing[:5]})")
+                self._returned_uids.difference_update(missing)
+                accepted = [email_data for email_data in accepted if email_data['uid'] in bodies]
+            
+            for email_data in accepted:
+                email_data['body'] = bodies[email_data['uid']]
+                email_data['headers_only'] = False
+                yield email_data
+    
+    def fetch_headers_by_uid(self,
+                             uids: List[int],
+                             batch_size: int = None,
+                             newest_first: bool = False,
+                             stop_on_error: bool = False) -> Iterator[Dict]:
+        """
+        Fetch only the envelope headers and size of emails (phase 1)
+        
+        Uses BODY.PEEK so the messages are not marked as read.
+        
+        Args:
+            uids: UIDs to fetch
+            batch_size: Messages per FETCH command (default: FETCH_BATCH_SIZE)
+            newest_first: Yield highest UIDs first
+            stop_on_error: Stop at the first failed batch, see _fetch_batched()
+            
+        Yields:
+            Email dictionaries with an empty body and 'headers_only' set
+        """
+        for item in self._fetch_batched(uids, HEADER_FETCH_PARTS, batch_size, newest_first, stop_on_error):
+            uid = item['uid']
+            try:
+                header_bytes = b''
+                for name, literal in item['sections'].items():
+                    if name.startswith('HEADER'):
+                        header_bytes = literal
+                
+                email_message = email.message_from_bytes(header_bytes)
+                
+                parsed_email = self._parse_email(email_message, item['sequence'],
+                                                 self._parse_internaldate(item['meta']), body='')
+                self._remember_uid(parsed_email['email_id'], uid)
+                size_match = FETCH_SIZE_PATTERN.search(item['meta'])
+                parsed_email.update({
+                    'uid': uid,
+                    'size': int(size_match.group(1)) if size_match else None,
+                    'headers_only': True
+                })
+                yield parsed_email
+                
+            except Exception as e:
+                logger.error(f"Error parsing headers of email UID {uid}: {e}")
+                continue
+    
+    def fetch_bodies_by_uid(self,
+                            uids: List[int],
+                            max_bytes: int = None,
+                            stop_on_error: bool = False) -> Dict[int, str]:
+        """
+        Fetch and decode only the body text of emails (phase 2)
+        
+        Requests the MIME headers plus the first ``max_bytes`` of the body,
+        so large attachments after the text part are never downloaded.
+        
+        Args:
+            uids: UIDs to fetch
+            max_bytes: Body bytes to download per email (default: MAX_BODY_FETCH_BYTES)
+            stop_on_error: Stop at the first failed batch, see _fetch_batched()
+            
+        Returns:
+            Dictionary mapping UID to decoded body text
+        """
+        message_parts = BODY_FETCH_PARTS.format(max_bytes=max_bytes or self.MAX_BODY_FETCH_BYTES)
+        bodies = {}
+        
+        for item in self._fetch_batched(uids, message_parts, stop_on_error=stop_on_error):
+            uid = item['uid']
+            try:
+                mime_headers = b''
+                text = b''
+                for name, literal in item['sections'].items():
+                    if name.startswith('HEADER'):
+                        mime_headers = literal
+                    elif name == 'TEXT':
+                        text = literal
+                
+                bodies[uid] = self._extract_body_bytes(mime_headers, text)
+                
+            except Exception as e:
+                logger.error(f"Error parsing body of email UID {uid}: {e}")
+                continue
+        
+        return bodies
+    
+    def fetch_emails_by_uid(self,
+                            uids: List[int],
+                            batch_size: int = None,
+                            newest_first: bool = False,
+                            stop_on_error: bool = False) -> Iterator[Dict]:
+        """
+        Fetch and parse emails in batched UID FETCH commands
+        
+        Each batch is requested as one compact UID set (e.g. ``1201:1260``)
+        so a whole poll costs one round trip per batch instead of one per
+        message. Parsed emails are yielded as soon as their batch arrives.
+        
+        Only the header and the first MAX_BODY_FETCH_BYTES of the body are
+        downloaded, and the body text is extracted in a streaming pass, so
+        large attachments are never held in memory.
+        
+        Args:
+            uids: UIDs to fetch (in the currently selected folder)
+            batch_size: Messages per FETCH command (default: FETCH_BATCH_SIZE)
+            newest_first: Yield highest UIDs first
+            stop_on_error: Stop at the first failed batch, see _fetch_batched()
+            
+        Yields:
+            Email dictionaries with parsed content
+        """
+        message_parts = FULL_FETCH_PARTS.format(max_bytes=self.MAX_BODY_FETCH_BYTES)
+        
+        for item in self._fetch_batched(uids, message_parts, batch_size, newest_first, stop_on_error):
+            uid = item['uid']
+            try:
+                header_bytes = item['sections'].get('HEADER')
+                if header_bytes is None:
+                    logger.warning(f"Failed to fetch email UID {uid}")
+                    continue
+                
+                # Headers only; the body is never parsed into a Message tree
+                email_message = email.message_from_bytes(header_bytes)
+                body = self._extract_body_bytes(header_bytes, item['sections'].get('TEXT', b''))
+                
+                parsed_email = self._parse_email(email_message, item['sequence'],
+                                                 self._parse_internaldate(item['meta']), body=body)
+                parsed_email['uid'] = uid
+                self._remember_uid(parsed_email['email_id'], uid)
+                yield parsed_email
+                
+            except Exception as e:
+                logger.error(f"Error parsing email UID {uid}: {e}")
+                continue
+    
+    def _fetch_batched(self,
+                       uids: List[int],
+                       message_parts: str,
+                       batch_size: int = None,
+                       newest_first: bool = False,
+                       stop_on_error: bool = False) -> Iterator[Dict]:
+        """
+        Issue one UID FETCH per batch and yield the raw response per message
+        
+        A batch whose FETCH raises or isn't OK is skipped and its lowest UID
+        recorded in _failed_fetch_uid. UIDs in the response are added to
+        _returned_uids.
+        
+        Args:
+            uids: UIDs to fetch
+            message_parts: FETCH data items, e.g. '(UID RFC822)'
+            batch_size: Messages per FETCH command
+            newest_first: Fetch and yield highest UIDs first
+            stop_on_error: Stop at the first failed batch instead of skipping it
+            
+        Yields:
+            Dictionaries with 'sequence', 'uid', 'meta' (response header bytes),
+            'literals' (list of literal payloads in response order) and
+            'sections' (literal payloads keyed by BODY section name)
+        """
+        batch_size = batch_size or self.FETCH_BATCH_SIZE
+        ordered = sorted(set(uids), reverse=newest_first)
+        
+        for start in range(0, len(ordered), batch_size):
+            batch = ordered[start:start + batch_size]
+            
+            try:
+                status, msg_data = self.connection.uid('fetch', self._compress_uid_set(batch), message_parts)
+                if status != 'OK':
+                    logger.warning(f"UID FETCH returned status {status} for {len(batch)} emails")
+            except Exception as e:
+                logger.error(f"Error fetching UID batch {batch[0]}..{batch[-1]}: {e}")
+                status = None
+            
+            if status != 'OK':
+                failed_uid = min(batch)
+                if self._failed_fetch_uid is None or failed_uid < self._failed_fetch_uid:
+                    self._failed_fetch_uid = failed_uid
+                if stop_on_error:
+                    return
+                continue
+            
+            items = [item for item in self._split_fetch_response(msg_data) if item['uid'] is not None]
+            items.sort(key=lambda item: item['uid'], reverse=newest_first)
+            self._returned_uids.update(item['uid'] for item in items)
+            
+            for item in items:
+                yield item
+    
+    def _split_fetch_response(self, msg_data: list) -> List[Dict]:
+        """
+        Group a multi-message FETCH response into one entry per message
+        
+        imaplib returns a flat list in which a message starts with a
+        ``(b'<seq> (...', literal)`` tuple (or plain bytes if it has no
+        literal), may continue with more tuples for further literals, and
+        ends with a closing chunk such as ``b')'``. Data items may come in
+        any order, so the UID is read from whichever chunk carries it.
+        
+        Args:
+            msg_data: Data list returned by ``IMAP4.uid('fetch', ...)``
+            
+        Returns:
+            List of dictionaries with 'sequence', 'uid', 'meta', 'literals'
+            and 'sections'
+        """
+        items = []
+        current = None
+        
+        for part in msg_data or []:
+            header = part[0] if isinstance(part, tuple) else part
+            if not isinstance(header, bytes):
+                continue
+            
+            sequence, uid = self._parse_fetch_header(header)
+            if sequence is not None:
+                current = {'sequence': sequence, 'uid': uid, 'meta': header, 'literals': [], 'sections': {}}
+                items.append(current)
+            elif current is not None:
+                current['meta'] += header
+                if current['uid'] is None:
+                    uid_match = FETCH_UID_PATTERN.search(header)
+                    if uid_match:
+                        current['uid'] = int(uid_match.group(1))
+            
+            if isinstance(part, tuple) and current is not None:
+                current['literals'].append(part[1])
+                section = FETCH_SECTION_PATTERN.search(header)
+                if section:
+                    current['sections'][section.group(1).decode()] = part[1]
+        
+        return items
+    
+    def _compress_uid_set(self, uids: List[int]) -> str:
+        """
+        Build a compact IMAP UID set, e.g. [1, 2, 3, 7] -> '1:3,7'
+        
+        Args:
+            uids: UIDs to include
+            
+        Returns:
+            UID set string
+        """
+        ranges = []
+        for uid in sorted(set(uids)):
+            if ranges and uid == ranges[-1][1] + 1:
+                ranges[-1][1] = uid
+            else:
+                ranges.append([uid, uid])
+        
+        return ','.join(str(lo) if lo == hi else f"{lo}:{hi}" for lo, hi in ranges)
+    
+    def fetch_new_emails(self,
+                         folder: str = "INBOX",
+                         limit: int = 50,
+                         header_filter: Callable[[Dict], bool] = None,
+                         is_processed: Callable[[str], bool] = None) -> List[Dict]:
+        """
+        Fetch emails that arrived since the last sync (UID-based incremental sync)
+        
+        Remembers UIDVALIDITY and the highest UID seen per folder and only asks
+        the server for ``UID n+1:*``, so poll cost no longer grows with mailbox
+        size. If UIDVALIDITY changed (or there is no cursor yet), the cursor is
+        discarded and the newest ``limit`` messages are fetched as a full resync.
+        
+        With is_processed, the saved cursor only moves past emails once they
+        have been processed: later polls in this process continue after the
+        last fetched UID, but after a crash the emails that were fetched and
+        never processed are fetched again. Without it, the cursor is saved as
+        soon as emails are fetched, which is cheaper but loses those emails.
+        
+        Args:
+            folder: Email folder to check (default: INBOX)
+            limit: Maximum number of emails to fetch in one call
+            header_filter: Enables header-first fetching, see fetch_emails()
+            is_processed: Called with an email ID, returns True once the
+                email needs no further processing
+            
+        Returns:
+            List of email dictionaries with parsed content
+        """
+        if not self.connection:
+            if not self.connect():
+                return []
+        
+        try:
+            uidvalidity = self._select_folder(folder)
+            state_key = self._sync_key(folder)
+            if is_processed:
+                self._confirm_processed(state_key, uidvalidity, is_processed)
+            state = self.sync_state.get(state_key)
+            
+            if state and uidvalidity is not None and state.get('uidvalidity') == uidvalidity:
+                # Incremental sync: only UIDs above the cursor (and above what
+                # this process already fetched but hasn't seen processed yet)
+                last_uid = state.get('last_uid', 0)
+                unconfirmed = self._unconfirmed.get(state_key)
+                if unconfirmed and unconfirmed['uidvalidity'] == uidvalidity:
+                    last_uid = max(last_uid, unconfirmed['fetched_uid'])
+                status, messages = self.connection.uid('search', None, f'UID {last_uid + 1}:*')
+                full_resync = False
+            else:
+                if state:
+                    logger.warning(f"UIDVALIDITY changed for {state_key} "
+                                   f"({state.get('uidvalidity')} -> {uidvalidity}), doing full resync")
+                last_uid = 0
+                self._unconfirmed.pop(state_key, None)
+                status, messages = self.connection.uid('search', None, 'ALL')
+                full_resync = True
+            
+            if status != 'OK':
+                logger.warning(f"UID search returned status: {status}")
+                return []
+            
+            # "n+1:*" always matches the highest UID, even if it is <= n
+            uids = sorted(int(uid) for uid in messages[0].split() if int(uid) > last_uid)
+            
+            if not uids:
+                logger.info(f"No new emails in {folder} since UID {last_uid}")
+                return []
+            
+            if len(uids) > limit:
+                if full_resync:
+                    # Initial sync: only the newest messages are interesting
+                    uids = uids[-limit:]
+                else:
+                    # Work through the backlog oldest-first, the cursor picks up the rest next poll
+                    uids = uids[:limit]
+            
+            emails = list(self.fetch_emails(uids, header_filter=header_filter, stop_on_error=True))
+            
+            # Only move the cursor over UIDs the server actually returned, so
+            # the next poll retries from the first failed batch or missing message
+            if self._failed_fetch_uid is not None:
+                logger.warning(f"Stopped syncing {folder} at failed batch starting at UID {self._failed_fetch_uid}, "
+                               f"will retry from there next poll")
+            
+            fetched_uids = []
+            for uid in uids:
+                if self._failed_fetch_uid is not None and uid >= self._failed_fetch_uid:
+                    break
+                if uid not in self._returned_uids:
+                    logger.warning(f"UID {uid} in {folder} was not returned by the server, "
+                                   f"will retry from there next poll")
+                    break
+                fetched_uids.append(uid)
+            
+            if fetched_uids and is_processed:
+                last_uid = fetched_uids[-1]
+                unconfirmed = self._unconfirmed.setdefault(state_key, {'pending': []})
+                unconfirmed['uidvalidity'] = uidvalidity
+                unconfirmed['fetched_uid'] = last_uid
+                unconfirmed['pending'].extend(
+                    (email_data['uid'], email_data['email_id']) for email_data in emails if email_data['uid'] <= last_uid
+                )
+                unconfirmed['pending'].sort()
+                self._confirm_processed(state_key, uidvalidity, is_processed)
+            elif fetched_uids:
+                last_uid = fetched_uids[-1]
+                self.sync_state[state_key] = {
+                    'uidvalidity': uidvalidity,
+                    'last_uid': last_uid
+                }
+                self._save_sync_state([state_key])
+            
+            logger.info(f"Fetched {len(emails)} new emails from {folder} (fetched up to UID {last_uid}, "
+                        f"saved cursor at UID {self.sync_state.get(state_key, {}).get('last_uid')})")
+            return emails
+            
+        except Exception as e:
+            logger.error(f"Error syncing emails: {e}")
+            return []
+    
+    def _confirm_processed(self, state_key: str, uidvalidity: Optional[int], is_processed: Callable[[str], bool]):
+        """
+        Move the saved cursor up to the first fetched email not yet processed
+        
+        Args:
+            state_key: Sync key of the folder
+            uidvalidity: Current UIDVALIDITY of the folder
+            is_processed: Called with an email ID
+        """
+        unconfirmed = self._unconfirmed.get(state_key)
+        if not unconfirmed or unconfirmed['uidvalidity'] != uidvalidity:
+            return
+        
+        pending = unconfirmed['pending']
+        while pending and is_processed(pending[0][1]):
+            pending.pop(0)
+        
+        cursor = pending[0][0] - 1 if pending else unconfirmed['fetched_uid']
+        state = self.sync_state.get(state_key)
+        if state and state.get('uidvalidity') == uidvalidity and state.get('last_uid', 0) >= cursor:
+            return
+        
+        if pending:
+            logger.debug(f"Cursor of {state_key} held at UID {cursor}: "
+                         f"{len(pending)} fetched emails not processed yet")
+        self.sync_state[state_key] = {
+            'uidvalidity': uidvalidity,
+            'last_uid': cursor
+        }
+        self._save_sync_state([state_key])
+    
+    def reset_sync_state(self, folder: str = None):
+        """
+        Forget UID sync cursors, forcing a full resync on the next poll
+        
+        Args:
+            folder: Folder to reset (default: all folders of this account)
+        """
+        if folder:
+            state_key = self._sync_key(folder)
+            self.sync_state.pop(state_key, None)
+            self._unconfirmed.pop(state_key, None)
+            self._save_sync_state([state_key])
+        else:
+            prefix = f"{self.email_address}:"
+            changed_keys = [key for key in self.sync_state if key.startswith(prefix)]
+            for key in changed_keys:
+                del self.sync_state[key]
+            self._save_sync_state(changed_keys)
+    
+    def _select_folder(self, folder: str) -> Optional[int]:
+        """
+        Select folder and return its UIDVALIDITY
+        
+        If the folder is already selected on this connection, a NOOP is sent
+        instead so the server reports new messages without a full SELECT.
+        
+        Args:
+            folder: Email folder to select
+            
+        Returns:
+            UIDVALIDITY of the folder, or None if the server did not report it
+        """
+        if self.selected_folder == folder:
+            status, _ = self.connection.noop()
+            if status == 'OK':
+                # Servers announce a UIDVALIDITY change as an untagged response
+                _, data = self.connection.response('UIDVALIDITY')
+                if data and data[0]:
+                    self.selected_uidvalidity = int(data[0])
+                return self.selected_uidvalidity
+        
+        self.selected_folder = None
+        status, _ = self.connection.select(folder)
+        if status != 'OK':
+            raise imaplib.IMAP4.error(f"Could not select folder {folder}")
+        
+        _, data = self.connection.response('UIDVALIDITY')
+        self.selected_folder = folder
+        self.selected_uidvalidity = int(data[0]) if data and data[0] else None
+        return self.selected_uidvalidity
+    
+    def _sync_key(self, folder: str) -> str:
+        """Key used to store the sync cursor of a folder"""
+        return f"{self.email_address}:{folder}"
+    
+    def _parse_fetch_header(self, header: bytes) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Parse sequence number and UID from a FETCH response header
+        
+        Args:
+            header: First element of a FETCH response item
+            
+        Returns:
+            Tuple of (sequence number, UID); both None if this isn't the
+            start of an item, UID None if it comes in a later chunk
+        """
+        match = FETCH_HEADER_PATTERN.match(header or b'')
+        if not match:
+            return None, None
+        uid_match = FETCH_UID_PATTERN.search(header, match.end())
+        return match.group(1).decode(), int(uid_match.group(1)) if uid_match else None
+    
+    def _load_sync_state(self):
+        """Load UID sync cursors from file"""
+        if os.path.exists(self.sync_state_file):
+            try:
+                with open(self.sync_state_file, 'r') as f:
+                    self.sync_state = json.load(f)
+                logger.debug(f"Loaded sync state for {len(self.sync_state)} folders")
+            except Exception as e:
+                logger.error(f"Error loading sync state: {e}")
+    
+    def _save_sync_state(self, changed_keys: List[str]):
+        """
+        Save UID sync cursors to file
+        
+        Several connectors (one per account/folder) share the file, so only
+        the given keys are merged into what is on disk.
+        
+        Args:
+            changed_keys: Sync keys updated (or removed) by this connector
+        """
+        try:
+            with SYNC_STATE_LOCK:
+                on_disk = {}
+                if os.path.exists(self.sync_state_file):
+                    with open(self.sync_state_file, 'r') as f:
+                        on_disk = json.load(f)
+                
+                for key in changed_keys:
+                    if key in self.sync_state:
+                        on_disk[key] = self.sync_state[key]
+                    else:
+                        on_disk.pop(key, None)
+                
+                tmp_file = f"{self.sync_state_file}.tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(on_disk, f, indent=2)
+                os.replace(tmp_file, self.sync_state_file)
+        except Exception as e:
+            logger.error(f"Error saving sync state: {e}")
+    
+    def _parse_email(self,
+                     email_message,
+                     sequence: str = None,
+                     internal_date: datetime = None,
+                     body: str = None) -> Dict:
         """
         Parse email message into structured dictionary
         
         Args:
             email_message: Email message object
-            email_id: Email ID
+            sequence: IMAP sequence number (informational only, it shifts
+                when messages are deleted or moved)
+            internal_date: Server receive time (IMAP INTERNALDATE), if fetched
+            body: Already extracted body text (extracted from email_message if None)
             
         Returns:
-            Dictionary with email details
+            Dictionary with email details; 'email_id' is the stable dedup key
         """
         # Decode subject
         subject = email_message.get("Subject", "")
@@ -249,20 +912,114 @@ class EmailConnector:
         date_header = email_message.get("Date", "")
         
         # Extract body
-        body = self._extract_body(email_message)
+        if body is None:
+            body = self._extract_body(email_message)
         
         return {
-            "email_id": email_id,
+            "email_id": self._email_id(email_message),
+            "message_id": email_message.get("Message-ID", ""),
+            "sequence": sequence,
             "from": from_header,
             "subject": subject,
             "date": date_header,
             "body": body,
-            "received_at": datetime.now().isoformat()
+            "received_at": self._received_at(date_header, internal_date).isoformat()
         }
     
+    def _email_id(self, email_message) -> str:
+        """
+        Stable dedup key for an email
+        
+        Uses the Message-ID (angle brackets and whitespace stripped). Emails
+        without one get a hash of From/Date/Subject, which are the headers
+        available in both full and header-first fetches.
+        
+        Args:
+            email_message: Email message object (headers are enough)
+        
+        Returns:
+            Email ID string
+        """
+        message_id = ''.join(str(email_message.get("Message-ID", "")).split()).strip('<>')
+        if message_id:
+            return message_id
+        
+        content = '\n'.join(str(email_message.get(name, "")).strip() for name in ("From", "Date", "Subject"))
+        return "sha256:" + hashlib.sha256(content.encode('utf-8', errors='replace')).hexdigest()[:32]
+    
+    def _remember_uid(self, email_id: str, uid: int):
+        """Record where a fetched email lives so mark_as_read can address it by UID"""
+        self.uid_map[email_id] = (self.selected_folder, self.selected_uidvalidity, uid)
+        self.uid_map.move_to_end(email_id)
+        while len(self.uid_map) > self.UID_MAP_MAX_ENTRIES:
+            self.uid_map.popitem(last=False)
+    
+    def _received_at(self, date_header: str, internal_date: datetime = None) -> datetime:
+        """
+        Determine when an email was received, as a timezone-aware datetime
+        
+        Prefers the server's INTERNALDATE (what SINCE searches on), then the
+        Date header, and only falls back to the current time if neither parses.
+        
+        Args:
+            date_header: Raw Date header
+            internal_date: IMAP INTERNALDATE, if fetched
+            
+        Returns:
+            Aware datetime in UTC
+        """
+        if internal_date:
+            return internal_date.astimezone(timezone.utc)
+        
+        if date_header:
+            try:
+                received = parsedate_to_datetime(str(date_header))
+                if received.tzinfo is None:
+                    # RFC 5322 "-0000": no zone information, assume UTC
+                    received = received.replace(tzinfo=timezone.utc)
+                return received.astimezone(timezone.utc)
+            except (TypeError, ValueError, IndexError) as e:
+                logger.debug(f"Unparseable Date header '{date_header}': {e}")
+        
+        return datetime.now(timezone.utc)
+    
+    def _parse_internaldate(self, meta: bytes) -> Optional[datetime]:
+        """
+        Parse INTERNALDATE from a FETCH response header
+        
+        Args:
+            meta: FETCH response header bytes
+            
+        Returns:
+            Aware datetime, or None if not present
+        """
+        match = FETCH_INTERNALDATE_PATTERN.search(meta or b'')
+        if not match:
+            return None
+        
+        try:
+            # e.g. "17-Jul-1996 02:44:25 -0700"; %b is locale dependent, so map by hand
+            day, month, rest = match.group(1).decode().strip().split('-', 2)
+            return datetime.strptime(f"{day}-{IMAP_MONTHS.index(month) + 1}-{rest}", '%d-%m-%Y %H:%M:%S %z')
+        except ValueError as e:
+            logger.debug(f"Unparseable INTERNALDATE {match.group(1)!r}: {e}")
+            return None
+    
+    def _imap_date(self, value: datetime) -> str:
+        """
+        Format a date for IMAP SEARCH (e.g. '17-Jul-1996')
+        
+        Args:
+            value: Date to format
+            
+        Returns:
+            IMAP date string
+        """
+        return f"{value.day:02d}-{IMAP_MONTHS[value.month - 1]}-{value.year}"
+    
     def _extract_body(self, email_message) -> str:
         """
-        Extract email body (text or HTML)
+        Extract email body (text or HTML) from a parsed message
         
         Args:
             email_message: Email message object
@@ -270,52 +1027,54 @@ class EmailConnector:
         Returns:
             Email body as string
         """
-        body = ""
+        try:
+            return extract_text_body(email_message.as_bytes(), self.MAX_BODY_CHARS)
+        except Exception as e:
+            logger.error(f"Error extracting email body: {e}")
+            return ""
+    
+    def _extract_body_bytes(self, headers: bytes, text: bytes) -> str:
+        """
+        Extract email body (text or HTML) from raw fetched sections
         
-        if email_message.is_multipart():
-            # Multipart email
-            for part in email_message.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition", ""))
-                
-                # Skip attachments
-                if "attachment" in content_disposition:
-                    continue
-                
-                # Get text content
-                if content_type == "text/plain":
-                    try:
-                        body = part.get_payload(decode=True).decode()
-                        break
-                    except:
-                        pass
-                elif content_type == "text/html" and not body:
-                    try:
-                        # Fallback to HTML if no plain text
-                        body = part.get_payload(decode=True).decode()
-                    except:
-                        pass
-        else:
-            # Simple email
-            try:
-                body = email_message.get_payload(decode=True).decode()
-            except:
-                body = str(email_message.get_payload())
+        The first text/plain part is decoded with its declared charset and
+        scanning stops there; HTML is only stripped to text if there is no
+        plain part. Output is capped at MAX_BODY_CHARS.
         
-        return body.strip()
+        Args:
+            headers: Top-level MIME headers (at least Content-Type)
+            text: Body bytes (possibly truncated)
+            
+        Returns:
+            Email body as string
+        """
+        return extract_text_body([headers.rstrip(b'\r\n'), b'\r\n\r\n', text], self.MAX_BODY_CHARS)
     
     def mark_as_read(self, email_id: str):
         """
         Mark email as read
         
+        The email is addressed by the UID recorded when it was fetched, so
+        deletions since then cannot make this flag the wrong message.
+        
         Args:
             email_id: Email ID to mark as read
         """
         if not self.connection:
             return
         
+        location = self.uid_map.get(email_id)
+        if not location:
+            logger.warning(f"Cannot mark email {email_id} as read: not fetched by this connector")
+            return
+        
+        folder, uidvalidity, uid = location
+        
         try:
-            self.connection.store(email_id.encode(), '+FLAGS', '\\Seen')
+            if self._select_folder(folder) != uidvalidity:
+                logger.warning(f"UIDVALIDITY of {folder} changed, not marking email {email_id} as read")
+                return
+            self.connection.uid('store', str(uid), '+FLAGS', '(\\Seen)')
             logger.info(f"Marked email {email_id} as read")
         except Exception as e:
             logger.error(f"Error marking email as read: {e}")
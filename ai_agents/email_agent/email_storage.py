@@ -5,29 +5,53 @@ Prevents duplicate processing
 
 import json
 import os
-from typing import Dict, List, Set
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, Tuple, Union
 from datetime import datetime
 import logging
 
+from .dedup_index import ProcessedIdIndex
+
 logger = logging.getLogger(__name__)
 
+# Project root, so the API process and the background loop share one store
+# regardless of their working directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Records accepted by mark_processed_many: an email ID or (email_id, project_id)
+ProcessedRecord = Union[str, Tuple[str, str]]
+
 
 class EmailStorage:
     """
     Simple file-based storage for tracking processed emails
     In production, use a database
+    
+    Processed IDs are kept in a ProcessedIdIndex (hashed, sorted arrays
+    behind a Bloom filter) so memory and load time stay flat as mailbox
+    history grows. Entries older than the retention window are expired.
     """
     
-    def __init__(self, storage_file: str = "processed_emails.json"):
+    # Run expiry at most this often (it scans every entry)
+    EXPIRY_INTERVAL_SECONDS = 24 * 60 * 60
+    
+    def __init__(self, storage_file: str = "processed_emails.json", retention_days: float = None):
         """
         Initialize email storage
         
         Args:
             storage_file: Path to storage file
+            retention_days: Forget processed emails older than this; must
+                exceed the fetch lookback window
+                (default: EMAIL_DEDUP_RETENTION_DAYS env var, else 30)
         """
         self.storage_file = storage_file
-        self.processed_emails: Set[str] = set()
+        self.retention_days = float(retention_days or os.getenv("EMAIL_DEDUP_RETENTION_DAYS", 30))
+        self.processed_emails = ProcessedIdIndex()
         self.email_project_mapping: Dict[str, str] = {}
+        self.last_expired = 0.0
         self._load()
     
     def _load(self):
@@ -36,20 +60,43 @@ class EmailStorage:
             try:
                 with open(self.storage_file, 'r') as f:
                     data = json.load(f)
-                    self.processed_emails = set(data.get('processed_emails', []))
+                    if 'processed_index' in data:
+                        self.processed_emails = ProcessedIdIndex.from_dict(data['processed_index'])
+                    for email_id in data.get('processed_emails', []):
+                        # Plain ID list written by older versions (or by a reset)
+                        self.processed_emails.add(email_id)
                     self.email_project_mapping = data.get('email_project_mapping', {})
+                    self.last_expired = data.get('last_expired', 0.0)
                 logger.info(f"Loaded {len(self.processed_emails)} processed emails")
             except Exception as e:
                 logger.error(f"Error loading storage: {e}")
     
+        self._expire_if_due()
+    
+    def _expire_if_due(self):
+        """Drop entries older than the retention window (at most daily)"""
+        now = time.time()
+        if now - self.last_expired < self.EXPIRY_INTERVAL_SECONDS:
+            return
+        
+        removed = self.processed_emails.expire(self.retention_days * 86400, now)
+        self.last_expired = now
+        if removed:
+            logger.info(f"Expired {removed} processed emails older than {self.retention_days:g} days")
+    
+    def _snapshot_data(self, processed_emails: ProcessedIdIndex, email_project_mapping: Dict[str, str]) -> Dict:
+        """Build the JSON snapshot document"""
+        return {
+            'processed_index': processed_emails.to_dict(),
+            'email_project_mapping': email_project_mapping,
+            'last_expired': self.last_expired,
+            'last_updated': datetime.now().isoformat()
+        }
+    
     def _save(self):
         """Save processed emails to file"""
         try:
-            data = {
-                'processed_emails': list(self.processed_emails),
-                'email_project_mapping': self.email_project_mapping,
-                'last_updated': datetime.now().isoformat()
-            }
+            data = self._snapshot_data(self.processed_emails, self.email_project_mapping)
             with open(self.storage_file, 'w') as f:
                 json.dump(data, f, indent=2)
             logger.debug("Saved processed emails")
@@ -84,6 +131,24 @@ class EmailStorage:
         self._save()
         logger.info(f"Marked email {email_id} as processed")
     
+    def mark_processed_many(self, records: Iterable[ProcessedRecord]):
+        """
+        Mark several emails as processed with a single write
+        
+        Args:
+            records: Email IDs, or (email_id, project_id) tuples
+        """
+        count = 0
+        for email_id, project_id in _normalize_records(records):
+            self.processed_emails.add(email_id)
+            if project_id:
+                self.email_project_mapping[email_id] = project_id
+            count += 1
+        
+        if count:
+            self._save()
+            logger.info(f"Marked {count} emails as processed")
+    
     def get_project_id(self, email_id: str) -> str:
         """
         Get project ID associated with email
@@ -107,3 +172,431 @@ class EmailStorage:
             'total_processed': len(self.processed_emails),
             'total_projects': len(self.email_project_mapping)
         }
+
+    def clear(self):
+        """Forget all processed emails"""
+        self.processed_emails = ProcessedIdIndex()
+        self.email_project_mapping = {}
+        self._save()
+        logger.info("Cleared processed emails")
+
+
+class AppendLogEmailStorage(EmailStorage):
+    """
+    Email storage that appends one JSON line per processed email
+    
+    Marking an email costs one small append instead of rewriting the whole
+    file. ``storage_file`` holds a JSON snapshot in the same format as
+    EmailStorage; ``<storage_file>.log`` holds the records written since.
+    Once the log passes ``compact_threshold_bytes`` it is rotated and folded
+    into a fresh snapshot on a background thread.
+    """
+    
+    def __init__(self,
+                 storage_file: str = "processed_emails.json",
+                 compact_threshold_bytes: int = 1024 * 1024,
+                 retention_days: float = None):
+        """
+        Initialize append-log storage
+        
+        Args:
+            storage_file: Path to snapshot file (log lives next to it)
+            compact_threshold_bytes: Log size that triggers compaction
+            retention_days: See EmailStorage
+        """
+        self.log_file = storage_file + ".log"
+        self.compacting_file = storage_file + ".log.compacting"
+        self.compact_threshold_bytes = compact_threshold_bytes
+        self._lock = threading.Lock()
+        self._log_handle = None
+        self._log_size = 0
+        self._compaction_thread = None
+        super().__init__(storage_file, retention_days)
+    
+    def _load(self):
+        """Load snapshot, then replay logs (including one left by an interrupted compaction)"""
+        super()._load()
+        
+        replayed = 0
+        for path in (self.compacting_file, self.log_file):
+            replayed += self._replay(path)
+        
+        if os.path.exists(self.log_file):
+            self._truncate_partial_record()
+            self._log_size = os.path.getsize(self.log_file)
+        
+        if replayed:
+            logger.info(f"Replayed {replayed} log records ({len(self.processed_emails)} processed emails)")
+    
+    def _replay(self, path: str) -> int:
+        """
+        Apply the records of one log file
+        
+        Args:
+            path: Log file to replay
+        
+        Returns:
+            Number of records applied
+        """
+        if not os.path.exists(path):
+            return 0
+        
+        count = 0
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash mid-append leaves a partial last line
+                    logger.warning(f"Skipping corrupt record in {path}")
+                    continue
+                
+                processed_at = record.get('processed_at')
+                self.processed_emails.add(
+                    record['email_id'],
+                    datetime.fromisoformat(processed_at).timestamp() if processed_at else None
+                )
+                if record.get('project_id'):
+                    self.email_project_mapping[record['email_id']] = record['project_id']
+                count += 1
+        return count
+    
+    def _truncate_partial_record(self):
+        """Cut a partial last line so the next append starts on a fresh line"""
+        try:
+            with open(self.log_file, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+        except Exception as e:
+            logger.error(f"Error repairing storage log: {e}")
+    
+    def mark_processed(self, email_id: str, project_id: str = None):
+        """
+        Mark email as processed
+        
+        Args:
+            email_id: Email ID
+            project_id: Associated project ID (optional)
+        """
+        record = {'email_id': email_id, 'processed_at': datetime.now().isoformat()}
+        if project_id:
+            record['project_id'] = project_id
+        line = json.dumps(record) + "\n"
+        
+        with self._lock:
+            self.processed_emails.add(email_id)
+            if project_id:
+                self.email_project_mapping[email_id] = project_id
+            
+            try:
+                if self._log_handle is None:
+                    self._log_handle = open(self.log_file, 'a')
+                self._log_handle.write(line)
+                self._log_handle.flush()
+                self._log_size += len(line)
+            except Exception as e:
+                logger.error(f"Error appending to storage log: {e}")
+            
+            needs_compaction = self._log_size >= self.compact_threshold_bytes
+        
+        logger.info(f"Marked email {email_id} as processed")
+        
+        if needs_compaction:
+            self.compact(background=True)
+    
+    def mark_processed_many(self, records: Iterable[ProcessedRecord]):
+        """
+        Mark several emails as processed with a single append
+        
+        Args:
+            records: Email IDs, or (email_id, project_id) tuples
+        """
+        now = datetime.now().isoformat()
+        lines = []
+        
+        with self._lock:
+            for email_id, project_id in _normalize_records(records):
+                record = {'email_id': email_id, 'processed_at': now}
+                self.processed_emails.add(email_id)
+                if project_id:
+                    record['project_id'] = project_id
+                    self.email_project_mapping[email_id] = project_id
+                lines.append(json.dumps(record) + "\n")
+            
+            if not lines:
+                return
+            
+            try:
+                if self._log_handle is None:
+                    self._log_handle = open(self.log_file, 'a')
+                chunk = "".join(lines)
+                self._log_handle.write(chunk)
+                self._log_handle.flush()
+                self._log_size += len(chunk)
+            except Exception as e:
+                logger.error(f"Error appending to storage log: {e}")
+            
+            needs_compaction = self._log_size >= self.compact_threshold_bytes
+        
+        logger.info(f"Marked {len(lines)} emails as processed")
+        
+        if needs_compaction:
+            self.compact(background=True)
+    
+    def compact(self, background: bool = False):
+        """
+        Fold the log into a new snapshot
+        
+        The current log is renamed aside and a new one started, so appends
+        continue while the snapshot is written.
+        
+        Args:
+            background: Write the snapshot on a background thread
+        """
+        with self._lock:
+            if self._compaction_thread and self._compaction_thread.is_alive():
+                return
+            if os.path.exists(self.compacting_file):
+                # Leftover from an interrupted compaction; fold it in with this one
+                logger.warning("Found unfinished compaction log, including it in this compaction")
+            
+            if self._log_handle:
+                self._log_handle.close()
+                self._log_handle = None
+            
+            try:
+                if os.path.exists(self.log_file):
+                    if os.path.exists(self.compacting_file):
+                        with open(self.compacting_file, 'a') as dst, open(self.log_file, 'r') as src:
+                            dst.write(src.read())
+                        os.remove(self.log_file)
+                    else:
+                        os.replace(self.log_file, self.compacting_file)
+            except Exception as e:
+                logger.error(f"Error rotating storage log: {e}")
+                return
+            
+            self._log_size = 0
+            self._expire_if_due()
+            processed_emails = self.processed_emails.copy()
+            email_project_mapping = dict(self.email_project_mapping)
+        
+        if background:
+            self._compaction_thread = threading.Thread(
+                target=self._write_snapshot,
+                args=(processed_emails, email_project_mapping),
+                name="email-storage-compaction",
+                daemon=True
+            )
+            self._compaction_thread.start()
+        else:
+            self._write_snapshot(processed_emails, email_project_mapping)
+    
+    def _write_snapshot(self, processed_emails: ProcessedIdIndex, email_project_mapping: Dict[str, str]):
+        """
+        Atomically replace the snapshot, then drop the rotated log
+        
+        Args:
+            processed_emails: Processed email IDs at rotation time
+            email_project_mapping: Email to project mapping at rotation time
+        """
+        try:
+            data = self._snapshot_data(processed_emails, email_project_mapping)
+            tmp_file = self.storage_file + ".tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.storage_file)
+            os.remove(self.compacting_file)
+            logger.info(f"Compacted storage log into snapshot ({len(processed_emails)} emails)")
+        except Exception as e:
+            # The rotated log is kept, so nothing is lost; it is replayed on next load
+            logger.error(f"Error compacting storage log: {e}")
+    
+    def _save(self):
+        """Write a full snapshot (used by clear()); normal marks only append"""
+        with self._lock:
+            if self._log_handle:
+                self._log_handle.close()
+                self._log_handle = None
+            super()._save()
+            for path in (self.log_file, self.compacting_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._log_size = 0
+
+
+class SQLiteEmailStorage(EmailStorage):
+    """
+    Email storage backed by SQLite in WAL mode
+    
+    Safe to share between the API process and the background loop: WAL lets
+    readers run alongside a writer, every write is a transaction, and
+    lookups go through the primary key index instead of a full-file load.
+    """
+    
+    def __init__(self, storage_file: str = "processed_emails.db"):
+        """
+        Initialize SQLite storage
+        
+        Args:
+            storage_file: Path to SQLite database
+        """
+        self._lock = threading.Lock()
+        # Waits up to 30s for a lock held by the other process
+        self.db = sqlite3.connect(storage_file, timeout=30, check_same_thread=False)
+        super().__init__(storage_file)
+    
+    def _load(self):
+        """Create schema (rows are queried on demand, not loaded)"""
+        with self._lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS processed_emails ("
+                "  email_id TEXT PRIMARY KEY,"
+                "  project_id TEXT,"
+                "  processed_at TEXT NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_processed_emails_project "
+                "ON processed_emails(project_id) WHERE project_id IS NOT NULL"
+            )
+    
+    def _save(self):
+        """Every write commits its own transaction; nothing to flush"""
+        pass
+    
+    def is_processed(self, email_id: str) -> bool:
+        """
+        Check if email has been processed
+        
+        Args:
+            email_id: Email ID to check
+        
+        Returns:
+            True if email has been processed
+        """
+        with self._lock:
+            row = self.db.execute(
+                "SELECT 1 FROM processed_emails WHERE email_id = ?", (email_id,)
+            ).fetchone()
+        return row is not None
+    
+    def mark_processed(self, email_id: str, project_id: str = None):
+        """
+        Mark email as processed
+        
+        Args:
+            email_id: Email ID
+            project_id: Associated project ID (optional)
+        """
+        self.mark_processed_many([(email_id, project_id)])
+    
+    def mark_processed_many(self, records: Iterable[ProcessedRecord]):
+        """
+        Mark several emails as processed in one transaction
+        
+        Args:
+            records: Email IDs, or (email_id, project_id) tuples
+        """
+        now = datetime.now().isoformat()
+        rows = [(email_id, project_id, now) for email_id, project_id in _normalize_records(records)]
+        if not rows:
+            return
+        
+        try:
+            with self._lock, self.db:
+                # Re-marking without a project must not drop an existing mapping
+                self.db.executemany(
+                    "INSERT INTO processed_emails (email_id, project_id, processed_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(email_id) DO UPDATE SET "
+                    "  project_id = COALESCE(excluded.project_id, processed_emails.project_id)",
+                    rows
+                )
+            logger.info(f"Marked {len(rows)} emails as processed")
+        except Exception as e:
+            logger.error(f"Error saving processed emails: {e}")
+    
+    def get_project_id(self, email_id: str) -> str:
+        """
+        Get project ID associated with email
+        
+        Args:
+            email_id: Email ID
+        
+        Returns:
+            Project ID or None
+        """
+        with self._lock:
+            row = self.db.execute(
+                "SELECT project_id FROM processed_emails WHERE email_id = ?", (email_id,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def get_stats(self) -> Dict:
+        """
+        Get storage statistics
+        
+        Returns:
+            Dictionary with stats
+        """
+        with self._lock:
+            total, projects = self.db.execute(
+                "SELECT COUNT(*), COUNT(project_id) FROM processed_emails"
+            ).fetchone()
+        return {
+            'total_processed': total,
+            'total_projects': projects
+        }
+    
+    def clear(self):
+        """Forget all processed emails"""
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM processed_emails")
+        logger.info("Cleared processed emails")
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self.db.close()
+
+
+def _normalize_records(records: Iterable[ProcessedRecord]) -> Iterable[Tuple[str, str]]:
+    """Yield (email_id, project_id) pairs from IDs or tuples"""
+    for record in records:
+        if isinstance(record, str):
+            yield record, None
+        else:
+            yield record[0], record[1]
+
+
+def create_email_storage(storage_file: str = None, backend: str = None) -> EmailStorage:
+    """
+    Create the configured email storage
+    
+    Args:
+        storage_file: Path to storage file (default: EMAIL_STORAGE_FILE env
+            var, else processed_emails.json / processed_emails.db in the
+            project root)
+        backend: "json" (rewrite whole file), "log" (append-only log) or
+            "sqlite" (WAL-mode database)
+            (default: EMAIL_STORAGE_BACKEND env var, else "json")
+    
+    Returns:
+        EmailStorage instance
+    """
+    backend = (backend or os.getenv("EMAIL_STORAGE_BACKEND", "json")).lower()
+    if backend not in ("json", "log", "sqlite"):
+        logger.warning(f"Unknown email storage backend '{backend}', using json")
+        backend = "json"
+    
+    default_name = "processed_emails.db" if backend == "sqlite" else "processed_emails.json"
+    storage_file = storage_file or os.getenv("EMAIL_STORAGE_FILE") or os.path.join(PROJECT_ROOT, default_name)
+    
+    if backend == "sqlite":
+        return SQLiteEmailStorage(storage_file)
+    if backend == "log":
+        return AppendLogEmailStorage(storage_file)
+    return EmailStorage(storage_file)
@@ -0,0 +1,213 @@
+"""
+IMAP IDLE Watcher - Push-based inbox monitoring
+Wakes the pipeline as soon as the server reports new mail
+"""
+
+import time
+import select
+import imaplib
+import logging
+import threading
+from typing import Callable, Optional
+
+from .email_connector import EmailConnector
+
+logger = logging.getLogger(__name__)
+
+
+class IdleWatcher:
+    """
+    Keeps one IMAP connection in IDLE and reacts to EXISTS notifications
+    
+    Servers drop IDLE after ~29 minutes, so the command is re-issued every
+    ``renew_seconds``. When the server does not advertise the IDLE
+    capability the watcher falls back to plain polling.
+    
+    imaplib (before Python 3.14) has no IDLE support, so the command is
+    driven by hand on the connector's connection. The same connection is
+    reused by ``on_new_mail`` after IDLE has been terminated with DONE.
+    """
+    
+    # Re-issue IDLE well before the 29-minute server timeout
+    IDLE_RENEW_SECONDS = 25 * 60
+    
+    # How often a blocked IDLE checks whether stop() was called
+    STOP_CHECK_SECONDS = 1.0
+    
+    # Reconnect backoff bounds (seconds)
+    MIN_BACKOFF_SECONDS = 5
+    MAX_BACKOFF_SECONDS = 300
+    
+    def __init__(self,
+                 connector: EmailConnector,
+                 on_new_mail: Callable[[], None],
+                 folder: str = "INBOX",
+                 renew_seconds: float = None,
+                 poll_interval_minutes: float = 10,
+                 on_timeout: Optional[Callable[[], None]] = None):
+        """
+        Initialize IDLE watcher
+        
+        Args:
+            connector: Connector whose connection is kept in IDLE
+            on_new_mail: Called when new mail arrives (and once at start-up
+                to catch up on mail that arrived while offline)
+            folder: Folder to watch
+            renew_seconds: Seconds between IDLE renewals (max IDLE_RENEW_SECONDS)
+            poll_interval_minutes: Poll interval when IDLE is not supported
+            on_timeout: Called after every IDLE renewal without new mail
+        """
+        self.connector = connector
+        self.on_new_mail = on_new_mail
+        self.folder = folder
+        self.renew_seconds = min(renew_seconds or self.IDLE_RENEW_SECONDS, self.IDLE_RENEW_SECONDS)
+        self.poll_interval_minutes = poll_interval_minutes
+        self.on_timeout = on_timeout
+        self._stop_event = threading.Event()
+    
+    def supports_idle(self) -> bool:
+        """
+        Check whether the server advertises the IDLE capability
+        
+        Returns:
+            True if IDLE can be used
+        """
+        if not self._ensure_connection():
+            return False
+        
+        try:
+            status, data = self.connector.connection.capability()
+            if status == 'OK' and data and data[0]:
+                return b'IDLE' in data[0].upper().split()
+        except Exception as e:
+            logger.error(f"Error reading server capabilities: {e}")
+        return False
+    
+    def run(self):
+        """
+        Watch the folder until stop() is called
+        
+        Blocks the calling thread; run it in a thread to watch in background.
+        """
+        self._stop_event.clear()
+        
+        if not self.supports_idle():
+            logger.warning("Server does not support IDLE, falling back to polling "
+                           f"every {self.poll_interval_minutes} minutes")
+            self._run_polling()
+            return
+        
+        logger.info(f"Watching {self.folder} with IMAP IDLE "
+                    f"(renewing every {self.renew_seconds / 60:g} minutes)")
+        
+        # Catch up on anything that arrived while we were not watching
+        self._notify(self.on_new_mail)
+        
+        backoff = self.MIN_BACKOFF_SECONDS
+        while not self._stop_event.is_set():
+            try:
+                if not self._ensure_connection():
+                    raise imaplib.IMAP4.abort("reconnect failed")
+                self.connector._select_folder(self.folder)
+                
+                if self.wait_for_new_mail(self.renew_seconds):
+                    logger.info("New mail notification received")
+                    self._notify(self.on_new_mail)
+                elif not self._stop_event.is_set() and self.on_timeout:
+                    self._notify(self.on_timeout)
+                
+                backoff = self.MIN_BACKOFF_SECONDS
+            
+            except (imaplib.IMAP4.abort, imaplib.IMAP4.error, OSError) as e:
+                logger.error(f"IDLE connection lost: {e}, reconnecting in {backoff}s")
+                self.connector.connection = None
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF_SECONDS)
+        
+        logger.info("IDLE watcher stopped")
+    
+    def stop(self):
+        """Stop watching (takes effect within STOP_CHECK_SECONDS)"""
+        self._stop_event.set()
+    
+    def wait_for_new_mail(self, timeout: float) -> bool:
+        """
+        Enter IDLE and block until new mail arrives or timeout expires
+        
+        Args:
+            timeout: Maximum seconds to stay in IDLE
+        
+        Returns:
+            True if the server reported new messages (EXISTS)
+        """
+        connection = self.connector.connection
+        tag = connection._new_tag()
+        connection.send(tag + b' IDLE\r\n')
+        
+        response = connection._get_line()
+        if not response.startswith(b'+'):
+            raise imaplib.IMAP4.error(f"IDLE rejected: {response!r}")
+        
+        new_mail = False
+        deadline = time.monotonic() + timeout
+        sock = connection.socket()
+        
+        try:
+            while not new_mail and not self._stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                
+                # SSL may already hold decrypted bytes the socket won't signal
+                pending = getattr(sock, 'pending', lambda: 0)()
+                if not pending:
+                    readable, _, _ = select.select([sock], [], [], min(remaining, self.STOP_CHECK_SECONDS))
+                    if not readable:
+                        continue
+                
+                line = connection._get_line()
+                logger.debug(f"IDLE: {line!r}")
+                if line.startswith(b'*') and line.upper().endswith(b' EXISTS'):
+                    new_mail = True
+                elif line.upper().startswith(b'* BYE'):
+                    raise imaplib.IMAP4.abort(f"Server closed IDLE: {line!r}")
+        finally:
+            self._end_idle(tag)
+        
+        return new_mail
+    
+    def _end_idle(self, tag: bytes):
+        """
+        Terminate IDLE with DONE and consume the tagged completion
+        
+        Args:
+            tag: Tag of the IDLE command
+        """
+        connection = self.connector.connection
+        connection.send(b'DONE\r\n')
+        
+        while True:
+            line = connection._get_line()
+            if line.startswith(tag):
+                if b' OK' not in line.upper():
+                    raise imaplib.IMAP4.error(f"IDLE failed: {line!r}")
+                return
+    
+    def _run_polling(self):
+        """Fallback loop for servers without IDLE"""
+        while not self._stop_event.is_set():
+            self._notify(self.on_new_mail)
+            self._stop_event.wait(self.poll_interval_minutes * 60)
+    
+    def _ensure_connection(self) -> bool:
+        """Connect the connector if needed"""
+        if self.connector.connection:
+            return True
+        return self.connector.connect()
+    
+    def _notify(self, callback: Callable[[], None]):
+        """Run a callback without letting its errors kill the watcher"""
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in IDLE watcher callback: {e}")
@@ -0,0 +1,163 @@
+"""
+Keyword Matcher - Aho-Corasick multi-pattern search
+Finds every keyword of several categories in one pass over the text
+"""
+
+import logging
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Characters treated like the space inside multi-word keywords
+WHITESPACE_ALIASES = '\t\n\r\x0b\x0c\xa0'
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over lower-cased keywords
+    
+    The goto/fail structure is compiled into a full transition table
+    (one dict per state over the keyword alphabet), so scanning costs one
+    dict lookup per character regardless of the number of keywords.
+    Characters outside the alphabet reset to the root state.
+    
+    Categories listed in ``whole_word`` only match when the keyword is not
+    preceded or followed by a letter or digit; other categories match as
+    plain substrings.
+    """
+    
+    def __init__(self, categories: Dict[str, Iterable[str]], whole_word: Iterable[str] = ()):
+        """
+        Build the automaton
+        
+        Args:
+            categories: Category name -> keywords
+            whole_word: Categories that require word boundaries
+        """
+        whole_word = set(whole_word)
+        
+        # Pattern index -> (keyword, category, length, whole_word)
+        self.patterns: List[Tuple[str, str, int, bool]] = []
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                keyword = ' '.join(keyword.lower().split())
+                if not keyword:
+                    continue
+                
+                state = 0
+                for char in keyword:
+                    if char not in goto[state]:
+                        goto.append({})
+                        outputs.append([])
+                        goto[state][char] = len(goto) - 1
+                    state = goto[state][char]
+                
+                outputs[state].append(len(self.patterns))
+                self.patterns.append((keyword, category, len(keyword), category in whole_word))
+        
+        self._transitions, self._outputs = self._compile(goto, outputs)
+    
+    def _compile(self, goto: List[Dict[str, int]], outputs: List[List[int]]):
+        """Compute failure links breadth-first and fold them into the transitions"""
+        alphabet = {char for edges in goto for char in edges}
+        fail = [0] * len(goto)
+        transitions: List[Dict[str, int]] = [dict() for _ in goto]
+        
+        # Root: missing characters stay at the root (dict miss -> 0 at scan time)
+        transitions[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            
+            for char in alphabet:
+                child = goto[state].get(char)
+                if child is not None:
+                    fail[child] = transitions[fail[state]].get(char, 0)
+                    transitions[state][char] = child
+                    queue.append(child)
+                else:
+                    target = transitions[fail[state]].get(char, 0)
+                    if target:
+                        transitions[state][char] = target
+        
+        # Multi-word keywords also match across tabs, line breaks, etc.
+        for edges in transitions:
+            if ' ' in edges:
+                for alias in WHITESPACE_ALIASES:
+                    edges[alias] = edges[' ']
+        
+        return transitions, [tuple(output) for output in outputs]
+    
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """
+        Find all keywords in text
+        
+        Args:
+            text: Text to search (case-insensitive)
+        
+        Returns:
+            Category -> distinct matched keywords in order of first
+            occurrence (categories without hits are omitted)
+        """
+        hits: Dict[str, List[str]] = {}
+        if not text:
+            return hits
+        
+        text = text.lower()
+        transitions = self._transitions
+        outputs = self._outputs
+        patterns = self.patterns
+        seen = set()
+        state = 0
+        
+        for end, char in enumerate(text):
+            state = transitions[state].get(char, 0)
+            if not outputs[state]:
+                continue
+            
+            for index in outputs[state]:
+                if index in seen:
+                    continue
+                keyword, category, length, whole_word = patterns[index]
+                if whole_word and not self._at_word_boundaries(text, end - length + 1, end + 1):
+                    continue
+                seen.add(index)
+                hits.setdefault(category, []).append(keyword)
+        
+        return hits
+    
+    @staticmethod
+    def _at_word_boundaries(text: str, start: int, end: int) -> bool:
+        """True if text[start:end] is not glued to letters or digits"""
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if end < len(text) and text[end].isalnum():
+            return False
+        return True
+
+
+@lru_cache(maxsize=8)
+def get_keyword_matcher(exclusions: Tuple[str, ...], project_keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """
+    Get the process-wide matcher for an exclusion/project keyword set
+    
+    Args:
+        exclusions: Substring-matched exclusion keywords
+        project_keywords: Whole-word project keywords
+    
+    Returns:
+        KeywordMatcher with 'exclusion' and 'project' categories
+    """
+    logger.debug(f"Building keyword automaton ({len(exclusions)} exclusions, "
+                 f"{len(project_keywords)} project keywords)")
+    return KeywordMatcher(
+        {'exclusion': exclusions, 'project': project_keywords},
+        whole_word=['project']
+    )
@@ -0,0 +1,290 @@
+"""
+Multi-Source Intake - Concurrent polling of several mailboxes
+Merges sales@, projects@, aliases, etc. into one deduplicated email stream
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .email_agent import EmailAgent
+from .email_connector import EmailConnector
+from .email_storage import EmailStorage, create_email_storage
+
+logger = logging.getLogger(__name__)
+
+
+class EmailSource:
+    """
+    One account/folder pair with its own connection and failure state
+    
+    The UID cursor lives in the connector's sync state, keyed by
+    account and folder, so every source resumes independently.
+    """
+    
+    def __init__(self, name: str, agent: EmailAgent):
+        """
+        Initialize email source
+        
+        Args:
+            name: Display name (e.g. "sales/INBOX")
+            agent: EmailAgent bound to this source's connector and folder
+        """
+        self.name = name
+        self.agent = agent
+        self.last_success: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.retry_at = 0.0
+    
+    def get_status(self) -> Dict:
+        """
+        Get source health
+        
+        Returns:
+            Dictionary with status
+        """
+        return {
+            'name': self.name,
+            'email': self.agent.connector.email_address,
+            'folder': self.agent.folder,
+            'connected': self.agent.connector.connection is not None,
+            'last_success': self.last_success,
+            'last_error': self.last_error,
+            'consecutive_failures': self.consecutive_failures
+        }
+
+
+class MultiSourceIntake:
+    """
+    Polls several mailboxes concurrently and merges the results
+    
+    Drop-in replacement for EmailAgent in AutonomousSystem:
+    - Each source is checked on a thread pool; a failing source is logged,
+      backed off and retried on later polls without affecting the others
+    - All sources share one processed-email storage
+    - The same Message-ID seen in several sources (e.g. a forwarding
+      alias) is returned once, and marked as read everywhere it was seen
+    """
+    
+    # Backoff for sources that keep failing (seconds)
+    MIN_RETRY_SECONDS = 30
+    MAX_RETRY_SECONDS = 30 * 60
+    
+    def __init__(self,
+                 sources: List[Dict] = None,
+                 sync_mode: str = None,
+                 fetch_mode: str = None,
+                 storage: EmailStorage = None,
+                 max_workers: int = None):
+        """
+        Initialize multi-source intake
+        
+        Args:
+            sources: Source definitions, each with 'email', 'password' (or
+                'password_env', the name of an env var holding it), and
+                optionally 'name', 'folders' (default ["INBOX"]),
+                'imap_server' and 'imap_port'
+                (default: EMAIL_SOURCES env var as a JSON list)
+            sync_mode: Passed to each EmailAgent
+            fetch_mode: Passed to each EmailAgent
+            storage: Processed-email storage (default: create_email_storage())
+            max_workers: Concurrent polls (default: one per source)
+        """
+        self.storage = storage or create_email_storage()
+        self.sources: List[EmailSource] = []
+        
+        for config in sources if sources is not None else load_source_config():
+            self.sources.extend(self._build_sources(config, sync_mode, fetch_mode))
+        
+        if not self.sources:
+            raise ValueError("No email sources configured")
+        
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or len(self.sources),
+            thread_name_prefix="email-intake"
+        )
+        
+        # email_id -> sources it was fetched from, for mark_as_read
+        self._email_sources: Dict[str, List[EmailSource]] = {}
+        self.name = "MultiSourceIntake"
+        
+        logger.info(f"Multi-source intake watching {len(self.sources)} sources: "
+                    f"{', '.join(source.name for source in self.sources)}")
+    
+    def _build_sources(self, config: Dict, sync_mode: str, fetch_mode: str) -> List[EmailSource]:
+        """Create one source per folder of an account definition"""
+        email_address = config['email']
+        password = config.get('password') or os.getenv(config.get('password_env', ''), '')
+        connector_kwargs = {
+            'imap_server': config.get('imap_server') or os.getenv("IMAP_SERVER", "imap.gmail.com"),
+            'imap_port': int(config.get('imap_port') or os.getenv("IMAP_PORT", 993))
+        }
+        
+        sources = []
+        for folder in config.get('folders') or [config.get('folder', 'INBOX')]:
+            # One connection per folder so folders are polled in parallel too
+            connector = EmailConnector(email_address, password, **connector_kwargs)
+            agent = EmailAgent(sync_mode=sync_mode, fetch_mode=fetch_mode,
+                               connector=connector, folder=folder, storage=self.storage)
+            name = f"{config.get('name') or email_address}/{folder}"
+            sources.append(EmailSource(name, agent))
+        return sources
+    
+    def check_new_emails(self, limit: int = 10) -> List[Dict]:
+        """
+        Poll all sources concurrently
+        
+        Args:
+            limit: Maximum number of emails to fetch per source
+        
+        Returns:
+            Unprocessed emails from all sources, deduplicated by email_id;
+            each carries a 'source' key
+        """
+        now = time.time()
+        due = [source for source in self.sources if source.retry_at <= now]
+        for source in self.sources:
+            if source not in due:
+                logger.info(f"Skipping {source.name} until retry "
+                            f"({source.consecutive_failures} consecutive failures)")
+        
+        results = self.executor.map(lambda source: self._poll_source(source, limit), due)
+        
+        merged = []
+        seen_sources: Dict[str, List[EmailSource]] = {}
+        for source, emails in zip(due, results):
+            for email_data in emails:
+                email_id = email_data['email_id']
+                if email_id not in seen_sources:
+                    email_data['source'] = source.name
+                    merged.append(email_data)
+                    seen_sources[email_id] = []
+                seen_sources[email_id].append(source)
+        
+        self._email_sources.update(seen_sources)
+        
+        logger.info(f"Found {len(merged)} new unprocessed emails across {len(due)} sources")
+        return merged
+    
+    def _poll_source(self, source: EmailSource, limit: int) -> List[Dict]:
+        """Check one source, isolating its failures from the others"""
+        connector = source.agent.connector
+        try:
+            if not connector.connection and not connector.connect():
+                raise ConnectionError(f"Could not connect to {connector.email_address}")
+            
+            emails = source.agent.check_new_emails(limit=limit)
+            
+            source.last_success = time.time()
+            source.last_error = None
+            source.consecutive_failures = 0
+            source.retry_at = 0.0
+            return emails
+        
+        except Exception as e:
+            source.consecutive_failures += 1
+            source.last_error = str(e)
+            delay = min(self.MIN_RETRY_SECONDS * 2 ** (source.consecutive_failures - 1),
+                        self.MAX_RETRY_SECONDS)
+            source.retry_at = time.time() + delay
+            logger.error(f"Email source {source.name} failed: {e} (retrying in {delay}s)")
+            
+            # Force a fresh login next time
+            connector.disconnect()
+            return []
+    
+    def is_project_email(self, email_data: Dict) -> bool:
+        """
+        Determine if email is a project request (same rules as EmailAgent)
+        
+        Args:
+            email_data: Email dictionary
+        
+        Returns:
+            True if email appears to be a project request
+        """
+        return self.sources[0].agent.is_project_email(email_data)
+    
+    def process_new_emails(self) -> List[Dict]:
+        """
+        Process new emails from all sources and return project requests
+        
+        Returns:
+            List of project-related emails ready for requirement extraction
+        """
+        new_emails = self.check_new_emails()
+        
+        project_emails = []
+        non_project_ids = []
+        
+        results = self.sources[0].agent.classify_batch(new_emails)
+        
+        for email_data, result in zip(new_emails, results):
+            if result['is_project']:
+                project_emails.append(email_data)
+                logger.info(f"Project email detected via {email_data['source']}: {email_data['subject']}")
+            else:
+                non_project_ids.append(email_data['email_id'])
+        
+        self.storage.mark_processed_many(non_project_ids)
+        for email_id in non_project_ids:
+            self._email_sources.pop(email_id, None)
+        
+        return project_emails
+    
+    def mark_email_processed(self, email_id: str, project_id: str = None):
+        """
+        Mark email as processed and as read in every source it came from
+        
+        Args:
+            email_id: Email ID
+            project_id: Associated project ID (optional)
+        """
+        self.storage.mark_processed(email_id, project_id)
+        
+        for source in self._email_sources.pop(email_id, []):
+            source.agent.connector.mark_as_read(email_id)
+    
+    def get_stats(self) -> Dict:
+        """
+        Get intake statistics
+        
+        Returns:
+            Dictionary with stats
+        """
+        return {
+            'agent_name': self.name,
+            **self.storage.get_stats(),
+            'sources': [source.get_status() for source in self.sources]
+        }
+    
+    def disconnect(self):
+        """Disconnect all sources and stop the thread pool"""
+        self.executor.shutdown(wait=True)
+        for source in self.sources:
+            source.agent.disconnect()
+
+
+def load_source_config() -> List[Dict]:
+    """
+    Read source definitions from the EMAIL_SOURCES env var
+    
+    Returns:
+        List of source dictionaries (empty if unset or invalid)
+    """
+    raw = os.getenv("EMAIL_SOURCES", "").strip()
+    if not raw:
+        return []
+    
+    try:
+        sources = json.loads(raw)
+        if not isinstance(sources, list):
+            raise ValueError("EMAIL_SOURCES must be a JSON list")
+        return sources
+    except ValueError as e:
+        logger.error(f"Invalid EMAIL_SOURCES: {e}")
+        return []
@@ -0,0 +1,146 @@
+"""
+Standalone Test: Capacity-Aware Task Assignment
+Checks the Hungarian matching against brute force and the solver's skill
+and capacity behaviour
+"""
+
+import itertools
+import random
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ai_agents.team_agent.assignment_solver import AssignmentSolver, _hungarian
+
+
+TEAM = [
+    {"id": "D1", "name": "Alice", "skills": ["design", "ui", "ux"], "current_workload": 5, "max_capacity": 20},
+    {"id": "D2", "name": "Bob", "skills": ["frontend", "react", "javascript"], "current_workload": 10, "max_capacity": 20},
+    {"id": "D3", "name": "Charlie", "skills": ["backend", "python", "api"], "current_workload": 8, "max_capacity": 20},
+    {"id": "D4", "name": "Diana", "skills": ["testing", "qa", "automation"], "current_workload": 3, "max_capacity": 20}
+]
+
+TASKS = [
+    {"task_id": "T1", "task_name": "UI/UX Design", "skills_required": ["design", "ui"]},
+    {"task_id": "T2", "task_name": "Frontend Development", "skills_required": ["frontend", "react"]},
+    {"task_id": "T3", "task_name": "Backend Development", "skills_required": ["Backend", "REST API"]},
+    {"task_id": "T4", "task_name": "Testing & QA", "skills_required": ["testing", "qa"]}
+]
+
+
+def test_hungarian_matches_brute_force():
+    """Random cost matrices (with ties) get the minimum total cost"""
+    print("=" * 80)
+    print("TEST 1: HUNGARIAN VS BRUTE FORCE")
+    print("=" * 80)
+    
+    rng = random.Random(0)
+    for _ in range(300):
+        rows = rng.randint(1, 6)
+        columns = rng.randint(rows, 7)
+        cost = [[rng.randint(0, 20) for _ in range(columns)] for _ in range(rows)]
+        
+        assignment = _hungarian(cost)
+        assert len(assignment) == rows and len(set(assignment)) == rows, "Columns must be distinct"
+        
+        best = min(sum(cost[row][perm[row]] for row in range(rows))
+                   for perm in itertools.permutations(range(columns), rows))
+        assert sum(cost[row][assignment[row]] for row in range(rows)) == best, f"Not optimal for {cost}"
+    
+    assert _hungarian([]) == []
+    assert _hungarian([[2.5, 0.5, 1.5]]) == [1]
+    
+    print("\n[PASS] Test 1 Passed!\n")
+
+
+def test_skill_matching():
+    """Each task goes to the member with the matching skills"""
+    print("=" * 80)
+    print("TEST 2: SKILL MATCHING")
+    print("=" * 80)
+    
+    result = AssignmentSolver().solve(TASKS, TEAM, effort_days=30)
+    
+    assigned = {task["task_id"]: task["assigned_to"] for task in result["tasks"]}
+    print(f"\n{assigned}")
+    assert assigned == {"T1": "D1", "T2": "D2", "T3": "D3", "T4": "D4"}
+    assert all(task["estimated_days"] == 7 for task in result["tasks"])
+    assert result["warnings"] == []
+    assert "assigned_to" not in TASKS[0], "Input tasks must not be modified"
+    
+    print("\n[PASS] Test 2 Passed!\n")
+
+
+def test_capacity():
+    """Extra tasks go to members with room, overload is reported"""
+    print("=" * 80)
+    print("TEST 3: CAPACITY")
+    print("=" * 80)
+    
+    tasks = TASKS + [
+        {"task_id": "T5", "task_name": "Payment API", "skills_required": ["python"], "estimated_days": 6},
+        {"task_id": "T6", "task_name": "Docs", "skills_required": [], "estimated_days": 3}
+    ]
+    result = AssignmentSolver().solve(tasks, TEAM, effort_days=30)
+    load = {member["id"]: member["current_workload"] for member in TEAM}
+    for task in result["tasks"]:
+        load[task["assigned_to"]] += task["estimated_days"]
+    
+    print(f"\nLoad: {load}")
+    assert all(task.get("assigned_to") for task in result["tasks"])
+    assert all(load[member["id"]] <= member["max_capacity"] for member in TEAM), "Member over capacity"
+    assert result["warnings"] == []
+    
+    # Everyone nearly full: tasks are still assigned, with warnings
+    full_team = [dict(member, current_workload=19) for member in TEAM]
+    result = AssignmentSolver().solve(tasks, full_team, effort_days=30)
+    assert all(task.get("assigned_to") for task in result["tasks"])
+    assert any("over capacity" in warning for warning in result["warnings"])
+    
+    # Nobody to assign to
+    result = AssignmentSolver().solve(tasks, [], effort_days=30)
+    assert not any(task.get("assigned_to") for task in result["tasks"])
+    assert result["warnings"] == ["No team members available - tasks left unassigned"]
+    
+    print("\n[PASS] Test 3 Passed!\n")
+
+
+def test_deterministic():
+    """The same inputs always give the same assignment"""
+    print("=" * 80)
+    print("TEST 4: DETERMINISTIC")
+    print("=" * 80)
+    
+    solver = AssignmentSolver()
+    assert solver.solve(TASKS, TEAM, 30) == solver.solve(TASKS, TEAM, 30)
+    
+    print("\n[PASS] Test 4 Passed!\n")
+
+
+if __name__ == "__main__":
+    print("\n")
+    print("=" * 80)
+    print("TASK ASSIGNMENT SOLVER - TESTS")
+    print("=" * 80)
+    print("\n")
+    
+    try:
+        test_hungarian_matches_brute_force()
+        test_skill_matching()
+        test_capacity()
+        test_deterministic()
+        
+        print("=" * 80)
+        print("[SUCCESS] ALL TESTS PASSED!")
+        print("=" * 80)
+    
+    except AssertionError as e:
+        print(f"\n[FAIL] TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n[ERROR] {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
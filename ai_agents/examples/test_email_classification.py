@@ -0,0 +1,167 @@
+"""
+Standalone Test: Batch Email Classification
+Checks classify_batch against the keyword rules on a labelled hold-out set
+(none of these emails are in docs/TEST_EMAIL_EXAMPLES.md, which the model
+is trained on)
+"""
+
+import os
+import sys
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ai_agents.email_agent.email_agent import EmailAgent
+from ai_agents.email_agent.email_storage import create_email_storage
+
+
+# (from, subject, body, is_project)
+HOLDOUT_EMAILS = [
+    ("ops@steelworks.in", "Project inquiry",
+     "Hi, we want to build an ERP system for our factory covering inventory, purchase and payroll. "
+     "Could you share how you would approach it?", True),
+    ("anita@bakehouse.in", "Online ordering for our bakery",
+     "Hello, we'd like a website where customers can order cakes online. Our budget is around 60k.", True),
+    ("rahul@fitzone.co", "Gym membership app",
+     "We need a mobile app for members to book classes and pay fees. Deadline is end of next month.", True),
+    ("meera@clinicare.in", "Quote request",
+     "Can you send a quote for a patient appointment booking platform? We have 3 clinics.", True),
+    ("sales@tradelink.com", "Dashboard for sales team",
+     "Looking for someone to develop a reporting dashboard that pulls data from our CRM.", True),
+    ("founder@edtechstart.io", "MVP development",
+     "We are a small startup and require an MVP of our learning web app in 6 weeks.", True),
+    ("kiran@realty.in", "Property listing site redesign",
+     "Our current website is outdated. We want a redesign with search filters and lead forms.", True),
+    ("admin@schoolhub.org", "Attendance software",
+     "Please estimate the cost of attendance and fee management software for our school.", True),
+    ("vikram@logistix.in", "Fleet tracking",
+     "We need a platform to track 40 delivery vans in real time. Budget 3 lakh, urgent.", True),
+    ("priya@craftshop.in", "Shopify to custom store",
+     "Moving off Shopify, we want a custom e-commerce store with inventory sync.", True),
+    ("arjun@friends.com", "Dinner on Saturday?",
+     "Hey, are you free for dinner this Saturday? Thinking of the new place near the mall.", False),
+    ("accounts@vendor.in", "Invoice #4521 for October",
+     "Please find attached the invoice for October services. Payment due in 15 days.", False),
+    ("hr@company.com", "Holiday list 2027",
+     "Sharing the list of public holidays for next year. Please plan your leaves accordingly.", False),
+    ("mom@family.in", "Call me",
+     "Call me when you are free, nothing urgent. Love, Mom", False),
+    ("events@meetup.com", "Your RSVP is confirmed",
+     "See you at the Pune Python meetup on Thursday at 6 PM.", False),
+    ("priya@craftshop.in", "Thanks!",
+     "Thanks for the quick fix yesterday, everything works now.", False),
+    ("support@bank.com", "Statement ready",
+     "Your monthly account statement is ready to view in net banking.", False),
+    ("ravi@client.in", "Re: meeting notes",
+     "Attaching the notes from today's call. Talk next week.", False),
+]
+
+
+def _holdout():
+    emails = [{'from': sender, 'subject': subject, 'body': body, 'email_id': f"<holdout{i}@test>"}
+              for i, (sender, subject, body, _) in enumerate(HOLDOUT_EMAILS)]
+    labels = [label for _, _, _, label in HOLDOUT_EMAILS]
+    return emails, labels
+
+
+def _agent():
+    storage_file = os.path.join(tempfile.mkdtemp(), "processed_emails.json")
+    return EmailAgent(connector=object(), storage=create_email_storage(storage_file, backend="json"))
+
+
+def _precision_recall(predictions, labels):
+    true_positives = sum(1 for p, l in zip(predictions, labels) if p and l)
+    predicted = sum(1 for p in predictions if p)
+    actual = sum(1 for l in labels if l)
+    precision = true_positives / predicted if predicted else 1.0
+    recall = true_positives / actual if actual else 1.0
+    return precision, recall
+
+
+def test_batch_no_worse_than_keywords():
+    """classify_batch precision and recall are at least those of is_project_email"""
+    print("=" * 80)
+    print("TEST 1: HOLD-OUT PRECISION / RECALL")
+    print("=" * 80)
+    
+    agent = _agent()
+    emails, labels = _holdout()
+    
+    keyword_predictions = [agent.is_project_email(email_data) for email_data in emails]
+    batch_predictions = [result['is_project'] for result in agent.classify_batch(emails)]
+    
+    keyword_precision, keyword_recall = _precision_recall(keyword_predictions, labels)
+    batch_precision, batch_recall = _precision_recall(batch_predictions, labels)
+    
+    print(f"\nis_project_email: precision {keyword_precision:.2f}, recall {keyword_recall:.2f}")
+    print(f"classify_batch:   precision {batch_precision:.2f}, recall {batch_recall:.2f}")
+    
+    assert batch_precision >= keyword_precision, "classify_batch lost precision"
+    assert batch_recall >= keyword_recall, "classify_batch lost recall"
+    
+    print("\n[PASS] Test 1 Passed!\n")
+
+
+def test_model_does_not_drop_keyword_lead():
+    """A keyword-matched lead the model scores low is still accepted"""
+    print("=" * 80)
+    print("TEST 2: LOW MODEL SCORE ON A REAL LEAD")
+    print("=" * 80)
+    
+    agent = _agent()
+    emails, _ = _holdout()
+    result = agent.classify_batch(emails[:1])[0]
+    
+    print(f"\nERP inquiry: {result}")
+    assert result['is_project'], "Keyword-matched ERP inquiry was rejected"
+    
+    print("\n[PASS] Test 2 Passed!\n")
+
+
+def test_model_veto():
+    """Only scores below MODEL_VETO_SCORE overrule the keywords"""
+    print("=" * 80)
+    print("TEST 3: MODEL VETO")
+    print("=" * 80)
+    
+    agent = _agent()
+    emails, _ = _holdout()
+    
+    agent.MODEL_VETO_SCORE = 1.01  # every score is below it
+    results = agent.classify_batch(emails)
+    for email_data, result in zip(emails, results):
+        if agent.is_project_email(email_data) and result['score'] is not None:
+            assert not result['is_project'] and result['method'] == 'model'
+    
+    agent.MODEL_VETO_SCORE = 0.0  # never vetoes
+    results = agent.classify_batch(emails)
+    assert [result['is_project'] for result in results] == [agent.is_project_email(e) for e in emails]
+    
+    print("\n[PASS] Test 3 Passed!\n")
+
+
+if __name__ == "__main__":
+    print("\n")
+    print("=" * 80)
+    print("BATCH EMAIL CLASSIFICATION - TESTS")
+    print("=" * 80)
+    print("\n")
+    
+    try:
+        test_batch_no_worse_than_keywords()
+        test_model_does_not_drop_keyword_lead()
+        test_model_veto()
+        
+        print("=" * 80)
+        print("[SUCCESS] ALL TESTS PASSED!")
+        print("=" * 80)
+    
+    except AssertionError as e:
+        print(f"\n[FAIL] TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n[ERROR] {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,97 @@
+"""
+Standalone Test: Email Body Preprocessing
+Checks that quoted history, signatures and footers are stripped while the
+actual request is kept
+"""
+
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ai_agents.requirement_agent.email_preprocessor import preprocess_body
+
+
+def test_forward_below_note():
+    """A forwarded request with a short note above it keeps the request"""
+    print("=" * 80)
+    print("TEST 1: FORWARDED REQUEST BELOW A NOTE")
+    print("=" * 80)
+    
+    body = ("Hi team, please handle this one.\n\n"
+            "---------- Forwarded message ---------\n"
+            "From: Client <client@acme.in>\n"
+            "Date: Mon, 5 Oct 2026 at 10:00\n"
+            "Subject: ERP\n\n"
+            "We need an ERP for our plant. Budget 4 lakh, deadline in 45 days\n\n"
+            "On Sun, 4 Oct 2026 at 09:00, Us <us@company.in> wrote:\n"
+            "> Thanks for reaching out")
+    text, stats = preprocess_body(body)
+    
+    print(f"\n{text}\n")
+    assert "please handle this one" in text
+    assert "Budget 4 lakh, deadline in 45 days" in text, "Forwarded request was cut"
+    assert "Thanks for reaching out" not in text, "Quoted reply inside the forward was kept"
+    
+    print("[PASS] Test 1 Passed!\n")
+
+
+def test_reply_headers_cut():
+    """Reply, Original Message and Outlook headers cut the quoted history"""
+    print("=" * 80)
+    print("TEST 2: REPLY HEADERS")
+    print("=" * 80)
+    
+    request = "We need a website, budget 50k."
+    for history in ("On Mon, 5 Oct 2026 at 10:00, Ravi Kumar\n<ravi@client.in> wrote:\n> old thread",
+                    "-----Original Message-----\nFrom: Ravi\nSent: Monday\n\nold thread",
+                    "From: Ravi <ravi@client.in>\nSent: Monday, 5 October 2026\nTo: us\n\nold thread"):
+        text, stats = preprocess_body(f"{request}\n\n{history}")
+        assert text == request, f"Expected only the request, got {text!r}"
+        assert 'quoted' in stats['removed']
+    
+    print("[PASS] Test 2 Passed!\n")
+
+
+def test_footers():
+    """Only the trailing run of disclaimer paragraphs is removed"""
+    print("=" * 80)
+    print("TEST 3: DISCLAIMER FOOTERS")
+    print("=" * 80)
+    
+    body = ("We need a newsletter tool with an unsubscribe link. Budget 80k.\n\n"
+            "Regards,\nRavi\n\n"
+            "CONFIDENTIALITY NOTICE: This email is intended only for the named recipient.\n\n"
+            "If you have received this email in error, please delete it.")
+    text, _ = preprocess_body(body)
+    
+    assert text == "We need a newsletter tool with an unsubscribe link. Budget 80k.\n\nRegards,\nRavi", repr(text)
+    
+    print("[PASS] Test 3 Passed!\n")
+
+
+if __name__ == "__main__":
+    print("\n")
+    print("=" * 80)
+    print("EMAIL PREPROCESSING - TESTS")
+    print("=" * 80)
+    print("\n")
+    
+    try:
+        test_forward_below_note()
+        test_reply_headers_cut()
+        test_footers()
+        
+        print("=" * 80)
+        print("[SUCCESS] ALL TESTS PASSED!")
+        print("=" * 80)
+    
+    except AssertionError as e:
+        print(f"\n[FAIL] TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n[ERROR] {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
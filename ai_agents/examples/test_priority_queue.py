@@ -0,0 +1,167 @@
+"""
+Standalone Test: Incremental Priority Queue
+Checks that ProjectPriorityQueue ranks projects exactly like rank_projects
+after upserts, removals and deadlines crossing the 3/7/14/30 day thresholds
+"""
+
+import random
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ai_agents.decision_agent.priority_scorer import rank_projects
+from ai_agents.decision_agent.priority_queue import ProjectPriorityQueue
+
+DAY = 86400
+
+# Deadlines half a day either side of each threshold, so no project sits on
+# a bucket boundary at the (whole and quarter day) times checked below
+DEADLINE_DAYS = [None, -1.5, 2.5, 3.5, 6.5, 7.5, 13.5, 14.5, 29.5, 30.5, 45.5]
+
+
+def _make_projects(count: int, start: float, seed: int = 7):
+    rng = random.Random(seed)
+    projects = []
+    for i in range(count):
+        days = rng.choice(DEADLINE_DAYS)
+        projects.append({
+            "project_id": f"P{i:03d}",
+            "deadline": None if days is None else (datetime.fromtimestamp(start) + timedelta(days=days)).isoformat(),
+            "budget": rng.choice([0, 30000, 60000, 150000]),
+            "advance_paid": rng.random() < 0.5,
+            "client_type": rng.choice(["new", "repeat"]),
+            "team_load": rng.choice([10, 70, 95]),
+            "penalty_exists": rng.random() < 0.05
+        })
+    return projects
+
+
+def _reference(projects, start: float, now: float):
+    """rank_projects as it would rank the projects at `now`"""
+    # rank_projects measures deadlines from the wall clock, so move the
+    # deadlines back by the simulated time instead of moving the clock
+    shift = timedelta(seconds=now - start)
+    shifted = [
+        dict(project, deadline=None if project["deadline"] is None
+             else (datetime.fromisoformat(project["deadline"]) - shift).isoformat())
+        for project in projects
+    ]
+    return [(p["project_id"], p["priority_score"]) for p in rank_projects(shifted)]
+
+
+def _ranking(entries):
+    return [(e["project_id"], e["priority_score"]) for e in entries]
+
+
+def test_upserts_match_rank_projects():
+    """A freshly filled queue ranks like rank_projects"""
+    print("=" * 80)
+    print("TEST 1: UPSERTS")
+    print("=" * 80)
+    
+    start = time.time()
+    projects = _make_projects(200, start)
+    queue = ProjectPriorityQueue()
+    for project in projects:
+        queue.upsert(project, now=start)
+    
+    expected = _reference(projects, start, start)
+    assert _ranking(queue.ranked(now=start)) == expected
+    assert _ranking(queue.top_k(10, now=start)) == expected[:10]
+    
+    print(f"\n{len(queue)} projects, top 3: {expected[:3]}")
+    print("\n[PASS] Test 1 Passed!\n")
+
+
+def test_time_advances_across_thresholds():
+    """Bucket crossings keep the queue in step with rank_projects"""
+    print("=" * 80)
+    print("TEST 2: DEADLINE THRESHOLDS")
+    print("=" * 80)
+    
+    start = time.time()
+    projects = _make_projects(200, start)
+    queue = ProjectPriorityQueue()
+    for project in projects:
+        queue.upsert(project, now=start)
+    
+    for days in [0.25, 1, 3, 4, 7, 8, 14, 15, 16.75, 30, 31, 46]:
+        now = start + days * DAY
+        expected = _reference(projects, start, now)
+        assert _ranking(queue.top_k(15, now=now)) == expected[:15], f"top_k differs after {days} days"
+        assert _ranking(queue.ranked(now=now)) == expected, f"ranking differs after {days} days"
+        print(f"  day {days:>5}: top project {expected[0]}")
+    
+    print(f"\nBucket crossings: {queue.stats['bucket_crossings']}")
+    print("\n[PASS] Test 2 Passed!\n")
+
+
+def test_updates_and_removals():
+    """Changed fields, removals and re-added projects between time steps"""
+    print("=" * 80)
+    print("TEST 3: UPDATES AND REMOVALS")
+    print("=" * 80)
+    
+    start = time.time()
+    projects = _make_projects(100, start)
+    queue = ProjectPriorityQueue()
+    for project in projects:
+        queue.upsert(project, now=start)
+    
+    rng = random.Random(11)
+    for days in [1, 5, 10, 20, 35]:
+        now = start + days * DAY
+        
+        # Change the scoring fields of a few projects (keeps their position for ties)
+        for index in rng.sample(range(len(projects)), 5):
+            projects[index] = dict(projects[index],
+                                   budget=rng.choice([0, 60000, 150000]),
+                                   penalty_exists=rng.random() < 0.2)
+            queue.upsert(projects[index], now=now)
+        
+        # Remove a few, and re-add one at the end (ties then rank it last)
+        for index in sorted(rng.sample(range(len(projects)), 3), reverse=True):
+            removed = projects.pop(index)
+            assert queue.remove(removed["project_id"]) is not None
+        projects.append(removed)
+        queue.upsert(removed, now=now)
+        
+        expected = _reference(projects, start, now)
+        assert _ranking(queue.top_k(10, now=now)) == expected[:10], f"top_k differs after {days} days"
+        assert _ranking(queue.ranked(now=now)) == expected, f"ranking differs after {days} days"
+    
+    assert queue.remove("missing") is None
+    assert len(queue) == len(projects)
+    
+    print(f"\n{len(queue)} projects left, {queue.stats['scored']} scores computed")
+    print("\n[PASS] Test 3 Passed!\n")
+
+
+if __name__ == "__main__":
+    print("\n")
+    print("=" * 80)
+    print("PRIORITY QUEUE - TESTS")
+    print("=" * 80)
+    print("\n")
+    
+    try:
+        test_upserts_match_rank_projects()
+        test_time_advances_across_thresholds()
+        test_updates_and_removals()
+        
+        print("=" * 80)
+        print("[SUCCESS] ALL TESTS PASSED!")
+        print("=" * 80)
+    
+    except AssertionError as e:
+        print(f"\n[FAIL] TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n[ERROR] {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,153 @@
+"""
+Standalone Test: Priority Sensitivity Simulator
+Checks the O(n log² n) Kendall tau against a direct pair count, and the
+Pareto front of a sweep
+"""
+
+import itertools
+import random
+import sys
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ai_agents.decision_agent.priority_simulator import PrioritySimulator, kendall_tau, pareto_front
+
+
+def _kendall_tau_pairs(x, y):
+    """Tau-b by comparing every pair (O(n²)); None when undefined"""
+    concordant = discordant = x_only_ties = y_only_ties = 0
+    for i, j in itertools.combinations(range(len(x)), 2):
+        dx, dy = np.sign(x[i] - x[j]), np.sign(y[i] - y[j])
+        if dx == 0 and dy == 0:
+            continue
+        if dx == 0:
+            x_only_ties += 1
+        elif dy == 0:
+            y_only_ties += 1
+        elif dx == dy:
+            concordant += 1
+        else:
+            discordant += 1
+    denominator = np.sqrt((concordant + discordant + x_only_ties) * (concordant + discordant + y_only_ties))
+    return (concordant - discordant) / denominator if denominator else None
+
+
+def test_kendall_tau_matches_pair_count():
+    """Random scores with many ties give the same tau as the pair count"""
+    print("=" * 80)
+    print("TEST 1: KENDALL TAU VS PAIR COUNT")
+    print("=" * 80)
+    
+    rng = np.random.default_rng(0)
+    checked = 0
+    for _ in range(300):
+        n = int(rng.integers(2, 60))
+        # Few distinct values, so ties in x, in y and in both are common
+        x = rng.integers(0, rng.integers(1, 10), n).astype(float)
+        y = rng.integers(0, rng.integers(1, 10), n).astype(float)
+        expected = _kendall_tau_pairs(x, y)
+        if expected is None:
+            continue
+        assert abs(kendall_tau(x, y) - expected) < 1e-9, f"tau differs for x={x}, y={y}"
+        checked += 1
+    
+    # Continuous scores (no ties)
+    x, y = rng.random(300), rng.random(300)
+    assert abs(kendall_tau(x, y) - _kendall_tau_pairs(x, y)) < 1e-9
+    
+    print(f"\n{checked + 1} score pairs checked")
+    print("\n[PASS] Test 1 Passed!\n")
+
+
+def test_kendall_tau_edge_cases():
+    """Identical, reversed, constant and short inputs"""
+    print("=" * 80)
+    print("TEST 2: KENDALL TAU EDGE CASES")
+    print("=" * 80)
+    
+    scores = np.array([5.0, 1.0, 3.0, 3.0, 9.0])
+    assert kendall_tau(scores, scores) == 1.0
+    assert abs(kendall_tau(scores, -scores) + 1.0) < 1e-12
+    assert kendall_tau(np.ones(4), np.ones(4)) == 1.0
+    assert kendall_tau(np.ones(4), np.arange(4.0)) == 0.0
+    assert kendall_tau(np.array([1.0]), np.array([2.0])) == 1.0
+    
+    print("\n[PASS] Test 2 Passed!\n")
+
+
+def test_pareto_front():
+    """Only non-dominated results are kept, best first on the first metric"""
+    print("=" * 80)
+    print("TEST 3: PARETO FRONT")
+    print("=" * 80)
+    
+    results = [
+        {"name": "a", "kendall_tau": 0.9, "top_k_value": 5e5},
+        {"name": "b", "kendall_tau": 0.7, "top_k_value": 9e5},
+        {"name": "c", "kendall_tau": 0.6, "top_k_value": 8e5},  # dominated by b
+        {"name": "d", "kendall_tau": 0.9, "top_k_value": 4e5},  # dominated by a
+        {"name": "e", "kendall_tau": 0.8, "top_k_value": 7e5},
+    ]
+    front = pareto_front(results, objectives=("kendall_tau", "top_k_value"))
+    
+    assert [result["name"] for result in front] == ["a", "e", "b"], front
+    
+    print("\n[PASS] Test 3 Passed!\n")
+
+
+def test_sweep_baseline():
+    """The current policy ranks identically to itself"""
+    print("=" * 80)
+    print("TEST 4: SWEEP BASELINE")
+    print("=" * 80)
+    
+    rng = random.Random(3)
+    projects = [{
+        "project_id": f"P{i}",
+        "deadline": (datetime.now() + timedelta(days=rng.uniform(0, 60))).isoformat(),
+        "budget": rng.choice([0, 30000, 60000, 150000, 400000]),
+        "advance_paid": rng.random() < 0.5,
+        "client_type": rng.choice(["new", "repeat", "long_term"]),
+        "team_load": rng.choice([10, 70, 95])
+    } for i in range(200)]
+    
+    result = PrioritySimulator(max_workers=1).sweep(projects, samples=20, seed=1)
+    
+    assert result["baseline"]["kendall_tau"] == 1.0
+    assert result["baseline"]["top_k_churn"] == 0
+    assert result["pareto_front"]
+    
+    print(f"\nPareto front: {len(result['pareto_front'])} of 20 configurations")
+    print("\n[PASS] Test 4 Passed!\n")
+
+
+if __name__ == "__main__":
+    print("\n")
+    print("=" * 80)
+    print("PRIORITY SIMULATOR - TESTS")
+    print("=" * 80)
+    print("\n")
+    
+    try:
+        test_kendall_tau_matches_pair_count()
+        test_kendall_tau_edge_cases()
+        test_pareto_front()
+        test_sweep_baseline()
+        
+        print("=" * 80)
+        print("[SUCCESS] ALL TESTS PASSED!")
+        print("=" * 80)
+    
+    except AssertionError as e:
+        print(f"\n[FAIL] TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n[ERROR] {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
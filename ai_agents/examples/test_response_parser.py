@@ -0,0 +1,131 @@
+"""
+Standalone Test: LLM Response Parsing
+Checks JSON repair of common model output defects, extraction from prose
+and streams, and schema validation
+"""
+
+import json
+import sys
+import os
+from typing import Optional, Union
+
+from pydantic import BaseModel
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from ai_agents.response_parser import ResponseParseError, parse_json_response, repair_json
+
+
+class Requirement(BaseModel):
+    project_type: str
+    budget: Union[int, float]
+    note: Optional[str] = None
+
+
+def test_repair_json():
+    """Each common defect is repaired to the expected value"""
+    print("=" * 80)
+    print("TEST 1: JSON REPAIR")
+    print("=" * 80)
+    
+    cases = [
+        # (model output, expected value)
+        ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+        ("{'a': 'it\\'s', 'b': \"say 'hi'\"}", {"a": "it's", "b": "say 'hi'"}),
+        ('{"ok": True, "no": False, "x": None}', {"ok": True, "no": False, "x": None}),
+        ('{project_type: "web", max-budget: 5}', {"project_type": "web", "max-budget": 5}),
+        ('{"a": 1, // the budget\n "b": 2 /* days */}', {"a": 1, "b": 2}),
+        ('{"a": 1, // trailing comment\n}', {"a": 1}),
+        ('{"u": "caf\\u00e9", "t": "tab\\there"}', {"u": "café", "t": "tab\there"}),
+    ]
+    for text, expected in cases:
+        repaired = repair_json(text)
+        assert json.loads(repaired) == expected, f"{text!r} repaired to {repaired!r}"
+    
+    print(f"\n{len(cases)} defects repaired")
+    print("\n[PASS] Test 1 Passed!\n")
+
+
+def test_repair_keeps_strings():
+    """Nothing inside string values is rewritten"""
+    print("=" * 80)
+    print("TEST 2: STRING CONTENTS UNCHANGED")
+    print("=" * 80)
+    
+    value = {
+        "note": "True, False or None, {key: 1,} // not a comment /* nor this */",
+        "url": "https://example.com/a//b",
+        "quote": "He said \"ok\""
+    }
+    text = json.dumps(value)
+    
+    assert json.loads(repair_json(text)) == value
+    assert repair_json(text) == text, "Valid JSON must come back unchanged"
+    
+    print("\n[PASS] Test 2 Passed!\n")
+
+
+def test_parse_json_response():
+    """JSON is found in prose, fences, streams and truncated output"""
+    print("=" * 80)
+    print("TEST 3: EXTRACTION AND VALIDATION")
+    print("=" * 80)
+    
+    fenced = '```json\n{"project_type": "web", "budget": 150000}\n```'
+    assert parse_json_response(fenced, Requirement) == {"project_type": "web", "budget": 150000, "note": None}
+    
+    prose = "Sure! Here is the JSON:\n{'project_type': 'app', 'budget': '9000',}\nHope it helps {not json}"
+    assert parse_json_response(prose, Requirement)["budget"] == 9000
+    
+    truncated = '{"project_type": "web", "budget": 1, "note": "cut off her'
+    assert parse_json_response(truncated, Requirement)["note"] == "cut off her"
+    
+    consumed = []
+    
+    def stream():
+        for part in ['Here ', '{"project_type": "a', 'pp", "budget": 3}', ' more', ' text']:
+            consumed.append(part)
+            yield part
+    
+    assert parse_json_response(stream(), Requirement)["project_type"] == "app"
+    assert len(consumed) == 3, "Stream must stop once the value closes"
+    
+    assert parse_json_response('/* c */ [{"a": 1}, {"a": 2}] trailing', expect=list) == [{"a": 1}, {"a": 2}]
+    
+    for response, kwargs in [('{"project_type": 1}', {"schema": Requirement}),
+                             ('no json here', {}),
+                             ('[1, 2]', {"expect": dict})]:
+        try:
+            parse_json_response(response, **kwargs)
+        except ResponseParseError:
+            continue
+        raise AssertionError(f"{response!r} should not parse")
+    
+    print("\n[PASS] Test 3 Passed!\n")
+
+
+if __name__ == "__main__":
+    print("\n")
+    print("=" * 80)
+    print("RESPONSE PARSER - TESTS")
+    print("=" * 80)
+    print("\n")
+    
+    try:
+        test_repair_json()
+        test_repair_keeps_strings()
+        test_parse_json_response()
+        
+        print("=" * 80)
+        print("[SUCCESS] ALL TESTS PASSED!")
+        print("=" * 80)
+    
+    except AssertionError as e:
+        print(f"\n[FAIL] TEST FAILED: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n[ERROR] {e}\n")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
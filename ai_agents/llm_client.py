@@ -0,0 +1,216 @@
+"""
+LLM Client - Shared Gemini call layer
+Bounds concurrency, rate-limits to the API quota, and retries transient
+failures for every agent in the process
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Type, Union
+
+from .response_parser import parse_json_response
+
+logger = logging.getLogger(__name__)
+
+# google.api_core exception names worth retrying (matched by name so the
+# client does not import google internals)
+RETRYABLE_ERROR_NAMES = {
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable',
+    'InternalServerError', 'DeadlineExceeded', 'GatewayTimeout', 'Aborted'
+}
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter
+    
+    Tokens refill continuously at rate_per_minute; up to burst tokens can
+    accumulate while idle. acquire() blocks until a token is available.
+    """
+    
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        """
+        Initialize token bucket
+        
+        Args:
+            rate_per_minute: Sustained requests per minute
+            burst: Requests allowed back-to-back after an idle period
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        Take one token, waiting for it if necessary
+        
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                
+                delay = (1 - self.tokens) / self.rate
+            
+            time.sleep(delay)
+            waited += delay
+
+
+class LLMClient:
+    """
+    Thread-safe wrapper around GenerativeModel.generate_content
+    
+    Any number of threads may call generate(); at most max_concurrency
+    requests are in flight, requests start no faster than the token
+    bucket allows, each request has a timeout, and rate-limit/server
+    errors are retried with full-jitter exponential backoff.
+    """
+    
+    def __init__(self,
+                 max_concurrency: int = None,
+                 requests_per_minute: float = None,
+                 timeout_seconds: float = None,
+                 max_retries: int = None,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 30.0):
+        """
+        Initialize LLM client
+        
+        Args:
+            max_concurrency: Requests in flight at once
+                (default: LLM_MAX_CONCURRENCY env var, else 4)
+            requests_per_minute: Request rate limit
+                (default: GEMINI_REQUESTS_PER_MINUTE env var, else 15)
+            timeout_seconds: Per-request timeout
+                (default: LLM_TIMEOUT_SECONDS env var, else 60)
+            max_retries: Retries after the first attempt
+                (default: LLM_MAX_RETRIES env var, else 3)
+            backoff_base: First retry delay cap (seconds)
+            backoff_max: Largest retry delay cap (seconds)
+        """
+        self.max_concurrency = int(max_concurrency or os.getenv("LLM_MAX_CONCURRENCY", 4))
+        self.requests_per_minute = float(requests_per_minute or os.getenv("GEMINI_REQUESTS_PER_MINUTE", 15))
+        self.timeout_seconds = float(timeout_seconds or os.getenv("LLM_TIMEOUT_SECONDS", 60))
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("LLM_MAX_RETRIES", 3))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._bucket = TokenBucket(self.requests_per_minute, burst=self.max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'throttled_seconds': 0.0}
+    
+    def generate(self, model, prompt: str, handler: Callable[[Any], Any] = None, **kwargs) -> Any:
+        """
+        Call model.generate_content with limits, timeout and retries
+        
+        Args:
+            model: google.generativeai GenerativeModel
+            prompt: Prompt text
+            handler: Consumes the response inside the concurrency slot and
+                retry loop (needed for streamed responses); its result is
+                returned instead of the response
+            **kwargs: Extra generate_content arguments
+        
+        Returns:
+            The generate_content response, or handler's result
+        
+        Raises:
+            The last error if all attempts fail, or a non-retryable error
+        """
+        request_options = {'timeout': self.timeout_seconds, **kwargs.pop('request_options', {})}
+        
+        for attempt in range(self.max_retries + 1):
+            with self._slots:
+                waited = self._bucket.acquire()
+                self._count('throttled_seconds', waited)
+                self._count('requests')
+                try:
+                    response = model.generate_content(prompt, request_options=request_options, **kwargs)
+                    return handler(response) if handler else response
+                except Exception as e:
+                    if attempt >= self.max_retries or not self._is_retryable(e):
+                        self._count('failures')
+                        raise
+                    error = e
+            
+            # Back off outside the slot so other requests can proceed
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            self._count('retries')
+            logger.warning(f"LLM call failed ({type(error).__name__}: {error}), "
+                           f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+    
+    def generate_json(self, model, prompt: str, schema=None, expect: Type = None) -> Union[Dict, List]:
+        """
+        Stream a response and parse the first JSON value in it
+        
+        Reading stops as soon as the value closes. Malformed JSON is
+        repaired where possible and not retried.
+        
+        Args:
+            model: google.generativeai GenerativeModel
+            prompt: Prompt text
+            schema: Pydantic model to validate against (optional)
+            expect: Required top-level type, dict or list (optional)
+        
+        Returns:
+            Parsed dictionary or list
+        
+        Raises:
+            ResponseParseError: If the response holds no valid JSON
+        """
+        return self.generate(
+            model, prompt, stream=True,
+            handler=lambda response: parse_json_response(response, schema=schema, expect=expect)
+        )
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """True for timeouts, connection errors and rate-limit/server errors"""
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+    
+    def _count(self, key: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+    
+    def get_stats(self) -> Dict:
+        """
+        Get client statistics
+        
+        Returns:
+            Dictionary with stats
+        """
+        with self._stats_lock:
+            return {
+                **self.stats,
+                'max_concurrency': self.max_concurrency,
+                'requests_per_minute': self.requests_per_minute
+            }
+
+
+@lru_cache(maxsize=1)
+def get_llm_client() -> LLMClient:
+    """
+    Get the process-wide LLM client, so all agents share one quota
+    
+    Returns:
+        LLMClient configured from the environment
+    """
+    return LLMClient()
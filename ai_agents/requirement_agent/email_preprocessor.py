@@ -0,0 +1,199 @@
+"""
+Email Preprocessor - Prompt-size reduction for email bodies
+Strips quoted history, signatures, disclaimers and HTML leftovers, then
+enforces a token budget before the body is sent to the LLM
+"""
+
+import os
+import re
+import html
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a Gemini token for English text
+CHARS_PER_TOKEN = 4
+
+# Default token budget for one email body
+MAX_BODY_TOKENS = int(os.getenv("REQUIREMENT_MAX_BODY_TOKENS", 2000))
+
+# Share of a truncated body kept from the start (the rest comes from the end)
+HEAD_SHARE = 0.7
+
+# Everything from these lines on is earlier correspondence
+QUOTE_HEADER_PATTERNS = [
+    # Gmail/Apple: "On Mon, 5 Oct 2026 at 10:00, Ravi <ravi@x.in> wrote:" (may wrap onto a second line)
+    re.compile(r'^[ \t]*On\b[^\n]{0,200}?(?:\n[^\n]{0,200}?)?\bwrote:[ \t]*$', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'^\s*-{2,}\s*Original Message\s*-{2,}\s*$', re.IGNORECASE | re.MULTILINE),
+    # Outlook: "From: ..." followed by "Sent:"/"Date:" within a few lines
+    re.compile(r'^\s*_{5,}\s*$\n\s*From:|^\s*From:.*\n(?:.*\n){0,2}?\s*(?:Sent|Date):', re.IGNORECASE | re.MULTILINE),
+]
+# A forwarded message is usually the request itself (maybe below a short note), so it is kept
+FORWARD_HEADER_PATTERN = re.compile(r'^\s*-{2,}\s*Forwarded message\s*-{2,}\s*$', re.IGNORECASE | re.MULTILINE)
+QUOTED_LINE_PATTERN = re.compile(r'^\s*>.*$\n?', re.MULTILINE)
+
+# "-- " signature delimiter and mobile footers
+SIGNATURE_DELIMITER_PATTERN = re.compile(r'^-- ?$', re.MULTILINE)
+MOBILE_FOOTER_PATTERN = re.compile(
+    r'^\s*(?:Sent from my \w+.*|Get Outlook for \w+.*|Sent via .{0,40})$\n?', re.IGNORECASE | re.MULTILINE
+)
+
+# Paragraphs with any of these are legal/confidentiality footers
+DISCLAIMER_PATTERN = re.compile(
+    r'\b(?:confidentiality notice|intended (?:solely )?for the (?:use of the )?(?:addressee|'
+    r'named recipient|intended recipient)|intended recipient|privileged and confidential|'
+    r'if you have received this (?:e-?mail|message|communication) in error|'
+    r'please consider the environment before printing)\b',
+    re.IGNORECASE
+)
+
+HTML_TAG_PATTERN = re.compile(r'<(?:script|style)\b.*?</(?:script|style)>|<[^>\n]{1,500}>', re.IGNORECASE | re.DOTALL)
+HTML_HINT_PATTERN = re.compile(r'<(?:html|body|div|p|br|span|table|td|a)\b|&(?:nbsp|amp|lt|gt|#\d+);', re.IGNORECASE)
+BLANK_LINES_PATTERN = re.compile(r'\n[ \t]*\n(?:[ \t]*\n)+')
+TRAILING_SPACE_PATTERN = re.compile(r'[ \t]+$', re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count of text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def preprocess_body(body: str, max_tokens: int = None) -> Tuple[str, Dict]:
+    """
+    Shrink an email body to the part worth sending to the LLM
+    
+    Args:
+        body: Email body text
+        max_tokens: Token budget for the result (default: MAX_BODY_TOKENS)
+    
+    Returns:
+        (text, stats): cleaned text, and a dictionary with
+        'original_tokens', 'tokens', 'tokens_saved' and 'removed'
+        (names of the stages that removed something)
+    """
+    max_tokens = max_tokens or MAX_BODY_TOKENS
+    original_tokens = estimate_tokens(body or '')
+    text = (body or '').replace('\r\n', '\n')
+    removed: List[str] = []
+    
+    for stage, function in (('html', _strip_html),
+                            ('quoted', _strip_quoted),
+                            ('signature', _strip_signature),
+                            ('disclaimer', _strip_disclaimers)):
+        try:
+            stripped = function(text)
+        except Exception as e:
+            logger.error(f"Error in email preprocessing stage '{stage}': {e}")
+            continue
+        # Never strip an email down to nothing
+        if stripped.strip() and len(stripped) < len(text):
+            removed.append(stage)
+            text = stripped
+    
+    text = BLANK_LINES_PATTERN.sub('\n\n', TRAILING_SPACE_PATTERN.sub('', text)).strip()
+    
+    if estimate_tokens(text) > max_tokens:
+        text = truncate_head_tail(text, max_tokens * CHARS_PER_TOKEN)
+        removed.append('truncated')
+    
+    tokens = estimate_tokens(text)
+    return text, {
+        'original_tokens': original_tokens,
+        'tokens': tokens,
+        'tokens_saved': max(0, original_tokens - tokens),
+        'removed': removed
+    }
+
+
+def truncate_head_tail(text: str, max_chars: int) -> str:
+    """
+    Keep the start and end of a long text, cutting at line breaks
+    
+    Requests are usually stated up front and budgets/deadlines often
+    repeated near the sign-off, so the middle is dropped.
+    
+    Args:
+        text: Text to shorten
+        max_chars: Maximum length of the result (excluding the marker)
+    
+    Returns:
+        Shortened text with an omission marker
+    """
+    if len(text) <= max_chars:
+        return text
+    
+    head_chars = int(max_chars * HEAD_SHARE)
+    tail_chars = max_chars - head_chars
+    
+    head = text[:head_chars]
+    cut = head.rfind('\n')
+    if cut > head_chars // 2:
+        head = head[:cut]
+    
+    tail = text[-tail_chars:] if tail_chars else ''
+    cut = tail.find('\n')
+    if 0 <= cut < tail_chars // 2:
+        tail = tail[cut + 1:]
+    
+    omitted = len(text) - len(head) - len(tail)
+    return f"{head.rstrip()}\n\n[... {omitted} characters omitted ...]\n\n{tail.lstrip()}"
+
+
+def _strip_html(text: str) -> str:
+    """Remove tags and decode entities left over from HTML bodies"""
+    if not HTML_HINT_PATTERN.search(text):
+        return text
+    text = re.sub(r'<br\s*/?>|</p>|</div>|</tr>', '\n', text, flags=re.IGNORECASE)
+    return html.unescape(HTML_TAG_PATTERN.sub('', text)).replace('\xa0', ' ')
+
+
+def _strip_quoted(text: str) -> str:
+    """Cut earlier correspondence: everything after a reply header, and '>' lines"""
+    start = 0
+    
+    # Keep the first forwarded message unless it is itself inside a quoted reply;
+    # its From/Date header block is skipped by the loop below
+    forward = FORWARD_HEADER_PATTERN.search(text)
+    if forward:
+        reply = _first_quote_header(text, 0)
+        if not reply or forward.start() < reply.start():
+            start = forward.end()
+    
+    # A header block at the very top (or right after the forward line) is a
+    # forward of the actual request; keep it
+    while True:
+        match = _first_quote_header(text, start)
+        if not match or text[start:match.start()].strip():
+            break
+        block_end = text.find('\n\n', match.end())
+        start = block_end if block_end != -1 else len(text)
+    
+    match = _first_quote_header(text, start)
+    cut = match.start() if match else len(text)
+    return QUOTED_LINE_PATTERN.sub('', text[:cut])
+
+
+def _first_quote_header(text: str, start: int):
+    """Earliest reply header at or after start"""
+    matches = [match for match in (pattern.search(text, start) for pattern in QUOTE_HEADER_PATTERNS) if match]
+    return min(matches, key=lambda match: match.start()) if matches else None
+
+
+def _strip_signature(text: str) -> str:
+    """Drop everything after a '-- ' delimiter, and mobile footers"""
+    match = SIGNATURE_DELIMITER_PATTERN.search(text)
+    if match:
+        text = text[:match.start()]
+    return MOBILE_FOOTER_PATTERN.sub('', text)
+
+
+def _strip_disclaimers(text: str) -> str:
+    """Drop the trailing run of legal/confidentiality paragraphs"""
+    paragraphs = re.split(r'\n\s*\n', text)
+    end = len(paragraphs)
+    # Only footers: stop at the first paragraph from the end that isn't one,
+    # and never drop the first paragraph (the message itself)
+    while end > 1 and (not paragraphs[end - 1].strip() or DISCLAIMER_PATTERN.search(paragraphs[end - 1])):
+        end -= 1
+    return '\n\n'.join(paragraphs[:end]) if end < len(paragraphs) else text
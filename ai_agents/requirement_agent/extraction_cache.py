@@ -0,0 +1,249 @@
+"""
+Extraction Cache - Persistent cache of LLM requirement extractions
+Re-sent, duplicate and reprocessed emails skip the Gemini call
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import parseaddr
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Reply/forward prefixes stripped from subjects before hashing
+SUBJECT_PREFIXES = ('re:', 'fw:', 'fwd:', 'aw:', 'wg:')
+
+
+class ExtractionCache:
+    """
+    SQLite-backed cache of extraction results with TTL and LRU eviction
+    
+    A small in-memory LRU sits in front of the database, so repeated
+    lookups in one process don't read SQLite; their last_used updates are
+    written back in batches so LRU eviction still sees them. The database uses
+    WAL mode, so the API process and the background loop can share it.
+    """
+    
+    # Entries kept in the in-process LRU
+    MEMORY_ENTRIES = 256
+    
+    # Memory hits update last_used in SQLite in batches, at most this often
+    # (and always before this process evicts)
+    TOUCH_FLUSH_SECONDS = 60
+    
+    def __init__(self,
+                 cache_file: str = None,
+                 ttl_days: float = None,
+                 max_entries: int = None):
+        """
+        Initialize extraction cache
+        
+        Args:
+            cache_file: Path to SQLite database
+                (default: REQUIREMENT_CACHE_FILE env var, else
+                requirement_cache.db in the project root)
+            ttl_days: Entry lifetime (default: REQUIREMENT_CACHE_TTL_DAYS, else 30)
+            max_entries: Entries kept before least recently used ones are
+                evicted (default: REQUIREMENT_CACHE_MAX_ENTRIES, else 5000)
+        """
+        self.cache_file = cache_file or os.getenv(
+            "REQUIREMENT_CACHE_FILE", os.path.join(PROJECT_ROOT, "requirement_cache.db")
+        )
+        self.ttl_seconds = float(ttl_days or os.getenv("REQUIREMENT_CACHE_TTL_DAYS", 30)) * 86400
+        self.max_entries = int(max_entries or os.getenv("REQUIREMENT_CACHE_MAX_ENTRIES", 5000))
+        
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending_touches: Dict[str, float] = {}  # cache_key -> last_used not yet written
+        self._last_flush = time.time()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        
+        self.db = sqlite3.connect(self.cache_file, timeout=30, check_same_thread=False)
+        with self._lock, self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                "  cache_key TEXT PRIMARY KEY,"
+                "  result TEXT NOT NULL,"
+                "  created_at REAL NOT NULL,"
+                "  last_used REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_extractions_last_used ON extractions(last_used)")
+    
+    @staticmethod
+    def make_key(email_data: Dict, reference_date: str, prompt_version: str, model_name: str) -> str:
+        """
+        Build the cache key of an extraction
+        
+        Subject, body and sender are normalised (case, whitespace,
+        Re:/Fwd: prefixes, display name) so trivially different copies of
+        the same email share an entry.
+        
+        Args:
+            email_data: Email dictionary with 'from', 'subject', 'body'
+            reference_date: Date relative deadlines are resolved against
+                (YYYY-MM-DD); part of the key so a re-sent "in 20 days"
+                is not answered with the old deadline
+            prompt_version: Version of the extraction prompt
+            model_name: LLM model name
+        
+        Returns:
+            Hex SHA-256 digest
+        """
+        subject = ' '.join(str(email_data.get('subject') or '').lower().split())
+        while subject.startswith(SUBJECT_PREFIXES):
+            subject = subject.split(':', 1)[1].strip()
+        
+        body = ' '.join(str(email_data.get('body') or '').lower().split())
+        sender = parseaddr(str(email_data.get('from') or ''))[1].lower()
+        
+        payload = '\x1f'.join((subject, body, sender, reference_date, prompt_version, model_name))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """
+        Look up a cached extraction
+        
+        Args:
+            cache_key: Key from make_key()
+        
+        Returns:
+            Copy of the cached result, or None if missing or expired
+        """
+        now = time.time()
+        
+        with self._lock:
+            entry = self._memory.get(cache_key)
+            if entry and now - entry[1] < self.ttl_seconds:
+                self._memory.move_to_end(cache_key)
+                self._pending_touches[cache_key] = now
+                if now - self._last_flush >= self.TOUCH_FLUSH_SECONDS:
+                    self._flush_touches(now)
+                self.stats['hits'] += 1
+                return json.loads(entry[0])
+            
+            try:
+                row = self.db.execute(
+                    "SELECT result, created_at FROM extractions WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                
+                if row and now - row[1] < self.ttl_seconds:
+                    with self.db:
+                        self.db.execute(
+                            "UPDATE extractions SET last_used = ? WHERE cache_key = ?", (now, cache_key)
+                        )
+                    self._pending_touches.pop(cache_key, None)
+                    self._remember(cache_key, row[0], row[1])
+                    self.stats['hits'] += 1
+                    return json.loads(row[0])
+                
+                if row:
+                    with self.db:
+                        self.db.execute("DELETE FROM extractions WHERE cache_key = ?", (cache_key,))
+            except Exception as e:
+                logger.error(f"Error reading extraction cache: {e}")
+            
+            self._memory.pop(cache_key, None)
+            self.stats['misses'] += 1
+            return None
+    
+    def put(self, cache_key: str, result: Dict):
+        """
+        Store an extraction, evicting expired and least recently used entries
+        
+        Args:
+            cache_key: Key from make_key()
+            result: JSON-serialisable extraction result
+        """
+        now = time.time()
+        
+        with self._lock:
+            try:
+                serialized = json.dumps(result)
+                self._pending_touches.pop(cache_key, None)
+                self._flush_touches(now)
+                with self.db:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO extractions (cache_key, result, created_at, last_used) "
+                        "VALUES (?, ?, ?, ?)",
+                        (cache_key, serialized, now, now)
+                    )
+                    self._evict(now)
+                self._remember(cache_key, serialized, now)
+            except Exception as e:
+                logger.error(f"Error writing extraction cache: {e}")
+    
+    def _flush_touches(self, now: float):
+        """Write last_used of memory hits to SQLite"""
+        self._last_flush = now
+        if not self._pending_touches:
+            return
+        
+        touches = [(last_used, cache_key) for cache_key, last_used in self._pending_touches.items()]
+        self._pending_touches.clear()
+        try:
+            with self.db:
+                self.db.executemany(
+                    "UPDATE extractions SET last_used = MAX(last_used, ?) WHERE cache_key = ?", touches
+                )
+        except Exception as e:
+            logger.error(f"Error updating extraction cache usage: {e}")
+    
+    def _evict(self, now: float):
+        """Drop expired entries and trim to max_entries (inside a transaction)"""
+        removed = self.db.execute(
+            "DELETE FROM extractions WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        
+        count = self.db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+        if count > self.max_entries:
+            removed += self.db.execute(
+                "DELETE FROM extractions WHERE cache_key IN ("
+                "  SELECT cache_key FROM extractions ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            ).rowcount
+        
+        if removed:
+            self.stats['evictions'] += removed
+            self._memory.clear()
+    
+    def _remember(self, cache_key: str, serialized: str, created_at: float):
+        """Add to the in-memory LRU"""
+        self._memory[cache_key] = (serialized, created_at)
+        self._memory.move_to_end(cache_key)
+        while len(self._memory) > self.MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM extractions")
+            self._memory.clear()
+            self._pending_touches.clear()
+    
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dictionary with stats
+        """
+        with self._lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+            return {**self.stats, 'entries': entries, 'max_entries': self.max_entries}
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._flush_touches(time.time())
+            self.db.close()
@@ -5,21 +5,25 @@ Extracts structured project requirements from email text using AI
 
 import os
 import json
+import hashlib
 import logging
-from typing import Dict
+from typing import Dict, List, Optional, Union
 from datetime import datetime, timedelta
-import re
+from email.utils import parsedate_to_datetime
 import google.generativeai as genai
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from .extraction_cache import ExtractionCache
+from .rule_extractor import RuleExtractor, REQUIRED_FIELDS
+from .email_preprocessor import preprocess_body
+from ..llm_client import LLMClient, get_llm_client
+from ..response_parser import ResponseParseError, validate
 
 logger = logging.getLogger(__name__)
 
 
-# Requirement extraction prompt
-REQUIREMENT_AGENT_PROMPT = """You are an AI requirement analyst for a service startup.
-
-Your task is to read client project request emails and extract structured information.
-
-Extract the following details:
+# Fields and rules shared by the single-email and batch prompts
+REQUIREMENT_EXTRACTION_RULES = """Extract the following details:
 1. **project_type**: Type of project (e.g., "Web Application", "Mobile App", "Website", "Software Development", "Design")
 2. **deadline**: Project deadline (extract date, if relative like "in 20 days" calculate from today)
 3. **budget**: Project budget in rupees (extract number, handle formats like "1.5L", "Rs.50000", "50k")
@@ -38,7 +42,14 @@ Extract the following details:
 - If advance is mentioned (e.g., "paid 50k advance", "advance of Rs.30000"), set advance_paid=true
 - Be conservative with complexity - only mark as "high" if clearly complex
 - Estimate effort based on project type and scope
+"""
+
+# Requirement extraction prompt
+REQUIREMENT_AGENT_PROMPT = """You are an AI requirement analyst for a service startup.
+
+Your task is to read client project request emails and extract structured information.
 
+""" + REQUIREMENT_EXTRACTION_RULES + """
 **Today's Date:** {today_date}
 
 **Email Content:**
@@ -65,6 +76,87 @@ Subject: {subject}
 Respond with valid JSON only. No explanations.
 """
 
+# Batch extraction prompt: several emails in, one JSON array out
+REQUIREMENT_BATCH_PROMPT = """You are an AI requirement analyst for a service startup.
+
+Your task is to read {count} client project request emails and extract structured information from each one separately.
+
+""" + REQUIREMENT_EXTRACTION_RULES + """- Each email has its own date: treat it as "today" for that email's relative deadlines
+- Never mix details between emails
+
+**Emails:**
+{emails}
+
+**Output Format (JSON array only, one object per email, in the same order):**
+[
+  {{
+    "email_id": "string (copied exactly from the email)",
+    "project_type": "string",
+    "deadline": "YYYY-MM-DDTHH:MM:SS",
+    "budget": number,
+    "advance_paid": boolean,
+    "advance_amount": number or null,
+    "full_payment_done": boolean,
+    "client_name": "string or null",
+    "client_email": "string",
+    "scope": "string",
+    "complexity": "low|medium|high",
+    "estimated_effort_days": number
+  }}
+]
+
+Respond with valid JSON only. No explanations.
+"""
+
+# One email inside REQUIREMENT_BATCH_PROMPT
+REQUIREMENT_BATCH_EMAIL = """--- Email ID: {email_id} ---
+Date: {today_date}
+From: {from_email}
+Subject: {subject}
+
+{body}
+"""
+
+
+class RequirementExtraction(BaseModel):
+    """Schema of one LLM extraction result (fields beyond these are kept)"""
+    model_config = ConfigDict(extra='allow')
+    
+    project_type: str
+    deadline: str
+    budget: Union[int, float]
+    advance_paid: bool = False
+    advance_amount: Optional[Union[int, float]] = None
+    full_payment_done: bool = False
+    client_name: Optional[str] = None
+    client_email: Optional[str] = None
+    scope: Optional[str] = None
+    complexity: Optional[str] = None
+    estimated_effort_days: Optional[Union[int, float]] = None
+    
+    @field_validator('deadline')
+    @classmethod
+    def _deadline_is_iso(cls, value: str) -> str:
+        datetime.fromisoformat(value)
+        return value
+
+
+# Changes whenever any prompt text changes, invalidating cached extractions
+# (single and batched results share cache entries, so all prompts count)
+REQUIREMENT_PROMPT_VERSION = hashlib.sha256(
+    '\0'.join((REQUIREMENT_AGENT_PROMPT, REQUIREMENT_BATCH_PROMPT, REQUIREMENT_BATCH_EMAIL)).encode('utf-8')
+).hexdigest()[:12]
+
+# Emails per batched extraction call
+REQUIREMENT_BATCH_SIZE = int(os.getenv("REQUIREMENT_BATCH_SIZE", 8))
+
+# Rule-based results are used without an LLM call when every required
+# field is at least this confident (set above 1 to always use the LLM)
+RULES_MIN_CONFIDENCE = float(os.getenv("REQUIREMENT_RULES_MIN_CONFIDENCE", 0.8))
+
+# Per-call metadata, not stored in the extraction cache
+EXTRACTION_METADATA_KEYS = ('extracted_at', 'email_id', 'raw_email', 'extraction_method')
+
 
 class RequirementAgent:
     """
@@ -73,18 +165,25 @@ class RequirementAgent:
     Uses AI to extract structured project requirements from email text
     """
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, cache: ExtractionCache = None, llm_client: LLMClient = None):
         """
         Initialize Requirement Agent
         
         Args:
             api_key: Gemini API key
+            cache: Extraction cache (default: a new ExtractionCache)
+            llm_client: LLM call layer (default: the shared client)
         """
         genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+        self.model_name = "models/gemini-2.5-flash-lite-preview-09-2025"
         self.model = genai.GenerativeModel(
-            model_name="models/gemini-2.5-flash-lite-preview-09-2025",
+            model_name=self.model_name,
             generation_config={"temperature": 0.1}
         )
+        self.cache = cache or ExtractionCache()
+        self.llm = llm_client or get_llm_client()
+        self.rule_extractor = RuleExtractor()
+        self.preprocess_stats = {'emails': 0, 'original_tokens': 0, 'tokens': 0, 'tokens_saved': 0}
         self.name = "RequirementAgent"
     
     def extract_requirements(self, email_data: Dict) -> Dict:
@@ -99,10 +198,36 @@ class RequirementAgent:
         """
         logger.info(f"Extracting requirements from email: {email_data.get('subject')}")
         
+        return self._extract_single(self._prepare_email(email_data))
+    
+    def _extract_single(self, email_data: Dict) -> Dict:
+        """
+        Extract requirements from a preprocessed email (rules, cache, then LLM)
+        
+        Args:
+            email_data: Email dictionary from _prepare_email()
+            
+        Returns:
+            Dictionary with extracted requirements
+        """
+        # Relative deadlines ("in 20 days") count from when the email was sent
+        reference = self._reference_date(email_data)
+        
+        # Formulaic emails don't need the LLM
+        requirements = self._rule_extraction(email_data, reference)
+        if requirements is not None:
+            return requirements
+        
+        today = reference.strftime("%Y-%m-%d")
+        cache_key = self.cache.make_key(email_data, today, REQUIREMENT_PROMPT_VERSION, self.model_name)
+        
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Using cached requirements: {cached.get('project_type')}")
+            return self._add_metadata(cached, email_data, "cache")
+        
         try:
             # Prepare prompt
-            today = datetime.now().strftime("%Y-%m-%d")
-            
             prompt = REQUIREMENT_AGENT_PROMPT.format(
                 today_date=today,
                 from_email=email_data.get('from', ''),
@@ -111,34 +236,14 @@ class RequirementAgent:
             )
             
             # Call Gemini API
-            response = self.model.generate_content(prompt)
-            
-            # Parse JSON response
-            response_text = response.text.strip()
+            requirements = self.llm.generate_json(self.model, prompt, RequirementExtraction, expect=dict)
             
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            
-            response_text = response_text.strip()
-            
-            requirements = json.loads(response_text)
-            
-            # Add metadata
-            requirements['extracted_at'] = datetime.now().isoformat()
-            requirements['email_id'] = email_data.get('email_id')
-            requirements['raw_email'] = {
-                'from': email_data.get('from'),
-                'subject': email_data.get('subject'),
-                'date': email_data.get('date')
-            }
+            self.cache.put(cache_key, {
+                key: value for key, value in requirements.items() if key not in EXTRACTION_METADATA_KEYS
+            })
             
             logger.info(f"Successfully extracted requirements: {requirements['project_type']}")
-            return requirements
+            return self._add_metadata(requirements, email_data, "ai")
             
         except Exception as e:
             logger.error(f"Error extracting requirements: {e}")
@@ -146,112 +251,265 @@ class RequirementAgent:
             # Fallback to rule-based extraction
             return self._fallback_extraction(email_data)
     
-    def _fallback_extraction(self, email_data: Dict) -> Dict:
+    def extract_requirements_batch(self, emails: List[Dict], batch_size: int = None) -> List[Dict]:
         """
-        Fallback rule-based extraction if AI fails
+        Extract requirements from several emails with one LLM call per batch
+        
+        Cached emails are answered without a call. The rest are packed
+        into prompts of up to batch_size emails that return a JSON array;
+        results are matched back by email_id. Any email whose result is
+        missing or invalid (or whose whole batch failed) goes through
+        extract_requirements() on its own.
         
         Args:
-            email_data: Email dictionary
+            emails: Email dictionaries with 'email_id', 'from', 'subject', 'body'
+            batch_size: Emails per call (default: REQUIREMENT_BATCH_SIZE)
             
         Returns:
-            Basic requirements dictionary
+            Requirements dictionaries, in the same order as emails
         """
-        logger.warning("Using fallback rule-based extraction")
+        batch_size = max(1, batch_size or REQUIREMENT_BATCH_SIZE)
+        results: List[Optional[Dict]] = [None] * len(emails)
+        pending = []
+        
+        resolved_by_rules = 0
+        
+        for index, email_data in enumerate(emails):
+            email_data = self._prepare_email(email_data)
+            reference = self._reference_date(email_data)
+            results[index] = self._rule_extraction(email_data, reference)
+            if results[index] is not None:
+                resolved_by_rules += 1
+                continue
+            
+            today = reference.strftime("%Y-%m-%d")
+            cache_key = self.cache.make_key(email_data, today, REQUIREMENT_PROMPT_VERSION, self.model_name)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                results[index] = self._add_metadata(cached, email_data, "cache")
+            else:
+                pending.append((index, email_data, today, cache_key))
+        
+        logger.info(f"Extracting requirements from {len(emails)} emails ({resolved_by_rules} by rules, "
+                    f"{len(emails) - len(pending) - resolved_by_rules} cached, {len(pending)} to extract)")
+        
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            
+            # A lone email gains nothing from the batch prompt
+            extracted = self._extract_batch(batch) if len(batch) > 1 else {}
+            
+            for index, email_data, _, cache_key in batch:
+                requirements = extracted.get(self._batch_email_id(index, email_data))
+                if requirements is None:
+                    if len(batch) > 1:
+                        logger.warning(f"No valid batch result for '{email_data.get('subject')}', "
+                                       f"extracting individually")
+                    results[index] = self._extract_single(email_data)
+                    continue
+                
+                self.cache.put(cache_key, requirements)
+                results[index] = self._add_metadata(dict(requirements), email_data, "ai_batch")
+        
+        return results
+    
+    def _extract_batch(self, batch: List[tuple]) -> Dict[str, Dict]:
+        """
+        Run one batched extraction call
+        
+        Args:
+            batch: (index, email_data, today, cache_key) tuples
+            
+        Returns:
+            Batch email ID -> validated requirements (without metadata);
+            empty if the call or parsing failed
+        """
+        expected = {self._batch_email_id(index, email_data) for index, email_data, _, _ in batch}
+        
+        try:
+            prompt = REQUIREMENT_BATCH_PROMPT.format(
+                count=len(batch),
+                emails="\n".join(
+                    REQUIREMENT_BATCH_EMAIL.format(
+                        email_id=self._batch_email_id(index, email_data),
+                        today_date=today,
+                        from_email=email_data.get('from', ''),
+                        subject=email_data.get('subject', ''),
+                        body=email_data.get('body', '')
+                    )
+                    for index, email_data, today, _ in batch
+                )
+            )
+            
+            items = self.llm.generate_json(self.model, prompt, expect=list)
+            
+        except Exception as e:
+            logger.error(f"Error in batch extraction of {len(batch)} emails: {e}")
+            return {}
         
-        body = email_data.get('body', '')
-        subject = email_data.get('subject', '')
+        extracted = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            email_id = str(item.pop('email_id', ''))
+            if email_id not in expected or email_id in extracted:
+                continue
+            try:
+                item = validate(item, RequirementExtraction)
+            except ResponseParseError as e:
+                logger.debug(f"Discarding batch result for {email_id}: {e}")
+                continue
+            extracted[email_id] = {
+                key: value for key, value in item.items() if key not in EXTRACTION_METADATA_KEYS
+            }
         
-        # Extract budget using regex
-        budget = self._extract_budget(body + " " + subject)
+        logger.info(f"Batch extraction returned {len(extracted)}/{len(batch)} valid results")
+        return extracted
+    
+    @staticmethod
+    def _batch_email_id(index: int, email_data: Dict) -> str:
+        """ID an email is labelled with in a batch prompt"""
+        return str(email_data.get('email_id') or f"email-{index + 1}")
+    
+    def _prepare_email(self, email_data: Dict) -> Dict:
+        """
+        Strip quoted replies, signatures, disclaimers and HTML from the body
+        and fit it into the token budget
+        
+        Rules, cache keys and prompts all use the cleaned body, so old
+        quoted budgets can't leak into the extraction.
+        
+        Args:
+            email_data: Email dictionary
+            
+        Returns:
+            Copy of email_data with the cleaned body
+        """
+        body, stats = preprocess_body(email_data.get('body', ''))
         
-        # Extract deadline
-        deadline = self._extract_deadline(body + " " + subject)
+        for key in ('original_tokens', 'tokens', 'tokens_saved'):
+            self.preprocess_stats[key] += stats[key]
+        self.preprocess_stats['emails'] += 1
         
-        # Detect advance payment
-        advance_paid = any(word in body.lower() for word in ['advance', 'paid', 'payment done'])
+        if stats['tokens_saved']:
+            logger.info(f"Email body reduced from ~{stats['original_tokens']} to ~{stats['tokens']} tokens "
+                        f"(saved ~{stats['tokens_saved']}: {', '.join(stats['removed'])})")
         
-        # Determine project type
-        project_type = self._detect_project_type(body + " " + subject)
+        return {**email_data, 'body': body}
+    
+    def get_stats(self) -> Dict:
+        """
+        Get agent statistics
         
+        Returns:
+            Dictionary with preprocessing and cache stats
+        """
         return {
-            "project_type": project_type,
-            "deadline": deadline,
-            "budget": budget,
-            "advance_paid": advance_paid,
-            "advance_amount": None,
-            "full_payment_done": False,
-            "client_name": None,
-            "client_email": email_data.get('from', ''),
-            "scope": subject,
-            "complexity": "medium",
-            "estimated_effort_days": 15,
-            "extracted_at": datetime.now().isoformat(),
-            "email_id": email_data.get('email_id'),
-            "extraction_method": "fallback"
+            'agent_name': self.name,
+            'preprocessing': dict(self.preprocess_stats),
+            'cache': self.cache.get_stats()
         }
     
-    def _extract_budget(self, text: str) -> int:
-        """Extract budget from text"""
-        # Look for patterns like "1.5L", "Rs.50000", "50k"
-        patterns = [
-            r'(?:Rs\.?|INR)?\s*(\d+(?:\.\d+)?)\s*L(?:akh)?',  # 1.5L, Rs.1L
-            r'(?:Rs\.?|INR)?\s*(\d+)\s*k',  # 50k
-            r'(?:Rs\.?|INR)?\s*(\d{1,3}(?:,\d{3})*)',  # Rs.1,00,000
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                value = match.group(1).replace(',', '')
-                if 'L' in text[match.start():match.end()].upper():
-                    return int(float(value) * 100000)
-                elif 'k' in text[match.start():match.end()].lower():
-                    return int(float(value) * 1000)
-                else:
-                    return int(float(value))
-        
-        return 100000  # Default budget
+    def _rule_extraction(self, email_data: Dict, reference: datetime) -> Optional[Dict]:
+        """
+        Rule-based first pass
+        
+        Args:
+            email_data: Email dictionary
+            reference: Date relative deadlines count from
+            
+        Returns:
+            Requirements if every required field is confident enough, else None
+        """
+        requirements, confidence = self.rule_extractor.extract(email_data, reference)
+        weakest = min(confidence[field] for field in REQUIRED_FIELDS)
+        
+        if weakest < RULES_MIN_CONFIDENCE:
+            uncertain = [field for field in REQUIRED_FIELDS if confidence[field] < RULES_MIN_CONFIDENCE]
+            logger.debug(f"Rules not confident about {', '.join(uncertain)}, using the LLM")
+            return None
+        
+        logger.info(f"Extracted requirements by rules: {requirements['project_type']} "
+                    f"(confidence {weakest:.2f})")
+        requirements['extraction_confidence'] = weakest
+        return self._add_metadata(requirements, email_data, "rules")
+    
+    def _add_metadata(self, requirements: Dict, email_data: Dict, method: str) -> Dict:
+        """
+        Attach per-call metadata to an extraction
+        
+        Args:
+            requirements: Extracted requirements
+            email_data: Source email
+            method: "rules", "ai", "ai_batch" or "cache"
+            
+        Returns:
+            The requirements dictionary
+        """
+        requirements['extracted_at'] = datetime.now().isoformat()
+        requirements['email_id'] = email_data.get('email_id')
+        requirements['raw_email'] = {
+            'from': email_data.get('from'),
+            'subject': email_data.get('subject'),
+            'date': email_data.get('date')
+        }
+        requirements['extraction_method'] = method
+        return requirements
     
-    def _extract_deadline(self, text: str) -> str:
-        """Extract deadline from text"""
-        # Look for patterns like "in 20 days", "within 3 weeks", "by 15th Feb"
-        days_pattern = r'(?:in|within)\s+(\d+)\s+days?'
-        weeks_pattern = r'(?:in|within)\s+(\d+)\s+weeks?'
-        
-        match = re.search(days_pattern, text, re.IGNORECASE)
-        if match:
-            days = int(match.group(1))
-            deadline = datetime.now() + timedelta(days=days)
-            return deadline.isoformat()
-        
-        match = re.search(weeks_pattern, text, re.IGNORECASE)
-        if match:
-            weeks = int(match.group(1))
-            deadline = datetime.now() + timedelta(weeks=weeks)
-            return deadline.isoformat()
-        
-        # Default: 30 days from now
-        deadline = datetime.now() + timedelta(days=30)
-        return deadline.isoformat()
+    def _reference_date(self, email_data: Dict) -> datetime:
+        """
+        Date relative deadlines are resolved against
+        
+        Uses the email's Date header (in the sender's timezone), then the
+        time it was received, and only falls back to now.
+        
+        Args:
+            email_data: Email dictionary
+            
+        Returns:
+            Datetime (naive, in the email's local time)
+        """
+        if email_data.get('date'):
+            try:
+                return parsedate_to_datetime(str(email_data['date'])).replace(tzinfo=None)
+            except (TypeError, ValueError, IndexError):
+                pass
+        
+        if email_data.get('received_at'):
+            try:
+                return datetime.fromisoformat(email_data['received_at']).replace(tzinfo=None)
+            except ValueError:
+                pass
+        
+        return datetime.now()
     
-    def _detect_project_type(self, text: str) -> str:
-        """Detect project type from text"""
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['mobile app', 'android', 'ios', 'flutter']):
-            return "Mobile Application"
-        elif any(word in text_lower for word in ['e-commerce', 'ecommerce', 'e commerce', 'online store', 'shopping']):
-            return "E-commerce Platform"
-        elif any(word in text_lower for word in ['web app', 'webapp', 'web application']):
-            return "Web Application"
-        elif any(word in text_lower for word in ['website', 'web site', 'platform']):
-            return "Website"
-        elif any(word in text_lower for word in ['design', 'ui', 'ux', 'branding', 'logo']):
-            return "Design"
-        elif any(word in text_lower for word in ['inventory', 'management', 'erp', 'crm']):
-            return "Business Software"
-        else:
-            return "Software Development"
+    def _fallback_extraction(self, email_data: Dict) -> Dict:
+        """
+        Fallback rule-based extraction if AI fails
+        
+        Args:
+            email_data: Email dictionary
+            
+        Returns:
+            Basic requirements dictionary
+        """
+        logger.warning("Using fallback rule-based extraction")
+        
+        reference = self._reference_date(email_data)
+        requirements, _ = self.rule_extractor.extract(email_data, reference)
+        
+        # Defaults for anything the rules could not find
+        if requirements['budget'] is None:
+            requirements['budget'] = 100000
+        if requirements['deadline'] is None:
+            requirements['deadline'] = (reference + timedelta(days=30)).isoformat()
+        
+        requirements.update({
+            "extracted_at": datetime.now().isoformat(),
+            "email_id": email_data.get('email_id'),
+            "extraction_method": "fallback"
+        })
+        return requirements
 
 
 # Example usage
@@ -0,0 +1,358 @@
+"""
+Rule Extractor - Confidence-scored rule-based requirement extraction
+Handles formulaic project emails without an LLM call
+"""
+
+import re
+import calendar
+import logging
+from datetime import datetime, timedelta
+from email.utils import parseaddr
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fields that must be confident for the LLM call to be skipped
+REQUIRED_FIELDS = ('project_type', 'budget', 'deadline')
+
+# Context window (characters) searched for cue words around a value
+CUE_WINDOW = 40
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+NUMBER_WORDS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12
+}
+
+MONTH_RE = (r'(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+            r'|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?')
+COUNT_RE = r'(\d+|' + '|'.join(NUMBER_WORDS) + r')'
+
+# Money: needs a currency marker or an Indian/thousand unit, so "20 days" never matches.
+# Numbers may use Indian (1,00,000) or international (100,000) grouping.
+AMOUNT_PATTERN = re.compile(
+    r'(?P<currency>₹|\brs\.?|\binr\b)?\s*'
+    r'(?P<number>\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*'
+    r'(?P<unit>lakhs?\b|lacs?\b|l\b|crores?\b|cr\b|k\b|thousand\b)?'
+    r'(?P<suffix>\s*/-|\s*rupees\b)?',
+    re.IGNORECASE
+)
+RANGE_AFTER_PATTERN = re.compile(r'\s*(?:-|–|to)\s*(?:₹|rs\.?|inr)?\s*\d', re.IGNORECASE)
+RANGE_BEFORE_PATTERN = re.compile(r'(?:\d\s*(?:lakhs?|l|k)?|between)\s*(?:-|–|to|and)?\s*$', re.IGNORECASE)
+UNIT_MULTIPLIERS = {'l': 100000, 'lakh': 100000, 'lac': 100000, 'crore': 10000000, 'cr': 10000000,
+                    'k': 1000, 'thousand': 1000}
+
+BUDGET_CUE_PATTERN = re.compile(
+    r'\b(?:budget|cost|price|pricing|quote|pay|paying|spend|afford|total|upto|up to|around|approx\w*)\b',
+    re.IGNORECASE
+)
+CLAUSE_BREAK_PATTERN = re.compile(r'[.;]\s|\n')
+ADVANCE_CUE_PATTERN = re.compile(r'\badvance\b|\bupfront\b|\btoken amount\b', re.IGNORECASE)
+ADVANCE_PAID_PATTERN = re.compile(
+    r'\badvance\b|\bupfront\b|\bpaid\b|\bpayment (?:done|made|sent|transferred)\b', re.IGNORECASE
+)
+FULL_PAYMENT_PATTERN = re.compile(
+    r'\b(?:full|entire|complete|total) (?:payment|amount) (?:is |has been )?(?:done|paid|made|transferred|cleared)\b'
+    r'|\bpaid in full\b|\bfully paid\b',
+    re.IGNORECASE
+)
+
+DEADLINE_CUE_PATTERN = re.compile(
+    r'\b(?:deadline|due|by|before|latest|till|until|within|deliver\w*|launch\w*|complete\w*|'
+    r'ready|live|finish\w*|need(?:ed)? (?:it|this))\b',
+    re.IGNORECASE
+)
+ISO_DATE_PATTERN = re.compile(r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b')
+NUMERIC_DATE_PATTERN = re.compile(r'\b(\d{1,2})[/.](\d{1,2})[/.](\d{2}|\d{4})\b')
+DAY_MONTH_PATTERN = re.compile(
+    r'\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?' + MONTH_RE + r'(?:,?\s+(\d{4}))?\b', re.IGNORECASE
+)
+MONTH_DAY_PATTERN = re.compile(
+    r'\b' + MONTH_RE + r'\s+(\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s+(\d{4}))?', re.IGNORECASE
+)
+RELATIVE_PATTERN = re.compile(
+    r'\b(?:in|within|next)\s+' + COUNT_RE + r'\s+(day|week|month)s?\b'
+    r'|\b' + COUNT_RE + r'\s+(day|week|month)s?\s+(?:from now|from today|time)\b'
+    r'|\b(?:deadline|timeline|turnaround|delivery|due)\b[^\n\d]{0,12}?\b' + COUNT_RE + r'\s+(day|week|month)s?\b',
+    re.IGNORECASE
+)
+WEEKDAY_PATTERN = re.compile(
+    r'\b(by|before|on|this|next|till|until|coming)\s+(' + '|'.join(WEEKDAYS) + r')\b', re.IGNORECASE
+)
+TOMORROW_PATTERN = re.compile(r'\b(?:by|before|till|until)?\s*tomorrow\b', re.IGNORECASE)
+END_OF_MONTH_PATTERN = re.compile(r'\b(?:by |before )?(?:the )?end of (?:this |the )?month\b', re.IGNORECASE)
+
+# Project types in priority order; the first matching type wins
+PROJECT_TYPE_PATTERNS = [
+    ("Mobile Application", re.compile(r'\b(?:mobile app\w*|android|ios|iphone app|flutter|react native)\b', re.IGNORECASE)),
+    ("E-commerce Platform", re.compile(r'\b(?:e-?commerce|e commerce|online (?:store|shop)|shopping (?:site|website|cart)|marketplace)\b', re.IGNORECASE)),
+    ("Web Application", re.compile(r'\b(?:web ?app\w*|web application|web portal|dashboard|saas)\b', re.IGNORECASE)),
+    ("Business Software", re.compile(r'\b(?:inventory|erp|crm|billing|hrms|pos system|management system)\b', re.IGNORECASE)),
+    ("Website", re.compile(r'\b(?:website|web site|landing page|portfolio site|platform)\b', re.IGNORECASE)),
+    ("Design", re.compile(r'\b(?:design|ui|ux|branding|logo|mockups?|figma)\b', re.IGNORECASE)),
+]
+PROJECT_TYPE_LOOKUP = dict(PROJECT_TYPE_PATTERNS)
+# Types that co-occur with almost any project ("website for the app", "UI design")
+GENERIC_PROJECT_TYPES = {"Website", "Design"}
+
+LOW_COMPLEXITY_PATTERN = re.compile(r'\b(?:simple|basic|small|static|landing page|single page|one page)\b', re.IGNORECASE)
+HIGH_COMPLEXITY_PATTERN = re.compile(
+    r'\b(?:complex|enterprise|machine learning|ml|ai|real-?time|multi-?vendor|microservices|'
+    r'payment gateway|integrations?|scalable)\b',
+    re.IGNORECASE
+)
+
+# Typical effort for medium complexity projects (days)
+EFFORT_DAYS = {
+    "Mobile Application": 30,
+    "E-commerce Platform": 25,
+    "Web Application": 20,
+    "Business Software": 25,
+    "Website": 10,
+    "Design": 7,
+    "Software Development": 15,
+}
+COMPLEXITY_EFFORT_FACTORS = {'low': 0.6, 'medium': 1.0, 'high': 1.5}
+
+GREETING_PATTERN = re.compile(r'^(?:hi|hello|hey|dear|greetings|good (?:morning|afternoon|evening))\b', re.IGNORECASE)
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+
+class RuleExtractor:
+    """
+    Extracts requirements with precompiled patterns and scores each field
+    
+    Every field gets a confidence in [0, 1]: high when a single value was
+    found next to a cue word ("budget", "deadline", "by ..."), lower when
+    the value had no cue, and low when several conflicting values or a
+    range were found. Callers skip the LLM only if all REQUIRED_FIELDS
+    reach their threshold.
+    """
+    
+    def extract(self, email_data: Dict, reference: datetime = None) -> Tuple[Dict, Dict[str, float]]:
+        """
+        Extract requirements from an email
+        
+        Args:
+            email_data: Email dictionary with 'from', 'subject', 'body'
+            reference: Date relative deadlines count from (default: now)
+        
+        Returns:
+            (requirements, confidence): requirements uses the LLM output
+            schema (None where nothing was found); confidence maps each
+            field to a score
+        """
+        reference = reference or datetime.now()
+        subject = email_data.get('subject', '') or ''
+        body = email_data.get('body', '') or ''
+        text = f"{subject}\n{body}"
+        
+        project_type, type_confidence = self._detect_project_type(subject, text)
+        budget, advance_amount, budget_confidence = self._extract_amounts(text)
+        deadline, deadline_confidence = self._extract_deadline(text, reference)
+        complexity = self._estimate_complexity(text)
+        client_name, client_email = parseaddr(email_data.get('from', '') or '')
+        
+        requirements = {
+            "project_type": project_type,
+            "deadline": deadline.isoformat() if deadline else None,
+            "budget": budget,
+            "advance_paid": bool(advance_amount) or bool(ADVANCE_PAID_PATTERN.search(body)),
+            "advance_amount": advance_amount,
+            "full_payment_done": bool(FULL_PAYMENT_PATTERN.search(body)),
+            "client_name": client_name or None,
+            "client_email": client_email or email_data.get('from', ''),
+            "scope": self._summarize_scope(subject, body),
+            "complexity": complexity,
+            "estimated_effort_days": round(EFFORT_DAYS[project_type] * COMPLEXITY_EFFORT_FACTORS[complexity])
+        }
+        
+        confidence = {
+            'project_type': type_confidence,
+            'budget': budget_confidence,
+            'deadline': deadline_confidence,
+            'client_email': 1.0 if '@' in client_email else 0.0
+        }
+        return requirements, confidence
+    
+    def _detect_project_type(self, subject: str, text: str) -> Tuple[str, float]:
+        """Most specific matching project type and its confidence"""
+        matched = [name for name, pattern in PROJECT_TYPE_PATTERNS if pattern.search(text)]
+        if not matched:
+            return "Software Development", 0.3
+        
+        specific = [name for name in matched if name not in GENERIC_PROJECT_TYPES]
+        if len(specific) > 1:
+            # The subject usually names what is being asked for
+            in_subject = [name for name in specific if PROJECT_TYPE_LOOKUP[name].search(subject)]
+            if len(in_subject) == 1:
+                return in_subject[0], 0.85
+            # e.g. "mobile app with an admin CRM": let the LLM decide
+            return specific[0], 0.6
+        if len(matched) == 1:
+            return matched[0], 0.9
+        # A specific type plus generic words, or a website that needs design
+        return matched[0], 0.85
+    
+    def _extract_amounts(self, text: str) -> Tuple[Optional[int], Optional[int], float]:
+        """
+        Find the budget and advance amounts
+        
+        Returns:
+            (budget, advance_amount, budget_confidence)
+        """
+        budgets: List[Tuple[int, bool]] = []
+        advances: List[int] = []
+        ambiguous = False
+        
+        for match in AMOUNT_PATTERN.finditer(text):
+            if not (match.group('currency') or match.group('unit') or match.group('suffix')):
+                continue
+            
+            value = self._parse_amount(match.group('number'), match.group('unit'))
+            if value is None or not 1000 <= value <= 10 ** 9:
+                continue
+            
+            before = text[max(0, match.start() - CUE_WINDOW):match.start()]
+            # Advance cues must be in the same clause ("50k advance", "advance of Rs.30000")
+            clause_before = CLAUSE_BREAK_PATTERN.split(before[-25:])[-1]
+            clause_after = CLAUSE_BREAK_PATTERN.split(text[match.end():match.end() + 15])[0]
+            
+            if RANGE_AFTER_PATTERN.match(text, match.end()) or RANGE_BEFORE_PATTERN.search(before[-15:]):
+                ambiguous = True
+            
+            if ADVANCE_CUE_PATTERN.search(clause_before) or ADVANCE_CUE_PATTERN.search(clause_after):
+                advances.append(value)
+            else:
+                budgets.append((value, bool(BUDGET_CUE_PATTERN.search(before))))
+        
+        advance_amount = advances[0] if advances else None
+        if not budgets:
+            return None, advance_amount, 0.0
+        
+        cued = {value for value, has_cue in budgets if has_cue}
+        distinct = {value for value, _ in budgets}
+        
+        if ambiguous:
+            return budgets[0][0], advance_amount, 0.4
+        if len(cued) == 1:
+            return cued.pop(), advance_amount, 0.95
+        if len(cued) > 1:
+            return budgets[0][0], advance_amount, 0.5
+        if len(distinct) == 1:
+            # An amount without a budget cue may be anything (revenue, a quote, a fee)
+            return budgets[0][0], advance_amount, 0.5
+        return budgets[0][0], advance_amount, 0.4
+    
+    @staticmethod
+    def _parse_amount(number: str, unit: Optional[str]) -> Optional[int]:
+        """Convert "1,00,000" / "1.5" + "lakh" to rupees"""
+        try:
+            value = float(number.replace(',', ''))
+        except ValueError:
+            return None
+        
+        if unit:
+            unit = unit.lower()
+            unit = unit[:-1] if unit.endswith('s') else unit
+            value *= UNIT_MULTIPLIERS.get(unit, 1)
+        return int(round(value))
+    
+    def _extract_deadline(self, text: str, reference: datetime) -> Tuple[Optional[datetime], float]:
+        """Best deadline candidate and its confidence"""
+        candidates: List[Tuple[datetime, float]] = []
+        
+        def has_cue(position: int) -> bool:
+            return bool(DEADLINE_CUE_PATTERN.search(text[max(0, position - CUE_WINDOW):position + 1]))
+        
+        for match in RELATIVE_PATTERN.finditer(text):
+            count = match.group(1) or match.group(3) or match.group(5)
+            unit = (match.group(2) or match.group(4) or match.group(6)).lower()
+            count = int(count) if count.isdigit() else NUMBER_WORDS[count.lower()]
+            days = {'day': 1, 'week': 7, 'month': 30}[unit] * count
+            candidates.append((reference + timedelta(days=days), 0.9))
+        
+        for match in WEEKDAY_PATTERN.finditer(text):
+            qualifier = match.group(1).lower()
+            ahead = (WEEKDAYS.index(match.group(2).lower()) - reference.weekday()) % 7 or 7
+            if qualifier == 'next' and ahead < 7:
+                # "next Friday" usually means the one after the coming Friday
+                candidates.append((reference + timedelta(days=ahead + 7), 0.7))
+            else:
+                candidates.append((reference + timedelta(days=ahead), 0.85 if qualifier != 'on' else 0.6))
+        
+        for match in TOMORROW_PATTERN.finditer(text):
+            candidates.append((reference + timedelta(days=1), 0.85))
+        
+        for match in END_OF_MONTH_PATTERN.finditer(text):
+            last_day = calendar.monthrange(reference.year, reference.month)[1]
+            candidates.append((reference.replace(day=last_day), 0.85))
+        
+        for match in ISO_DATE_PATTERN.finditer(text):
+            self._add_absolute(candidates, reference, int(match.group(1)), int(match.group(2)),
+                               int(match.group(3)), has_cue(match.start()))
+        
+        for match in NUMERIC_DATE_PATTERN.finditer(text):
+            year = int(match.group(3))
+            self._add_absolute(candidates, reference, year + 2000 if year < 100 else year,
+                               int(match.group(2)), int(match.group(1)), has_cue(match.start()))
+        
+        for match in DAY_MONTH_PATTERN.finditer(text):
+            self._add_absolute(candidates, reference, match.group(3), MONTHS[match.group(2)[:3].lower()],
+                               int(match.group(1)), has_cue(match.start()))
+        
+        for match in MONTH_DAY_PATTERN.finditer(text):
+            self._add_absolute(candidates, reference, match.group(3), MONTHS[match.group(1)[:3].lower()],
+                               int(match.group(2)), has_cue(match.start()))
+        
+        if not candidates:
+            return None, 0.0
+        
+        best_score = max(score for _, score in candidates)
+        best_dates = {date.date() for date, score in candidates if score == best_score}
+        best = next(date for date, score in candidates if score == best_score)
+        
+        if len(best_dates) > 1:
+            return best, 0.5
+        if best < reference - timedelta(days=1):
+            return best, 0.4
+        return best, best_score
+    
+    @staticmethod
+    def _add_absolute(candidates: List, reference: datetime, year, month: int, day: int, cued: bool):
+        """Add a calendar date; a missing year means its next occurrence"""
+        try:
+            if year:
+                date = datetime(int(year), month, day)
+            else:
+                date = datetime(reference.year, month, day)
+                if date.date() < reference.date():
+                    date = datetime(reference.year + 1, month, day)
+        except ValueError:
+            return
+        candidates.append((date, 0.95 if cued else 0.6))
+    
+    @staticmethod
+    def _estimate_complexity(text: str) -> str:
+        """Conservative complexity guess from wording"""
+        if HIGH_COMPLEXITY_PATTERN.search(text):
+            return "high"
+        if LOW_COMPLEXITY_PATTERN.search(text):
+            return "low"
+        return "medium"
+    
+    @staticmethod
+    def _summarize_scope(subject: str, body: str, max_chars: int = 200) -> str:
+        """Subject plus the first substantive sentence of the body"""
+        for line in body.splitlines():
+            line = line.strip()
+            if not line or GREETING_PATTERN.match(line) or len(line.split()) < 4:
+                continue
+            sentence = SENTENCE_SPLIT_PATTERN.split(line, 1)[0]
+            scope = f"{subject.strip()}: {sentence}" if subject.strip() else sentence
+            return scope[:max_chars]
+        return subject.strip()[:max_chars]
@@ -0,0 +1,321 @@
+"""
+Response Parser - JSON extraction from LLM responses
+Finds the first JSON value in (streamed) model output, repairs common
+defects and validates it against a pydantic schema
+"""
+
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+OPENERS = {'{': '}', '[': ']'}
+CLOSERS = {'}', ']'}
+
+# Applied to the code (non-string) parts of a JSON text
+TRAILING_COMMA_PATTERN = re.compile(r',(\s*[}\]])')
+UNQUOTED_KEY_PATTERN = re.compile(r'([{,]\s*)([A-Za-z_][\w\-]*)(\s*:)')
+PYTHON_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+PYTHON_LITERAL_PATTERN = re.compile(r'\b(True|False|None)\b')
+
+
+class ResponseParseError(ValueError):
+    """The response holds no usable JSON, or it failed validation"""
+
+
+class JSONStreamExtractor:
+    """
+    Incremental scanner for the first balanced JSON object or array
+    
+    Text before the value (prose, ```json fences) is skipped. Strings
+    (double- or single-quoted) and // or /* */ comments are tracked so
+    brackets inside them don't count. feed() returns the value's text as
+    soon as its closing bracket arrives.
+    """
+    
+    def __init__(self):
+        self._parts: List[str] = []
+        self._stack: List[str] = []
+        self._state = 'code'
+        self._quote = ''
+        self._escape = False
+        self._previous = ''
+        self.result: Optional[str] = None
+    
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        Scan the next piece of text
+        
+        Args:
+            chunk: Response text
+        
+        Returns:
+            The complete JSON text once it has closed, else None
+        """
+        if self.result is not None:
+            return self.result
+        
+        start = 0
+        if not self._parts:
+            positions = [position for position in (chunk.find('{'), chunk.find('[')) if position != -1]
+            if not positions:
+                return None
+            start = min(positions)
+        
+        for offset in range(start, len(chunk)):
+            char = chunk[offset]
+            state = self._state
+            
+            if state == 'string':
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == self._quote:
+                    self._state = 'code'
+            elif state == 'line_comment':
+                if char == '\n':
+                    self._state = 'code'
+            elif state == 'block_comment':
+                if self._previous == '*' and char == '/':
+                    self._state = 'code'
+                    char = ''
+            elif char in '"\'':
+                self._state = 'string'
+                self._quote = char
+            elif char == '/' and self._previous == '/':
+                self._state = 'line_comment'
+            elif char == '*' and self._previous == '/':
+                self._state = 'block_comment'
+                char = ''
+            elif char in OPENERS:
+                self._stack.append(OPENERS[char])
+            elif char in CLOSERS and self._stack:
+                self._stack.pop()
+                if not self._stack:
+                    self._parts.append(chunk[start:offset + 1])
+                    self.result = ''.join(self._parts)
+                    return self.result
+            
+            self._previous = char
+        
+        self._parts.append(chunk[start:])
+        return None
+    
+    def close_truncated(self) -> Optional[str]:
+        """
+        Best-effort completion of a value cut off mid-way (e.g. by the
+        output token limit): closes the open string and brackets
+        
+        Returns:
+            Completed JSON text, or None if no value had started
+        """
+        if self.result is not None:
+            return self.result
+        if not self._parts:
+            return None
+        
+        text = ''.join(self._parts)
+        if self._state == 'string':
+            text += self._quote
+        return text + ''.join(reversed(self._stack))
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix defects LLMs commonly produce
+    
+    Handles comments, single-quoted strings, Python literals
+    (True/False/None), unquoted keys and trailing commas.
+    
+    Args:
+        text: Almost-JSON text
+    
+    Returns:
+        Repaired text (may still be invalid)
+    """
+    segments: List[Tuple[str, str]] = []
+    code: List[str] = []
+    index = 0
+    length = len(text)
+    
+    def flush_code():
+        if code:
+            segments.append(('code', ''.join(code)))
+            code.clear()
+    
+    while index < length:
+        char = text[index]
+        
+        if char in '"\'':
+            end, value = _read_string(text, index)
+            flush_code()
+            segments.append(('string', json.dumps(value, ensure_ascii=False)))
+            index = end
+        elif text.startswith('//', index):
+            newline = text.find('\n', index)
+            index = length if newline == -1 else newline
+        elif text.startswith('/*', index):
+            close = text.find('*/', index + 2)
+            index = length if close == -1 else close + 2
+        else:
+            code.append(char)
+            index += 1
+    flush_code()
+    
+    # Comments are dropped without splitting code, so a trailing comma and
+    # its closing bracket always share a code segment
+    repaired = []
+    for kind, segment in segments:
+        if kind == 'code':
+            segment = PYTHON_LITERAL_PATTERN.sub(lambda match: PYTHON_LITERALS[match.group(1)], segment)
+            segment = UNQUOTED_KEY_PATTERN.sub(r'\1"\2"\3', segment)
+            segment = TRAILING_COMMA_PATTERN.sub(r'\1', segment)
+        repaired.append(segment)
+    
+    return ''.join(repaired)
+
+
+def _read_string(text: str, start: int) -> Tuple[int, str]:
+    """Read a quoted string starting at text[start]; returns (end index, value)"""
+    quote = text[start]
+    value: List[str] = []
+    index = start + 1
+    
+    while index < len(text):
+        char = text[index]
+        if char == '\\' and index + 1 < len(text):
+            escaped = text[index + 1]
+            if escaped == 'u' and index + 5 < len(text):
+                try:
+                    value.append(chr(int(text[index + 2:index + 6], 16)))
+                    index += 6
+                    continue
+                except ValueError:
+                    pass
+            value.append({'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}.get(escaped, escaped))
+            index += 2
+        elif char == quote:
+            return index + 1, ''.join(value)
+        else:
+            value.append(char)
+            index += 1
+    
+    return index, ''.join(value)
+
+
+def extract_json_text(response: Any) -> str:
+    """
+    Pull the first JSON value out of a model response
+    
+    Args:
+        response: Response text, a generate_content response, or a
+            stream of chunks (strings or objects with .text); a stream is
+            only consumed until the value closes
+    
+    Returns:
+        JSON text (completed best-effort if the output was truncated)
+    
+    Raises:
+        ResponseParseError: If the response contains no JSON value
+    """
+    extractor = JSONStreamExtractor()
+    
+    if isinstance(response, str):
+        extractor.feed(response)
+    elif hasattr(response, '__iter__'):
+        for chunk in response:
+            if extractor.feed(chunk if isinstance(chunk, str) else chunk.text) is not None:
+                break
+    else:
+        extractor.feed(response.text)
+    
+    text = extractor.result or extractor.close_truncated()
+    if text is None:
+        raise ResponseParseError("No JSON object or array in response")
+    if extractor.result is None:
+        logger.warning("LLM response was truncated, closing open JSON brackets")
+    return text
+
+
+def loads_lenient(text: str) -> Any:
+    """
+    json.loads, retried once on repaired text
+    
+    Args:
+        text: JSON text
+    
+    Returns:
+        Parsed value
+    
+    Raises:
+        ResponseParseError: If the text can't be parsed even after repair
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        first_error = e
+    
+    try:
+        value = json.loads(repair_json(text))
+        logger.debug(f"Repaired malformed JSON from LLM ({first_error})")
+        return value
+    except json.JSONDecodeError as e:
+        raise ResponseParseError(f"Invalid JSON in response: {first_error}") from e
+
+
+def validate(value: Any, schema: Type[BaseModel]) -> Dict:
+    """
+    Validate a parsed object against a pydantic model
+    
+    Args:
+        value: Parsed JSON object
+        schema: Pydantic model class
+    
+    Returns:
+        The validated (type-coerced) object as a dictionary
+    
+    Raises:
+        ResponseParseError: If validation fails
+    """
+    if not isinstance(value, dict):
+        raise ResponseParseError(f"Expected a JSON object, got {type(value).__name__}")
+    try:
+        return schema.model_validate(value).model_dump()
+    except ValidationError as e:
+        raise ResponseParseError(f"Response failed {schema.__name__} validation: {e}") from e
+
+
+def parse_json_response(response: Any,
+                        schema: Type[BaseModel] = None,
+                        expect: Type = None) -> Union[Dict, List]:
+    """
+    Extract, repair and validate the JSON value in a model response
+    
+    Args:
+        response: Response text, response object or chunk stream
+        schema: Pydantic model each object is validated against (for an
+            array, every element)
+        expect: Required top-level type (dict or list)
+    
+    Returns:
+        Parsed (and validated) dictionary or list
+    
+    Raises:
+        ResponseParseError: If no valid JSON is found
+    """
+    value = loads_lenient(extract_json_text(response))
+    
+    if expect is not None and not isinstance(value, expect):
+        expected_name = {dict: 'object', list: 'array'}.get(expect, expect.__name__)
+        raise ResponseParseError(f"Expected a JSON {expected_name}, got {type(value).__name__}")
+    
+    if schema is not None:
+        if isinstance(value, list):
+            return [validate(item, schema) for item in value]
+        return validate(value, schema)
+    return value
@@ -0,0 +1,247 @@
+"""
+Assignment Solver - Deterministic task-to-member assignment
+Matches tasks to team members by minimum-cost bipartite matching on skill
+fit and remaining capacity
+"""
+
+import re
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cost of a task whose required skills the member has none of (still allowed)
+NO_SKILL_COST = 20.0
+
+# Cost of pushing a member past max_capacity (only chosen if nobody has room)
+OVER_CAPACITY_COST = 1000.0
+
+SKILL_SPLIT_PATTERN = re.compile(r'[^a-z0-9+#]+')
+
+
+class AssignmentSolver:
+    """
+    Capacity-aware task assignment
+    
+    Tasks are assigned in rounds. Each round is a min-cost bipartite
+    matching (Hungarian algorithm) between the unassigned tasks and the
+    team, so every member takes at most one task per round and costs
+    reflect the load added in earlier rounds. The cost of giving a task
+    to a member is
+        
+        SKILL_WEIGHT × (share of required skills the member lacks)
+        + LOAD_WEIGHT × (member's load after the task / max_capacity)
+    
+    plus NO_SKILL_COST / OVER_CAPACITY_COST where they apply. The result
+    depends only on the inputs.
+    """
+    
+    SKILL_WEIGHT = 10.0
+    LOAD_WEIGHT = 3.0
+    DEFAULT_CAPACITY = 20
+    
+    def solve(self, tasks: List[Dict], team_members: List[Dict], effort_days: float = None) -> Dict:
+        """
+        Assign tasks to team members
+        
+        Args:
+            tasks: Tasks with 'task_id', 'task_name', 'skills_required' and
+                optionally 'estimated_days'
+            team_members: Members with 'id', 'skills', 'current_workload'
+                and 'max_capacity' (days)
+            effort_days: Project effort, split evenly over tasks that have
+                no estimated_days (default: 15)
+        
+        Returns:
+            Dictionary with 'tasks' (copies with 'assigned_to' and
+            'estimated_days' set), 'team_assignments' and 'warnings'
+        """
+        tasks = [dict(task) for task in tasks]
+        warnings: List[str] = []
+        
+        default_days = max(1, int(effort_days or 15) // max(1, len(tasks)))
+        for task in tasks:
+            if not task.get('estimated_days'):
+                task['estimated_days'] = default_days
+        
+        if not team_members:
+            return {
+                "tasks": tasks,
+                "team_assignments": [],
+                "warnings": ["No team members available - tasks left unassigned"]
+            }
+        
+        member_skills = [self._skill_set(member.get('skills', [])) for member in team_members]
+        capacity = [float(member.get('max_capacity') or self.DEFAULT_CAPACITY) for member in team_members]
+        load = [float(member.get('current_workload') or 0) for member in team_members]
+        coverage = [
+            [self._coverage(task.get('skills_required') or [], skills) for skills in member_skills]
+            for task in tasks
+        ]
+        
+        pending = list(range(len(tasks)))
+        while pending:
+            # Members with no room for even the smallest task sit the round out
+            # (unless nobody has room), so a round never forces work on them
+            smallest = min(float(tasks[t]['estimated_days']) for t in pending)
+            members = [m for m in range(len(team_members)) if load[m] + smallest <= capacity[m]]
+            members = members or list(range(len(team_members)))
+            
+            cost = [
+                [self._cost(coverage[t][m], load[m], float(tasks[t]['estimated_days']), capacity[m]) for m in members]
+                for t in pending
+            ]
+            
+            if len(pending) <= len(members):
+                pairs = [(pending[row], members[column]) for row, column in enumerate(_hungarian(cost))]
+            else:
+                # More tasks than people: each member picks one task this round
+                transposed = [list(column) for column in zip(*cost)]
+                pairs = sorted((pending[column], members[row]) for row, column in enumerate(_hungarian(transposed)))
+            
+            for task_index, member_index in pairs:
+                task = tasks[task_index]
+                member = team_members[member_index]
+                days = float(task['estimated_days'])
+                
+                if load[member_index] + days > capacity[member_index]:
+                    warnings.append(f"{member['id']} is over capacity with {task.get('task_id')} "
+                                    f"({load[member_index] + days:g}/{capacity[member_index]:g} days)")
+                if coverage[task_index][member_index] is not None and coverage[task_index][member_index] == 0:
+                    warnings.append(f"{member['id']} has none of the skills for {task.get('task_id')} "
+                                    f"({', '.join(task.get('skills_required') or [])})")
+                
+                task['assigned_to'] = member['id']
+                load[member_index] += days
+            
+            assigned = {task_index for task_index, _ in pairs}
+            pending = [task_index for task_index in pending if task_index not in assigned]
+        
+        return {
+            "tasks": tasks,
+            "team_assignments": self._summarize(tasks, team_members),
+            "warnings": warnings
+        }
+    
+    def _cost(self, coverage: Optional[float], load: float, days: float, capacity: float) -> float:
+        """Cost of one task/member pair"""
+        if coverage is None:  # task needs no particular skill
+            cost = self.SKILL_WEIGHT * 0.5
+        else:
+            cost = self.SKILL_WEIGHT * (1 - coverage)
+            if coverage == 0:
+                cost += NO_SKILL_COST
+        
+        projected = load + days
+        cost += self.LOAD_WEIGHT * projected / capacity
+        if projected > capacity:
+            cost += OVER_CAPACITY_COST
+        return cost
+    
+    @staticmethod
+    def _skill_set(skills: List[str]) -> set:
+        """Lower-cased skills plus their individual words"""
+        result = set()
+        for skill in skills:
+            skill = str(skill).lower().strip()
+            result.add(skill)
+            result.update(word for word in SKILL_SPLIT_PATTERN.split(skill) if word)
+        return result
+    
+    @classmethod
+    def _coverage(cls, required: List[str], member_skills: set) -> Optional[float]:
+        """Share of required skills a member has (None if none are required)"""
+        if not required:
+            return None
+        matched = 0
+        for skill in required:
+            skill = str(skill).lower().strip()
+            words = [word for word in SKILL_SPLIT_PATTERN.split(skill) if word]
+            if skill in member_skills or any(word in member_skills for word in words):
+                matched += 1
+        return matched / len(required)
+    
+    @staticmethod
+    def _summarize(tasks: List[Dict], team_members: List[Dict]) -> List[Dict]:
+        """Per-member view of the assignment"""
+        summary = []
+        for member in team_members:
+            own = [task for task in tasks if task.get('assigned_to') == member['id']]
+            if not own:
+                continue
+            summary.append({
+                "team_member_id": member['id'],
+                "role": own[0].get('task_name'),
+                "tasks_assigned": [task.get('task_id') for task in own],
+                "total_workload_days": sum(float(task['estimated_days']) for task in own)
+            })
+        return summary
+
+
+def _hungarian(cost: List[List[float]]) -> List[int]:
+    """
+    Minimum-cost assignment of rows to distinct columns (rows <= columns)
+    
+    Hungarian algorithm with potentials, O(rows² × columns).
+    
+    Args:
+        cost: Cost matrix
+    
+    Returns:
+        Column index for each row
+    """
+    rows = len(cost)
+    columns = len(cost[0]) if rows else 0
+    infinity = float('inf')
+    
+    # 1-based, column 0 is a virtual start node
+    row_potential = [0.0] * (rows + 1)
+    column_potential = [0.0] * (columns + 1)
+    column_match = [0] * (columns + 1)
+    previous = [0] * (columns + 1)
+    
+    for row in range(1, rows + 1):
+        column_match[0] = row
+        current = 0
+        min_slack = [infinity] * (columns + 1)
+        used = [False] * (columns + 1)
+        
+        while True:
+            used[current] = True
+            matched_row = column_match[current]
+            delta = infinity
+            next_column = 0
+            
+            for column in range(1, columns + 1):
+                if used[column]:
+                    continue
+                slack = cost[matched_row - 1][column - 1] - row_potential[matched_row] - column_potential[column]
+                if slack < min_slack[column]:
+                    min_slack[column] = slack
+                    previous[column] = current
+                if min_slack[column] < delta:
+                    delta = min_slack[column]
+                    next_column = column
+            
+            for column in range(columns + 1):
+                if used[column]:
+                    row_potential[column_match[column]] += delta
+                    column_potential[column] -= delta
+                else:
+                    min_slack[column] -= delta
+            
+            current = next_column
+            if column_match[current] == 0:
+                break
+        
+        # Flip the augmenting path
+        while current:
+            previous_column = previous[current]
+            column_match[current] = column_match[previous_column]
+            current = previous_column
+    
+    assignment = [0] * rows
+    for column in range(1, columns + 1):
+        if column_match[column]:
+            assignment[column_match[column] - 1] = column - 1
+    return assignment
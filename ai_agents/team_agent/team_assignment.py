@@ -1,20 +1,24 @@
 """
 Team Assignment Agent
-Breaks projects into tasks and assigns to team members
+Breaks projects into tasks (LLM) and assigns them to team members (local solver)
 """
 
 import os
 import json
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 import google.generativeai as genai
+from pydantic import BaseModel, ConfigDict
+
+from ..llm_client import LLMClient, get_llm_client
+from .assignment_solver import AssignmentSolver
 
 logger = logging.getLogger(__name__)
 
 
-TEAM_ASSIGNMENT_PROMPT = """You are an AI project manager for a service startup.
+TASK_BREAKDOWN_PROMPT = """You are an AI project manager for a service startup.
 
-Your task is to break down a project into tasks and assign roles.
+Your task is to break down a project into tasks.
 
 **Project Details:**
 Type: {project_type}
@@ -23,14 +27,13 @@ Complexity: {complexity}
 Estimated Effort: {estimated_effort_days} days
 Budget: Rs.{budget}
 
-**Available Team Members:**
-{team_members}
+**Skills Available in the Team:**
+{team_skills}
 
 **Your Task:**
 1. Break the project into specific tasks
-2. Assign appropriate team members to each task
-3. Estimate time for each task
-4. Ensure workload is balanced
+2. Estimate time for each task
+3. List the skills each task needs (use the team's skill names where they fit)
 
 **Output Format (JSON only):**
 {{
@@ -39,40 +42,54 @@ Budget: Rs.{budget}
       "task_id": "T1",
       "task_name": "string",
       "description": "string",
-      "assigned_to": "team_member_id",
       "estimated_days": number,
       "skills_required": ["skill1", "skill2"]
     }}
   ],
-  "team_assignments": [
-    {{
-      "team_member_id": "string",
-      "role": "string",
-      "tasks_assigned": ["T1", "T2"],
-      "total_workload_days": number
-    }}
-  ],
-  "warnings": ["string"] // Any concerns about capacity or skills
+  "warnings": ["string"] // Any concerns about scope or missing skills
 }}
 
 Respond with valid JSON only.
 """
 
 
+class PlannedTask(BaseModel):
+    """One task of a team assignment plan"""
+    model_config = ConfigDict(extra='allow')
+    
+    task_id: str
+    task_name: str
+    description: Optional[str] = None
+    assigned_to: Optional[str] = None
+    estimated_days: Optional[Union[int, float]] = None
+    skills_required: List[str] = []
+
+
+class TaskBreakdown(BaseModel):
+    """Schema of the task breakdown response"""
+    model_config = ConfigDict(extra='allow')
+    
+    tasks: List[PlannedTask]
+    warnings: List[str] = []
+
+
 class TeamAssignmentAgent:
     """
     Team Assignment Agent
     
-    Breaks projects into tasks and assigns to team members
+    Breaks projects into tasks and assigns to team members. Gemini only
+    does the breakdown; AssignmentSolver matches tasks to members.
     """
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, llm_client: LLMClient = None, solver: AssignmentSolver = None):
         """Initialize Team Assignment Agent"""
         genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
         self.model = genai.GenerativeModel(
             model_name="models/gemini-2.5-flash-lite-preview-09-2025",
             generation_config={"temperature": 0.3}
         )
+        self.llm = llm_client or get_llm_client()
+        self.solver = solver or AssignmentSolver()
         self.name = "TeamAssignmentAgent"
     
     def assign_team(self, project_requirements: Dict, team_members: List[Dict]) -> Dict:
@@ -89,47 +106,41 @@ class TeamAssignmentAgent:
         logger.info(f"Assigning team for project: {project_requirements.get('project_type')}")
         
         try:
-            # Format team members for prompt
-            team_info = "\n".join([
-                f"- {member['id']}: {member['name']} (Skills: {', '.join(member['skills'])}, "
-                f"Current Load: {member.get('current_workload', 0)} days, "
-                f"Capacity: {member.get('max_capacity', 20)} days)"
-                for member in team_members
-            ])
-            
-            # Prepare prompt
-            prompt = TEAM_ASSIGNMENT_PROMPT.format(
-                project_type=project_requirements.get('project_type', 'Unknown'),
-                scope=project_requirements.get('scope', 'Not specified'),
-                complexity=project_requirements.get('complexity', 'medium'),
-                estimated_effort_days=project_requirements.get('estimated_effort_days', 15),
-                budget=project_requirements.get('budget', 0),
-                team_members=team_info
-            )
-            
-            # Call Gemini
-            response = self.model.generate_content(prompt)
-            
-            # Parse response
-            response_text = response.text.strip()
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            
-            assignment = json.loads(response_text.strip())
-            
-            logger.info(f"Team assigned: {len(assignment.get('tasks', []))} tasks created")
-            return assignment
-            
+            breakdown = self._break_down(project_requirements, team_members)
         except Exception as e:
             logger.error(f"Error assigning team: {e}")
             return self._fallback_assignment(project_requirements, team_members)
+        
+        assignment = self.solver.solve(
+            breakdown['tasks'], team_members, project_requirements.get('estimated_effort_days')
+        )
+        assignment['warnings'] = breakdown.get('warnings', []) + assignment['warnings']
+        
+        logger.info(f"Team assigned: {len(assignment.get('tasks', []))} tasks created")
+        return assignment
+    
+    def _break_down(self, project_requirements: Dict, team_members: List[Dict]) -> Dict:
+        """Ask Gemini for the project's tasks (without assignees)"""
+        team_skills = sorted({skill for member in team_members for skill in member.get('skills', [])})
+        
+        # Prepare prompt
+        prompt = TASK_BREAKDOWN_PROMPT.format(
+            project_type=project_requirements.get('project_type', 'Unknown'),
+            scope=project_requirements.get('scope', 'Not specified'),
+            complexity=project_requirements.get('complexity', 'medium'),
+            estimated_effort_days=project_requirements.get('estimated_effort_days', 15),
+            budget=project_requirements.get('budget', 0),
+            team_skills=', '.join(team_skills) or 'Not specified'
+        )
+        
+        # Call Gemini
+        breakdown = self.llm.generate_json(self.model, prompt, TaskBreakdown, expect=dict)
+        if not breakdown['tasks']:
+            raise ValueError("Task breakdown has no tasks")
+        return breakdown
     
     def _fallback_assignment(self, requirements: Dict, team_members: List[Dict]) -> Dict:
-        """Fallback assignment logic"""
+        """Fallback assignment logic: template tasks, same solver"""
         logger.warning("Using fallback team assignment")
         
         project_type = requirements.get('project_type', '').lower()
@@ -149,28 +160,9 @@ class TeamAssignmentAgent:
                 {"task_id": "T3", "task_name": "Testing", "skills_required": ["testing"]}
             ]
         
-        # Simple skill matching
-        assignments = []
-        for task in tasks:
-            # Find best match
-            best_member = None
-            for member in team_members:
-                if any(skill in member.get('skills', []) for skill in task['skills_required']):
-                    best_member = member
-                    break
-            
-            if not best_member and team_members:
-                best_member = team_members[0]  # Assign to first available
-            
-            if best_member:
-                task['assigned_to'] = best_member['id']
-                task['estimated_days'] = requirements.get('estimated_effort_days', 15) // len(tasks)
-        
-        return {
-            "tasks": tasks,
-            "team_assignments": [],
-            "warnings": ["Fallback assignment used - manual review recommended"]
-        }
+        assignment = self.solver.solve(tasks, team_members, requirements.get('estimated_effort_days', 15))
+        assignment['warnings'] = ["Fallback assignment used - manual review recommended"] + assignment['warnings']
+        return assignment
 
 
 # Example usage
@@ -22,7 +22,20 @@ sys.path.insert(0, project_root)
 router = APIRouter(prefix="/api/autonomous", tags=["Autonomous System"])
 
 
+def get_email_pool():
+    """Shared IMAP connection pool, so requests don't pay a TLS handshake + LOGIN each"""
+    from ai_agents.email_agent.connection_pool import get_connection_pool
+    return get_connection_pool(os.getenv("COMPANY_EMAIL"), os.getenv("EMAIL_PASSWORD"))
+
+
+def _create_project_queue():
+    """Ranking of active projects, rescored only when deadlines cross urgency buckets"""
+    from ai_agents.decision_agent.priority_queue import ProjectPriorityQueue
+    return ProjectPriorityQueue()
+
+
 # In-memory storage (in production, use database)
+project_queue = _create_project_queue()
 system_status = {
     "is_running": True,  # Set to True so system shows as running
     "last_check": None,
@@ -43,19 +56,19 @@ async def reset_system():
         "projects_created": 0,
         "active_projects": []
     }
+    project_queue.clear()
     # Clear processed emails files
     try:
-        import json
-        # Backend processed emails
-        backend_storage = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed_emails.json')
-        with open(backend_storage, 'w') as f:
-            json.dump({"processed_emails": [], "email_project_mapping": {}, "last_updated": datetime.now().isoformat()}, f)
+        from ai_agents.email_agent.email_storage import create_email_storage
+        
+        # Shared processed emails store (project root or EMAIL_STORAGE_FILE)
+        create_email_storage().clear()
         
-        # Root processed emails
-        root_storage = os.path.join(project_root, 'processed_emails.json')
-        if os.path.exists(root_storage):
-            with open(root_storage, 'w') as f:
-                json.dump({"processed_emails": [], "email_project_mapping": {}, "last_updated": datetime.now().isoformat()}, f)
+        # Legacy store from processes started inside backend/ (JSON or append-log files;
+        # the log backend's clear() resets both)
+        backend_storage = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'processed_emails.json')
+        if os.path.exists(backend_storage) or os.path.exists(backend_storage + '.log'):
+            create_email_storage(backend_storage, backend="log").clear()
     except Exception as e:
         print(f"Warning: Could not clear processed emails file: {e}")
     
@@ -85,14 +98,13 @@ async def get_active_projects():
 
 
 @router.get("/team-assignments")
-async def get_team_assignments():
-    """Get all team assignments based on priority"""
-    # Sort projects by priority score (higher = more urgent)
-    sorted_projects = sorted(
-        system_status["active_projects"],
-        key=lambda p: p.get("priority_score", 0),
-        reverse=True
-    )
+async def get_team_assignments(top: Optional[int] = None):
+    """Get all team assignments based on priority (optionally only the top N projects)"""
+    # Projects by current priority score (higher = more urgent)
+    if top is not None:
+        sorted_projects = project_queue.top_k(top)
+    else:
+        sorted_projects = project_queue.ranked()
     
     # Build team assignment overview
     team_overview = {}
@@ -109,7 +121,7 @@ async def get_team_assignments():
             team_overview[member_id]["assigned_projects"].append({
                 "project_id": project.get("id"),
                 "project_name": project.get("name"),
-                "priority": project.get("priority"),
+                "priority": project.get("priority_level"),
                 "priority_score": project.get("priority_score"),
                 "task": team_member.get("task")
             })
@@ -120,7 +132,7 @@ async def get_team_assignments():
             {
                 "id": p.get("id"),
                 "name": p.get("name"),
-                "priority": p.get("priority"),
+                "priority": p.get("priority_level"),
                 "priority_score": p.get("priority_score"),
                 "tasks": p.get("tasks", []),
                 "assigned_team": p.get("assigned_team", [])
@@ -158,16 +170,17 @@ async def trigger_email_check():
         
         logger.info("Starting manual email check with Autonomous System...")
         
-        # Use full Autonomous System
-        system = AutonomousSystem()
+        with get_email_pool().connection() as connector:
+            # Use full Autonomous System
+            system = AutonomousSystem(email_connector=connector)
         
-        # This triggers the full pipeline:
-        # 1. Check emails (using our fixed fetch_recent_emails logic)
-        # 2. Extract requirements
-        # 3. Calculate priority
-        # 4. Assign team
-        # 5. Notify client
-        system.process_new_emails()
+            # This triggers the full pipeline:
+            # 1. Check emails (using our fixed fetch_recent_emails logic)
+            # 2. Extract requirements
+            # 3. Calculate priority
+            # 4. Assign team
+            # 5. Notify client
+            system.process_new_emails()
         
         # Calculate stats from the system execution
         # Note: accurate counting would require system to return stats
@@ -180,6 +193,7 @@ async def trigger_email_check():
         system_status["projects_created"] += projects_created
         
         # Update active projects list with full data including team assignments
+        project_records = []
         for p in system.active_projects:
             # Get team assignment data
             tasks = p.get("tasks", [])
@@ -200,8 +214,9 @@ async def trigger_email_check():
                                 "task": task.get("task_name")
                             })
             
-            system_status["active_projects"].append({
+            project_record = {
                 "id": p.get("project_id"),
+                "project_id": p.get("project_id"),
                 "name": p.get("project_type", "New Project"),
                 "client": p.get("client_email"),
                 "status": "Active",
@@ -213,17 +228,24 @@ async def trigger_email_check():
                 "scope": p.get("scope"),
                 "tasks": tasks,
                 "team_assignment": team_assignment,
-                "assigned_team": assigned_team
-            })
+                "assigned_team": assigned_team,
+                # Scoring inputs, so the ranking can be kept current
+                "advance_paid": p.get("advance_paid"),
+                "client_type": p.get("client_type"),
+                "team_load": p.get("team_load")
+            }
+            project_records.append(project_record)
+            system_status["active_projects"].append(project_record)
+            project_queue.upsert(project_record)
             
         system_status["last_check"] = datetime.now().isoformat()
         
         # Get list of processed emails for response
         processed_emails_list = []
-        for p in system.active_projects:
+        for project_record in project_records:
             processed_emails_list.append({
-                "from": p.get("client_email"),
-                "subject": f"Project {p.get('project_id')}",
+                "from": project_record["client"],
+                "subject": f"Project {project_record['id']}",
                 "date": datetime.now().isoformat()
             })
         
@@ -251,20 +273,12 @@ async def trigger_email_check():
 async def test_connector():
     """Test email connector directly"""
     try:
-        from ai_agents.email_agent.email_connector import EmailConnector
-        import os
-        
-        email = os.getenv("COMPANY_EMAIL")
-        password = os.getenv("EMAIL_PASSWORD")
-        
-        connector = EmailConnector(email, password)
-        
-        if not connector.connect():
+        try:
+            with get_email_pool().connection() as connector:
+                emails = connector.fetch_recent_emails(days=1, limit=20)
+        except ConnectionError:
             return {"error": "Failed to connect"}
         
-        emails = connector.fetch_recent_emails(days=1, limit=20)
-        connector.disconnect()
-        
         return {
             "success": True,
             "total_emails": len(emails),
@@ -361,17 +375,13 @@ async def get_recent_decisions():
 async def test_email_connection():
     """Test email connection"""
     try:
-        from ai_agents.email_agent.email_connector import EmailConnector
-        import os
-        
-        email = os.getenv("COMPANY_EMAIL")
-        password = os.getenv("EMAIL_PASSWORD")
-        
-        connector = EmailConnector(email, password)
-        connected = connector.connect()
+        try:
+            with get_email_pool().connection() as connector:
+                connected = connector.is_alive()
+        except ConnectionError:
+            connected = False
         
         if connected:
-            connector.disconnect()
             return {"success": True, "message": "Email connection successful"}
         else:
             return {"success": False, "message": "Failed to connect"}